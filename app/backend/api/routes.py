@@ -1,8 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
 from loguru import logger
 
-from domain.models import ChatRequest, ChatResponse, HealthResponse
+from domain.models import (
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    Relationships,
+    SearchFilters,
+    SearchRequest,
+    SearchResponse,
+)
 from services.chat_service import ChatService
+from services.compression_service import compression_service
+from services.neo4j_service import neo4j_service
+from services.rerank_service import rerank_service
+from services.search_service import InvalidCursorError, search_service
+from services.synthesis_service import synthesis_service
 from core.config import settings
 import logging
 
@@ -41,6 +56,87 @@ async def chat(request: ChatRequest):
         )
 
 
+@router.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    """
+    Retrieval-only search: ranked articles from Qdrant, without LLM synthesis.
+    Pass `next_cursor` from the previous response as `cursor` to get the next page.
+    """
+    try:
+        logger.info(f"Receive /search request: {request}")
+
+        if len(request.query.strip()) == 0:
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+        return await search_service.search(request)
+
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in search endpoint: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An internal error occurred while processing your request"
+        )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_get(
+    q: str = Query(..., min_length=1, max_length=2000, description="Search query"),
+    limit: int = Query(10, ge=1, le=50, description="Number of documents per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned by the previous page"),
+    document_id: Optional[str] = Query(None, description="Official document identifier"),
+    vbpl_id: Optional[str] = Query(None, description="VBPL ID"),
+    document_status: Optional[str] = Query(None, description="Document status"),
+    expand_relationships: bool = Query(False, description="Load Neo4j relationships for the returned page"),
+):
+    """
+    GET variant of /search with the filters as query parameters.
+    """
+    filters = SearchFilters(document_id=document_id, vbpl_id=vbpl_id, document_status=document_status)
+    return await search(SearchRequest(
+        query=q,
+        limit=limit,
+        cursor=cursor,
+        filters=filters if filters.model_dump(exclude_none=True) else None,
+        expand_relationships=expand_relationships,
+    ))
+
+
+@router.get("/articles/{article_id}/relationships", response_model=Relationships)
+async def article_relationships(article_id: str):
+    """
+    Relationships of a single article, for lazy expansion of search results.
+    """
+    try:
+        return search_service.get_relationships(article_id)
+    except Exception as e:
+        logger.error(f"Unexpected error in relationships endpoint: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="An internal error occurred while processing your request"
+        )
+
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Cache and snapshot statistics (hit ratios, entry counts, approximate memory).
+    """
+    return {
+        "graph": neo4j_service.stats(),
+        "reranker": rerank_service.stats(),
+        "search": {"ranking_cache": search_service.ranking_cache.stats()},
+        "synthesis": {
+            "fragment_cache": synthesis_service.fragment_cache.stats(),
+            "response_cache": synthesis_service.response_cache.stats() if synthesis_service.response_cache else None,
+        },
+        "compression": {"embedding_cache": compression_service.embedding_cache.stats()},
+    }
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health():
     """
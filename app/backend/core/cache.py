@@ -0,0 +1,177 @@
+"""
+Caches shared by the services: bounded in-memory LRU caches and a persistent SQLite cache.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live and hit/miss counters.
+
+    `size_fn`, if given, estimates the size in bytes of each value; the running total
+    is reported by `stats()`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        size_fn: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.size_fn = size_fn
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.size_bytes -= size
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entries if full."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        size = self.size_fn(value) if self.size_fn else 0
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None:
+                self.size_bytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self._data.move_to_end(key)
+            self.size_bytes += size
+            while len(self._data) > self.max_size:
+                _, evicted = self._data.popitem(last=False)
+                self.size_bytes -= evicted[2]
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._data.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss statistics."""
+        lookups = self.hits + self.misses
+        stats = {
+            "entries": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if self.size_fn:
+            stats["approx_bytes"] = self.size_bytes
+        return stats
+
+
+class SQLiteCache:
+    """
+    Persistent key-value cache in a SQLite file, with an optional time-to-live and hit/miss
+    counters. Values are stored as JSON.
+
+    Every entry is tagged with the cache `version` current when it was written; entries of
+    another version are misses, and are deleted when `set_version` moves to a new version.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.version = ""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, version TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def set_version(self, version: Any) -> None:
+        """Switch to `version`, dropping the entries written under any other version."""
+        version = "" if version is None else str(version)
+        if version == self.version:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE version != ?", (version,))
+            self.version = version
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` if missing, expired or of another version."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, version, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] != self.version:
+                self.misses += 1
+                return default
+
+            value, _, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key` for the current version."""
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, version, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), self.version, expires_at),
+            )
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -2,10 +2,10 @@
 Configuration settings for the application.
 """
 import os
-from typing import List
+from typing import Dict, List
 
 
-from pydantic import AnyHttpUrl
+from pydantic import AnyHttpUrl, Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv, find_dotenv
 
@@ -31,16 +31,59 @@ class Settings(BaseSettings):
     # Qdrant settings
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_INDEX: str = "vietnam_law_docs"
+    QDRANT_ENSURE_PAYLOAD_INDEXES: bool = True
     
     # Neo4j settings
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_USERNAME: str = "neo4j"
     NEO4J_PASSWORD: str = "password123"
+    NEO4J_ENSURE_SCHEMA: bool = True
+    GRAPH_LOAD_BATCH_SIZE: int = 5000
+
+    # Graph backend for relationship expansion: "neo4j" (query per request), "snapshot" (in-memory CSR)
+    # or "payload" (adjacency denormalized into the Qdrant payload by retrieval/indexing/adjacency.py)
+    GRAPH_BACKEND: str = "neo4j"
+    GRAPH_SNAPSHOT_REFRESH_SECONDS: int = 300
+
+    # Relationship expansion cache (cleared when the loader bumps the graph version)
+    RELATIONSHIP_CACHE_SIZE: int = 5000
+    RELATIONSHIP_CACHE_TTL_SECONDS: int = 3600
+    GRAPH_VERSION_CHECK_SECONDS: int = 30
+
+    # Neighbor projection: content snippet length and max neighbors per relation type
+    NEIGHBOR_SNIPPET_CHARS: int = 200
+    NEO4J_NEIGHBOR_CAPS: Dict[str, int] = {}
+    NEO4J_NEIGHBOR_DEFAULT_CAP: int = 20
+
+    # Multi-hop expansion along amendment/replacement chains (GRAPH_MAX_DEPTH=1 keeps direct neighbors only).
+    # The chain query is unrolled per hop, hence the bound
+    GRAPH_MAX_DEPTH: int = Field(1, ge=1, le=4)
+    GRAPH_CHAIN_RELATION_TYPES: List[str] = ["THAY_THE", "SUA_DOI_BO_SUNG"]
+    GRAPH_MAX_FANOUT: int = 5
+    GRAPH_MAX_CHAIN_NODES: int = 10
+    GRAPH_PRUNE_EXPIRED: bool = True
+
+    # Neighbor ranking: keep the NEIGHBOR_TOP_M most query-relevant neighbors per article, NEIGHBOR_BUDGET overall
+    NEIGHBOR_RANKING_ENABLED: bool = False
+    NEIGHBOR_TOP_M: int = 5
+    NEIGHBOR_BUDGET: int = 20
+    NEIGHBOR_RELATION_WEIGHTS: Dict[str, float] = {
+        "THAY_THE": 1.0,
+        "SUA_DOI_BO_SUNG": 1.0,
+        "BAI_BO": 0.9,
+        "DINH_CHI": 0.9,
+        "HUONG_DAN_QUY_DINH": 0.8,
+    }
+    NEIGHBOR_DEFAULT_WEIGHT: float = 0.5
         
     # Embedding settings
     EMBEDDER_TYPE: str = "openai"
     SPARSE_EMBEDDING_MODEL: str = "Qdrant/bm25"
+    SPARSE_ENCODER_TYPE: str = "fastembed"
+    SPARSE_AVG_DOC_LENGTH: float = 256.0
+    SPARSE_IDF: bool = True
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
     EMBEDDING_MODEL_NAME: str = "gpt-5-mini"
     EMBEDDING_BATCH_SIZE: int = 32
     EMBEDDING_DIMENSIONS: int = 1536
@@ -49,6 +92,50 @@ class Settings(BaseSettings):
     DOCUMENT_STORE_TYPE: str = "qdrant_hybrid"
     RETRIEVER_TOP_K: int = 5
     RETRIEVER_SCORE_THRESHOLD: float = 0.7
+
+    # Matryoshka settings (0 disables the low-dimension prefetch vector)
+    MATRYOSHKA_DIMENSIONS: int = 0
+    MATRYOSHKA_PREFETCH_LIMIT: int = 100
+
+    # Embedded store settings (DOCUMENT_STORE_TYPE=embedded)
+    EMBEDDED_STORE_PATH: str = "data/embedded_store"
+
+    # Reranker settings
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL_NAME: str = "jinaai/jina-reranker-v2-base-multilingual"
+    RERANKER_FETCH_K: int = 40
+    RERANKER_BATCH_SIZE: int = 16
+    RERANKER_THREADS: int = 0
+    RERANKER_CACHE_SIZE: int = 10000
+
+    # Search endpoint settings (deepest rank reachable through pagination, cached rankings per query)
+    SEARCH_MAX_RESULTS: int = 200
+    SEARCH_CACHE_SIZE: int = 1000
+    SEARCH_CACHE_TTL_SECONDS: int = 300
+
+    # Sharding settings (one Qdrant collection per document category, named QDRANT_INDEX_<category>)
+    SHARD_BY_CATEGORY: bool = False
+    SHARD_QUERY_ROUTING: bool = True
+
+    # MMR diversification settings
+    MMR_ENABLED: bool = False
+    MMR_LAMBDA: float = 0.7
+    MMR_FETCH_K: int = 20
+
+    # Centrality prior (needs retrieval/indexing/centrality.py): score * (1 + CENTRALITY_BOOST * normalised PageRank)
+    CENTRALITY_BOOST: float = 0.0
+    CENTRALITY_FETCH_K: int = 20
+    CENTRALITY_RELATION_TYPES: List[str] = ["HUONG_DAN_QUY_DINH", "SUA_DOI_BO_SUNG"]
+    CENTRALITY_DAMPING: float = 0.85
+
+    # Citation fast path settings
+    CITATION_FAST_PATH_ENABLED: bool = True
+    CITATION_FILL_REMAINING: bool = False
+    CITATION_INDEX_TTL_SECONDS: int = 3600
+
+    # Superseded articles (needs retrieval/indexing/validity.py): "off", "annotate" or "swap" in the current version.
+    # Only replacements and abolitions of fully expired documents count, partial amendments are ignored
+    SUPERSEDED_HANDLING: str = "annotate"
     
     # OpenAI settings
     DEFAULT_MODEL_NAME: str = "gpt-5-mini"
@@ -58,7 +145,24 @@ class Settings(BaseSettings):
     OPENAI_PARSE_MODEL: str = "gpt-5-mini"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"
 
-    # Generation settings
+    # Context format for the LLM prompt: "json" (indented JSON) or "compact" (documents listed once, line records)
+    CONTEXT_FORMAT: str = "json"
+    # Rendered context fragments (documents/neighbors with token counts) kept in memory
+    CONTEXT_FRAGMENT_CACHE_SIZE: int = 5000
+
+    # Extractive compression: articles over COMPRESSION_MIN_TOKENS keep their header and the clauses
+    # most similar to the query within COMPRESSION_ARTICLE_TOKENS
+    COMPRESSION_ENABLED: bool = False
+    COMPRESSION_MIN_TOKENS: int = 800
+    COMPRESSION_ARTICLE_TOKENS: int = 500
+    COMPRESSION_CACHE_SIZE: int = 20000
+
+    # Persistent LLM response cache (SQLite), invalidated when the graph version changes
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_PATH: str = "data/response_cache.sqlite3"
+    RESPONSE_CACHE_TTL_SECONDS: int = 86400
+
+    # Generation settings (MAX_INPUT_TOKENS bounds system prompt + question + packed legal context)
     MAX_INPUT_TOKENS: int = 250000
     GENERATION_TEMPERATURE: float = 0.1
     GENERATION_MAX_TOKENS: int = 50000
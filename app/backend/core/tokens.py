@@ -0,0 +1,53 @@
+"""
+Token counting with the encoding of the configured generation model.
+
+Shared by indexing (per-article counts stored in the payload) and synthesis (context
+budgeting), so both count the same way.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict
+
+import tiktoken
+
+from core.config import settings
+
+# Payload fields written at indexing time
+TOKEN_COUNT_FIELD = "token_count"
+SNIPPET_TOKEN_COUNT_FIELD = "snippet_token_count"
+CONTENT_HASH_FIELD = "content_hash"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Encoding of `model_name`, falling back to o200k_base for models tiktoken does not know."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` for OPENAI_MODEL."""
+    return len(get_encoding(settings.OPENAI_MODEL).encode(text, disallowed_special=()))
+
+
+def content_hash(content: str) -> str:
+    """Short, stable version of an article's content."""
+    return hashlib.sha1((content or "").encode("utf-8")).hexdigest()[:16]
+
+
+def snippet(content: str) -> str:
+    """Neighbor snippet of `content`: NEIGHBOR_SNIPPET_CHARS characters, "..." marking a cut."""
+    limit = settings.NEIGHBOR_SNIPPET_CHARS
+    return content[:limit] + "..." if len(content) > limit else content
+
+
+def content_token_stats(content: str) -> Dict[str, Any]:
+    """Payload fields with the token counts of an article's content and of its neighbor snippet."""
+    content = content or ""
+    return {
+        TOKEN_COUNT_FIELD: count_tokens(content),
+        SNIPPET_TOKEN_COUNT_FIELD: count_tokens(snippet(content)),
+        CONTENT_HASH_FIELD: content_hash(content),
+    }
@@ -19,6 +19,11 @@ class RelatedDocument(BaseModel):
     document_status: str = Field("unknown", description="Status (e.g., Còn hiệu lực)")
     effective_date: str = Field("unknown", description="Effective date")
     expired_date: str = Field("unknown", description="Expiration date")
+    score: Optional[float] = Field(None, description="Relevance of the neighbor to the query")
+    depth: int = Field(1, description="Number of hops from the retrieved article")
+    snippet_token_count: Optional[int] = Field(
+        None, exclude=True, description="Tokens of the content snippet, computed at indexing time"
+    )
 
 
 class Relationships(BaseModel):
@@ -46,6 +51,13 @@ class RetrievedDocument(BaseModel):
     bai_bo: Any = Field("unknown", description="Abolitions")
     dinh_chi: Any = Field("unknown", description="Suspensions")
     huong_dan_quy_dinh: Any = Field("unknown", description="Guidance/Regulations")
+    current_version_id: Optional[str] = Field(None, description="Currently effective version of the article")
+    is_effective: Optional[bool] = Field(None, description="Whether the article is still in effect")
+    adjacency: Optional[Dict[str, List[List[str]]]] = Field(
+        None, exclude=True, description="Incoming/outgoing [relation type, id] pairs stored in the payload"
+    )
+    token_count: Optional[int] = Field(None, exclude=True, description="Tokens of the content, computed at indexing time")
+    content_hash: Optional[str] = Field(None, exclude=True, description="Version of the content, computed at indexing time")
     relationships: Relationships = Field(default_factory=Relationships, description="Incoming/outgoing relationships")
 
 
@@ -89,6 +101,42 @@ class ChatResponse(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
 
 
+class SearchFilters(BaseModel):
+    """Metadata filters for the search endpoint; all given fields must match."""
+
+    document_id: Optional[str] = Field(None, description="Official document identifier (e.g. 37/2024/TT-NHNN)")
+    vbpl_id: Optional[str] = Field(None, description="VBPL ID")
+    document_status: Optional[str] = Field(None, description="Status (e.g., Còn hiệu lực)")
+
+
+class SearchRequest(BaseModel):
+    """Request model for search endpoint."""
+
+    query: str = Field(..., description="Search query", min_length=1, max_length=2000)
+    limit: int = Field(10, description="Number of documents per page", ge=1, le=50)
+    cursor: Optional[str] = Field(None, description="Opaque cursor returned by the previous page")
+    filters: Optional[SearchFilters] = Field(None, description="Metadata filters")
+    expand_relationships: bool = Field(False, description="Load Neo4j relationships for the returned page")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "query": "Điều 2 Thông tư 37/2024/TT-NHNN",
+                "limit": 10,
+                "filters": {"document_status": "Còn hiệu lực"},
+                "expand_relationships": False
+            }
+        }
+
+
+class SearchResponse(BaseModel):
+    """Response model for search endpoint."""
+
+    documents: List[RetrievedDocument] = Field(default_factory=list, description="Ranked documents of this page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; null on the last page")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
+
+
 class HealthResponse(BaseModel):
     """Response model for health check endpoint."""
     
@@ -8,6 +8,9 @@ import time
 
 from core.config import settings
 from api.routes import router
+from services.neo4j_service import neo4j_service
+from services.qdrant_service import qdrant_service
+from retrieval.utils import ensure_payload_indexes
 from core.logging import setup_logging
 
 # Setup colored logging
@@ -25,10 +28,21 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting Vietnam Law Chatbot API")
     logger.info(f"🔧 Debug mode: {settings.DEBUG_MODE}")
     logger.info(f"🌐 Server will run on http://{settings.HOST}:{settings.PORT}")
+    if settings.NEO4J_ENSURE_SCHEMA:
+        logger.info(f"🗂️  Neo4j schema: {neo4j_service.ensure_schema()}")
+    if settings.QDRANT_ENSURE_PAYLOAD_INDEXES:
+        try:
+            logger.info(f"🗂️  Qdrant payload indexes created: {ensure_payload_indexes()}")
+        except Exception as e:
+            logger.error(f"Failed to ensure Qdrant payload indexes: {e}")
+    neo4j_service.start_snapshot_refresh()
+    qdrant_service.start_citation_index_refresh()
     logger.info("✅ Application startup complete")
     yield
     # Shutdown
     logger.info("🛑 Shutting down Vietnam Law Chatbot API")
+    neo4j_service.close()
+    qdrant_service.close()
 
 # Create FastAPI application
 app = FastAPI(
@@ -0,0 +1,123 @@
+"""
+Parsing and resolution of exact legal citations such as "Khoản 1 Điều 2 Thông tư 37/2024/TT-NHNN".
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+# Legal document numbers such as 37/2024/TT-NHNN, 102/2022/NĐ-CP or 32/2024/QH15; the
+# issuer code must contain a letter, so dates such as 01/01/2024 are not numbers
+LEGAL_NUMBER_REGEX = re.compile(
+    r"\b\d+(?:/\d{2,4})?/(?=[a-zđ0-9-]*[a-zđ])[a-zđ0-9]+(?:-[a-zđ0-9]+)*",
+    re.IGNORECASE,
+)
+
+# "Điều 5", "Khoản 2 Điều 5", "Điều 2, 3 và 5"
+ARTICLE_REGEX = re.compile(
+    r"(?:khoản\s+(\d+)\s+)?điều\s+(\d+(?:\s*(?:,|và)\s*\d+)*)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Citation:
+    """A reference to an article (and optionally a clause) of a legal document."""
+
+    article: Optional[int] = None
+    clause: Optional[int] = None
+    document_number: Optional[str] = None
+
+
+def normalize_document_number(number: str) -> str:
+    """
+    Normalizes a document number for lookups, e.g. "37/2024/tt-nhnn" -> "37/2024/TT-NHNN".
+    """
+    return re.sub(r"\s+", "", unicodedata.normalize("NFC", number)).upper()
+
+
+def parse_citations(query: str) -> List[Citation]:
+    """
+    Extracts article/clause/document-number citations from a query.
+
+    Each article mention is attached to the first document number that follows it,
+    falling back to the closest one before it. Document numbers with no article
+    mention are returned as document-only citations.
+    """
+    text = unicodedata.normalize("NFC", query)
+
+    numbers = [(match.start(), normalize_document_number(match.group(0))) for match in LEGAL_NUMBER_REGEX.finditer(text)]
+
+    citations: List[Citation] = []
+    cited_numbers: Set[str] = set()
+    for match in ARTICLE_REGEX.finditer(text):
+        following = [number for position, number in numbers if position >= match.end()]
+        preceding = [number for position, number in numbers if position < match.start()]
+        document_number = following[0] if following else (preceding[-1] if preceding else None)
+        if document_number:
+            cited_numbers.add(document_number)
+
+        clause = int(match.group(1)) if match.group(1) else None
+        for article in re.findall(r"\d+", match.group(2)):
+            citations.append(Citation(article=int(article), clause=clause, document_number=document_number))
+
+    for _, number in numbers:
+        if number not in cited_numbers:
+            cited_numbers.add(number)
+            citations.append(Citation(document_number=number))
+
+    return citations
+
+
+class CitationIndex:
+    """
+    In-memory lookup from document number to vbpl_id to article id.
+
+    Article ids follow the indexing convention "<vbpl_id>_<article number>".
+    """
+
+    def __init__(self):
+        self.vbpl_ids_by_number: Dict[str, Set[str]] = defaultdict(set)
+        self.articles_by_vbpl_id: Dict[str, Dict[int, str]] = defaultdict(dict)
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, str]]) -> "CitationIndex":
+        """
+        Builds the index from article metadata records with `id`, `vbpl_id` and `document_id` keys.
+        """
+        index = cls()
+        for record in records:
+            article_id, vbpl_id, document_number = record.get("id"), record.get("vbpl_id"), record.get("document_id")
+            if not article_id or not vbpl_id:
+                continue
+
+            suffix = str(article_id).rsplit("_", 1)[-1]
+            if suffix.isdigit():
+                index.articles_by_vbpl_id[str(vbpl_id)][int(suffix)] = str(article_id)
+
+            if document_number:
+                number = normalize_document_number(document_number)
+                index.vbpl_ids_by_number[number].add(str(vbpl_id))
+                parts = number.split("/")
+                if len(parts) == 3:
+                    # Queries often omit the type suffix: "Nghị định 102/2022"
+                    index.vbpl_ids_by_number[f"{parts[0]}/{parts[1]}"].add(str(vbpl_id))
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(articles) for articles in self.articles_by_vbpl_id.values())
+
+    def resolve(self, citation: Citation) -> List[str]:
+        """
+        Returns the article ids a citation points to; empty if it is ambiguous or unknown.
+        """
+        if citation.article is None or not citation.document_number:
+            return []
+
+        article_ids = []
+        for vbpl_id in sorted(self.vbpl_ids_by_number.get(citation.document_number, ())):
+            article_id = self.articles_by_vbpl_id.get(vbpl_id, {}).get(citation.article)
+            if article_id:
+                article_ids.append(article_id)
+        return article_ids
@@ -0,0 +1,95 @@
+"""
+Maximal Marginal Relevance (MMR) selection over retrieved documents.
+"""
+from typing import List, Optional
+
+import numpy as np
+from haystack.dataclasses import Document
+
+from retrieval.centrality import centrality_factor
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_select(
+    query_embedding: List[float],
+    embeddings: np.ndarray,
+    top_k: int,
+    lambda_mult: float = 0.7,
+    relevance_weights: Optional[np.ndarray] = None,
+) -> List[int]:
+    """
+    Returns the indices of `top_k` rows of `embeddings` chosen by MMR.
+
+    Each step picks the candidate maximizing
+    `lambda_mult * sim(query, d) - (1 - lambda_mult) * max(sim(d, selected))`.
+    The pairwise cosine similarity matrix is computed once; each step only updates
+    the running max similarity to the selected set. `relevance_weights`, one per row,
+    scale `sim(query, d)`, e.g. to carry a retrieval prior into the relevance term.
+    """
+    n_candidates = embeddings.shape[0]
+    top_k = min(top_k, n_candidates)
+    if top_k <= 0:
+        return []
+
+    candidates = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    relevance = candidates @ query
+    if relevance_weights is not None:
+        relevance = relevance * np.asarray(relevance_weights, dtype=np.float32)
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(n_candidates, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < top_k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+
+    return selected
+
+
+def diversify(
+    query_embedding: List[float],
+    documents: List[Document],
+    top_k: int,
+    lambda_mult: float = 0.7,
+    centrality_weight: float = 0.0,
+) -> List[Document]:
+    """
+    Reorders and trims `documents` with MMR so near-duplicate articles (e.g. an article
+    and the near-identical text that amends it) do not take several top_k slots.
+
+    With `centrality_weight`, the relevance term gets the same centrality boost as the
+    retriever scores (see `boost_by_centrality`), so MMR keeps favouring central articles.
+    Documents without an embedding are appended after the diversified ones.
+    Embeddings are dropped from the returned documents.
+    """
+    with_embedding = [doc for doc in documents if doc.embedding is not None]
+    without_embedding = [doc for doc in documents if doc.embedding is None]
+
+    if with_embedding:
+        embeddings = np.asarray([doc.embedding for doc in with_embedding], dtype=np.float32)
+        weights = None
+        if centrality_weight > 0:
+            weights = np.asarray([centrality_factor(doc, centrality_weight) for doc in with_embedding], dtype=np.float32)
+        order = mmr_select(query_embedding, embeddings, top_k, lambda_mult, relevance_weights=weights)
+        diversified = [with_embedding[i] for i in order]
+    else:
+        diversified = []
+
+    result = (diversified + without_embedding)[:top_k]
+    for doc in result:
+        doc.embedding = None
+    return result
@@ -0,0 +1,620 @@
+import json
+import os
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from haystack import default_from_dict, default_to_dict
+from haystack.dataclasses import Document, SparseEmbedding
+from haystack.document_stores.errors import DuplicateDocumentError
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.utils.filters import document_matches_filter
+
+from core.config import settings
+from retrieval.fusion import MIN_BRANCH_LIMIT, reciprocal_rank_fusion
+
+# Dead (deleted or overwritten) rows tolerated, as a share of all rows, before the files are compacted
+COMPACT_DEAD_RATIO = 0.25
+
+# Sparse entries appended since the inverted index was built that are scored without it
+MIN_UNINDEXED_ENTRIES = 10000
+
+DOCUMENTS_FILE = "documents.jsonl"
+CHANGES_FILE = "changes.jsonl"
+DENSE_FILE = "dense.f32"
+SPARSE_LENGTHS_FILE = "sparse_lengths.i64"
+SPARSE_INDICES_FILE = "sparse_indices.i64"
+SPARSE_VALUES_FILE = "sparse_values.f32"
+
+# Filter operators answered from the columnar meta codes; other filters fall back to haystack
+VECTORIZED_OPERATORS = ("==", "!=", "in", "not in")
+
+
+class EmbeddedDocumentStore:
+    """
+    In-process document store for single-node and offline deployments.
+
+    Dense vectors are kept L2-normalised in a memory-mapped float32 matrix and searched
+    with a vectorized top-k. Sparse vectors are stored as CSR rows and searched through
+    an inverted index. Everything lives in a single directory of append-only files:
+
+    - documents.jsonl: one serialized Document (without embeddings) per row
+    - dense.f32: (n_rows, embedding_dim) raw float32 matrix
+    - sparse_lengths.i64 / sparse_indices.i64 / sparse_values.f32: CSR sparse vectors
+    - changes.jsonl: deletions and meta updates of existing rows
+
+    Writes append rows; deletes and overwrites leave tombstones in changes.jsonl, and the
+    files are compacted once COMPACT_DEAD_RATIO of the rows are dead. Rows appended since
+    the inverted index was built are scored directly from their CSR entries until there
+    are more of them than indexed ones. Equality and membership filters on meta fields
+    are answered from per-field integer codes, built on first use.
+    """
+
+    def __init__(self, path: str, embedding_dim: int = 768, sparse_idf: bool = True):
+        self.path = path
+        self.embedding_dim = embedding_dim
+        self.sparse_idf = sparse_idf
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return default_to_dict(self, path=self.path, embedding_dim=self.embedding_dim, sparse_idf=self.sparse_idf)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmbeddedDocumentStore":
+        return default_from_dict(cls, data)
+
+    def count_documents(self) -> int:
+        return len(self._row_by_id)
+
+    def filter_documents(self, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Returns the stored documents matching the given Haystack filters.
+        """
+        return [self._documents[row] for row in np.flatnonzero(self._filter_mask(filters, alive_only=True))]
+
+    def write_documents(self, documents: List[Document], policy: DuplicatePolicy = DuplicatePolicy.NONE) -> int:
+        """
+        Appends documents to the store files; overwritten documents are tombstoned.
+        """
+        if policy == DuplicatePolicy.NONE:
+            policy = DuplicatePolicy.FAIL
+
+        new_documents: Dict[str, Document] = {}
+        for doc in documents:
+            if not isinstance(doc, Document):
+                raise ValueError(f"write_documents() expects a list of Documents but got an element of {type(doc)}.")
+            if doc.id in self._row_by_id or doc.id in new_documents:
+                if policy == DuplicatePolicy.FAIL:
+                    raise DuplicateDocumentError(f"ID '{doc.id}' already exists in the document store.")
+                if policy == DuplicatePolicy.SKIP:
+                    continue
+            new_documents[doc.id] = doc
+
+        if not new_documents:
+            return 0
+
+        replaced = [self._row_by_id[doc_id] for doc_id in new_documents if doc_id in self._row_by_id]
+        self._tombstone(replaced)
+        self._append(list(new_documents.values()))
+        self._compact_if_needed()
+        return len(new_documents)
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        """
+        Tombstones documents by id; their rows are dropped at the next compaction.
+        """
+        rows = [self._row_by_id[doc_id] for doc_id in dict.fromkeys(document_ids) if doc_id in self._row_by_id]
+        if not rows:
+            return
+        self._tombstone(rows)
+        self._compact_if_needed()
+
+    def compact(self) -> None:
+        """
+        Rewrites the store files without dead rows and with meta updates folded in.
+        """
+        live = np.flatnonzero(self._alive.values)
+        lengths = self._sparse_lengths.values
+        entry_keep = np.repeat(self._alive.values, lengths)
+
+        documents = [self._documents[row] for row in live]
+        dense = np.asarray(self._dense[live], dtype=np.float32) if live.size else np.zeros((0, self.embedding_dim), dtype=np.float32)
+
+        # Release the memory map before the file underneath it is replaced
+        self._dense = None
+
+        def replace_file(name: str, write) -> None:
+            _replace_file(os.path.join(self.path, name), write)
+
+        replace_file(DENSE_FILE, lambda f: f.write(dense.tobytes()))
+        replace_file(SPARSE_LENGTHS_FILE, lambda f: f.write(lengths[live].astype(np.int64).tobytes()))
+        replace_file(SPARSE_INDICES_FILE, lambda f: f.write(self._sparse_indices.values[entry_keep].tobytes()))
+        replace_file(SPARSE_VALUES_FILE, lambda f: f.write(self._sparse_values.values[entry_keep].tobytes()))
+        replace_file(DOCUMENTS_FILE, lambda f: _write_documents(f, documents))
+        # Entries left over from a crash here only apply to rows whose id they name
+        replace_file(CHANGES_FILE, lambda f: None)
+        self._load()
+
+    def query_dense(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns (row, cosine score) pairs of the best dense matches.
+        """
+        return self._query_dense(query_embedding, top_k, self._filter_mask(filters))
+
+    def query_sparse(
+        self,
+        query_sparse_embedding: SparseEmbedding,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns (row, dot-product score) pairs of the best sparse matches.
+        """
+        return self._query_sparse(query_sparse_embedding, top_k, self._filter_mask(filters))
+
+    def query_hybrid(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        return_embedding: bool = False,
+    ) -> List[Document]:
+        """
+        Fuses the dense and sparse result lists with Reciprocal Rank Fusion.
+        """
+        branch_limit = max(top_k, MIN_BRANCH_LIMIT)
+        # Computed once for both branches
+        mask = self._filter_mask(filters)
+        ranked = reciprocal_rank_fusion(
+            (
+                [row for row, _ in self._query_sparse(query_sparse_embedding, branch_limit, mask)],
+                [row for row, _ in self._query_dense(query_embedding, branch_limit, mask)],
+            ),
+            top_k,
+        )
+        return [self._to_document(row, score, return_embedding) for row, score in ranked]
+
+    def query_by_embedding(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        return_embedding: bool = False,
+    ) -> List[Document]:
+        """
+        Dense-only search, used when no sparse query embedding is available.
+        """
+        return [
+            self._to_document(row, score, return_embedding)
+            for row, score in self.query_dense(query_embedding, top_k, filters)
+        ]
+
+    def get_embeddings(self, article_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns the (normalised) dense vectors of the given article ids (meta.id); unknown ids are skipped.
+        """
+        rows = [(article_id, self._row_by_article_id[article_id]) for article_id in article_ids if article_id in self._row_by_article_id]
+        if not rows:
+            return {}
+        matrix = np.asarray(self._dense[[row for _, row in rows]])
+        return {article_id: matrix[i] for i, (article_id, _) in enumerate(rows)}
+
+    def update_meta(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Merges fields into the meta of the given article ids (meta.id) and appends the
+        change to changes.jsonl; vectors are left untouched. Returns the number of updated documents.
+        """
+        rows = [(self._row_by_article_id[article_id], fields) for article_id, fields in updates.items() if article_id in self._row_by_article_id]
+        if not rows:
+            return 0
+
+        _append_file(
+            os.path.join(self.path, CHANGES_FILE),
+            lambda f: _write_changes(f, [{"row": row, "id": self._documents[row].id, "meta": fields} for row, fields in rows]),
+        )
+        for row, fields in rows:
+            self._set_meta(row, fields)
+        self._changes += len(rows)
+        self._compact_if_needed()
+        return len(rows)
+
+    def _to_document(self, row: int, score: float, return_embedding: bool) -> Document:
+        embedding = self._dense[row].tolist() if return_embedding else None
+        return replace(self._documents[row], score=float(score), embedding=embedding)
+
+    def _query_dense(self, query_embedding: List[float], top_k: int, mask: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        if not self._row_by_id:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        scores = self._dense @ (query / norm)
+        return _top_k(scores, top_k, mask)
+
+    def _query_sparse(
+        self,
+        query_sparse_embedding: SparseEmbedding,
+        top_k: int,
+        mask: Optional[np.ndarray],
+    ) -> List[Tuple[int, float]]:
+        if not self._row_by_id or len(self._sparse_indices) == 0:
+            return []
+
+        query_indices, first = np.unique(np.asarray(query_sparse_embedding.indices, dtype=np.int64), return_index=True)
+        query_values = np.asarray(query_sparse_embedding.values, dtype=np.float32)[first]
+        if query_indices.size == 0:
+            return []
+
+        # Entries appended since the inverted index was built, matched against the query terms
+        pending_indices = self._sparse_indices.values[self._indexed_entries:]
+        pending_positions = np.minimum(np.searchsorted(query_indices, pending_indices), query_indices.size - 1)
+        pending_hits = np.flatnonzero(query_indices[pending_positions] == pending_indices)
+        pending_positions = pending_positions[pending_hits]
+
+        positions = np.minimum(np.searchsorted(self._terms, query_indices), max(self._terms.size - 1, 0))
+        found = self._terms[positions] == query_indices if self._terms.size else np.zeros(query_indices.size, dtype=bool)
+
+        weights = query_values
+        if self.sparse_idf:
+            counts = np.bincount(pending_positions, minlength=query_indices.size)
+            counts[found] += self._term_counts[positions[found]]
+            n_rows = len(self._documents)
+            weights = query_values * np.log((n_rows - counts + 0.5) / (counts + 0.5) + 1).astype(np.float32)
+
+        scores = np.zeros(len(self._documents), dtype=np.float32)
+        for query_position in np.flatnonzero(found):
+            start, end = self._term_starts[positions[query_position]], self._term_ends[positions[query_position]]
+            # Each document appears at most once per posting list, so plain fancy indexing is safe
+            scores[self._posting_rows[start:end]] += self._posting_values[start:end] * weights[query_position]
+        if pending_hits.size:
+            entries = self._indexed_entries + pending_hits
+            np.add.at(
+                scores,
+                self._sparse_rows.values[entries],
+                self._sparse_values.values[entries] * weights[pending_positions],
+            )
+
+        positive = scores > 0
+        return _top_k(scores, top_k, positive if mask is None else positive & mask)
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]], alive_only: bool = False) -> Optional[np.ndarray]:
+        """
+        Boolean mask of the live rows matching `filters`; None when every row qualifies.
+        Supported conditions are evaluated on the columnar meta codes, the rest per document.
+        """
+        alive = self._alive.values
+        if not filters:
+            return alive if alive_only or self._dead else None
+
+        mask = self._condition_mask(filters)
+        if mask is None:
+            mask = np.fromiter(
+                (document_matches_filter(filters=filters, document=doc) for doc in self._documents),
+                dtype=bool,
+                count=len(self._documents),
+            )
+        return mask & alive
+
+    def _condition_mask(self, condition: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Vectorized mask of a haystack filter, or None if it uses an unsupported condition.
+        """
+        if "conditions" in condition:
+            masks = [self._condition_mask(sub_condition) for sub_condition in condition["conditions"]]
+            if not masks or any(mask is None for mask in masks):
+                return None
+            operator = condition.get("operator")
+            if operator == "AND":
+                return np.logical_and.reduce(masks)
+            if operator == "OR":
+                return np.logical_or.reduce(masks)
+            if operator == "NOT":
+                return ~np.logical_and.reduce(masks)
+            return None
+
+        field, operator, value = condition.get("field", ""), condition.get("operator"), condition.get("value")
+        name = field[len("meta."):] if field.startswith("meta.") else ""
+        if not name or "." in name or operator not in VECTORIZED_OPERATORS:
+            return None
+        if operator in ("in", "not in") and not isinstance(value, list):
+            return None
+
+        codes, code_by_value = self._column(name)
+        if operator in ("==", "!="):
+            mask = codes == code_by_value.get(_column_key(value), -1)
+        else:
+            mask = np.isin(codes, [code_by_value[key] for key in map(_column_key, value) if key in code_by_value])
+        return ~mask if operator in ("!=", "not in") else mask
+
+    def _column(self, name: str) -> Tuple[np.ndarray, Dict[Any, int]]:
+        """
+        Integer codes of meta field `name` for every row and the code of each distinct value.
+        """
+        if name not in self._columns:
+            code_by_value: Dict[Any, int] = {}
+            codes = _GrowableArray(np.asarray(
+                [code_by_value.setdefault(_column_key(doc.meta.get(name)), len(code_by_value)) for doc in self._documents],
+                dtype=np.int64,
+            ))
+            self._columns[name] = (codes, code_by_value)
+        codes, code_by_value = self._columns[name]
+        return codes.values, code_by_value
+
+    def _set_meta(self, row: int, fields: Dict[str, Any]) -> None:
+        doc = self._documents[row]
+        self._documents[row] = replace(doc, meta={**doc.meta, **fields})
+        for name, value in fields.items():
+            if name in self._columns:
+                codes, code_by_value = self._columns[name]
+                codes.values[row] = code_by_value.setdefault(_column_key(value), len(code_by_value))
+
+    def _append(self, documents: List[Document]) -> None:
+        """
+        Appends documents to the store files and the in-memory arrays.
+        """
+        start = len(self._documents)
+        stored = [replace(doc, embedding=None, sparse_embedding=None, score=None) for doc in documents]
+
+        dense = np.zeros((len(documents), self.embedding_dim), dtype=np.float32)
+        for i, doc in enumerate(documents):
+            if doc.embedding is not None:
+                dense[i] = doc.embedding
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        dense = np.divide(dense, norms, out=np.zeros_like(dense), where=norms > 0)
+
+        lengths = np.asarray([len(doc.sparse_embedding.indices) if doc.sparse_embedding else 0 for doc in documents], dtype=np.int64)
+        indices = np.concatenate(
+            [np.zeros(0, dtype=np.int64)]
+            + [np.asarray(doc.sparse_embedding.indices, dtype=np.int64) for doc in documents if doc.sparse_embedding]
+        )
+        values = np.concatenate(
+            [np.zeros(0, dtype=np.float32)]
+            + [np.asarray(doc.sparse_embedding.values, dtype=np.float32) for doc in documents if doc.sparse_embedding]
+        )
+
+        # The documents file is written last: rows beyond it are cut off on load
+        def append_file(name: str, write) -> None:
+            _append_file(os.path.join(self.path, name), write)
+
+        append_file(DENSE_FILE, lambda f: f.write(dense.tobytes()))
+        append_file(SPARSE_LENGTHS_FILE, lambda f: f.write(lengths.tobytes()))
+        append_file(SPARSE_INDICES_FILE, lambda f: f.write(indices.tobytes()))
+        append_file(SPARSE_VALUES_FILE, lambda f: f.write(values.tobytes()))
+        append_file(DOCUMENTS_FILE, lambda f: _write_documents(f, stored))
+
+        self._documents.extend(stored)
+        self._dense = self._map_dense(len(self._documents))
+        self._alive.extend(np.ones(len(stored), dtype=bool))
+        self._sparse_lengths.extend(lengths)
+        self._sparse_rows.extend(np.repeat(np.arange(start, len(self._documents), dtype=np.int64), lengths))
+        self._sparse_indices.extend(indices)
+        self._sparse_values.extend(values)
+        for row, doc in enumerate(stored, start):
+            self._row_by_id[doc.id] = row
+            self._row_by_article_id[doc.meta.get("id")] = row
+        for name, (codes, code_by_value) in self._columns.items():
+            codes.extend([code_by_value.setdefault(_column_key(doc.meta.get(name)), len(code_by_value)) for doc in stored])
+
+        if len(self._sparse_indices) - self._indexed_entries > max(self._indexed_entries, MIN_UNINDEXED_ENTRIES):
+            self._build_sparse_index()
+
+    def _tombstone(self, rows: List[int]) -> None:
+        """
+        Marks rows dead in memory and in changes.jsonl.
+        """
+        if not rows:
+            return
+        _append_file(
+            os.path.join(self.path, CHANGES_FILE),
+            lambda f: _write_changes(f, [{"row": row, "id": self._documents[row].id, "deleted": True} for row in rows]),
+        )
+        self._changes += len(rows)
+        for row in rows:
+            self._kill(row)
+
+    def _kill(self, row: int) -> None:
+        if not self._alive.values[row]:
+            return
+        self._alive.values[row] = False
+        self._dead += 1
+        doc = self._documents[row]
+        if self._row_by_id.get(doc.id) == row:
+            del self._row_by_id[doc.id]
+        if self._row_by_article_id.get(doc.meta.get("id")) == row:
+            del self._row_by_article_id[doc.meta.get("id")]
+
+    def _compact_if_needed(self) -> None:
+        n_rows = len(self._documents)
+        if self._dead > COMPACT_DEAD_RATIO * n_rows or self._changes > n_rows:
+            self.compact()
+
+    def _map_dense(self, n_rows: int) -> np.ndarray:
+        if n_rows == 0:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return np.memmap(os.path.join(self.path, DENSE_FILE), dtype=np.float32, mode="r", shape=(n_rows, self.embedding_dim))
+
+    def _build_sparse_index(self) -> None:
+        """
+        Builds the inverted index (term -> posting rows and values) over every sparse entry.
+        """
+        indices = self._sparse_indices.values
+        order = np.argsort(indices, kind="stable")
+        self._terms, self._term_starts, self._term_counts = np.unique(indices[order], return_index=True, return_counts=True)
+        self._term_ends = self._term_starts + self._term_counts
+        self._posting_rows = self._sparse_rows.values[order]
+        self._posting_values = self._sparse_values.values[order]
+        self._indexed_entries = indices.size
+
+    def _load(self) -> None:
+        """
+        Loads documents and changes, memory-maps the dense matrix and builds the sparse
+        inverted index. Rows cut off by an interrupted append are truncated from the files.
+        """
+        documents_path = os.path.join(self.path, DOCUMENTS_FILE)
+        self._documents: List[Document] = [
+            Document.from_dict(json.loads(line)) for line in _read_lines(documents_path) if line.strip()
+        ]
+        n_rows = len(self._documents)
+
+        lengths = _read_array(os.path.join(self.path, SPARSE_LENGTHS_FILE), np.int64, n_rows)
+        n_entries = int(lengths.sum())
+        self._sparse_lengths = _GrowableArray(lengths)
+        self._sparse_rows = _GrowableArray(np.repeat(np.arange(n_rows, dtype=np.int64), lengths))
+        self._sparse_indices = _GrowableArray(_read_array(os.path.join(self.path, SPARSE_INDICES_FILE), np.int64, n_entries))
+        self._sparse_values = _GrowableArray(_read_array(os.path.join(self.path, SPARSE_VALUES_FILE), np.float32, n_entries))
+        _truncate(os.path.join(self.path, DENSE_FILE), n_rows * self.embedding_dim * np.dtype(np.float32).itemsize)
+        self._dense = self._map_dense(n_rows)
+
+        self._alive = _GrowableArray(np.ones(n_rows, dtype=bool))
+        self._dead = 0
+        self._columns: Dict[str, Tuple[_GrowableArray, Dict[Any, int]]] = {}
+        self._row_by_id: Dict[str, int] = {}
+        self._row_by_article_id: Dict[Any, int] = {}
+        for row, doc in enumerate(self._documents):
+            # A crash between appending an overwrite and tombstoning the old row leaves both
+            if doc.id in self._row_by_id:
+                self._kill(self._row_by_id[doc.id])
+            self._row_by_id[doc.id] = row
+            self._row_by_article_id[doc.meta.get("id")] = row
+
+        changes = [json.loads(line) for line in _read_lines(os.path.join(self.path, CHANGES_FILE)) if line.strip()]
+        self._changes = len(changes)
+        for change in changes:
+            row = change["row"]
+            if row >= n_rows or self._documents[row].id != change["id"]:
+                continue
+            if change.get("deleted"):
+                self._kill(row)
+            else:
+                self._set_meta(row, change["meta"])
+
+        self._build_sparse_index()
+
+
+class _GrowableArray:
+    """
+    Append-only numpy array with amortized O(1) appends; `values` is a view of the filled part.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self._data = np.array(values)
+        self._size = self._data.size
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + values.size
+        if end > self._data.size:
+            grown = np.empty(max(end, 2 * self._data.size, 16), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+
+def _column_key(value: Any) -> Any:
+    """Hashable key of a meta value; unhashable values (lists, dicts) are keyed by their JSON."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("json", json.dumps(value, ensure_ascii=False, sort_keys=True, default=str))
+
+
+def _replace_file(target: str, write) -> None:
+    """
+    Writes a file through a temporary sibling, so readers never see it half-written.
+    """
+    tmp = f"{target}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, target)
+
+
+def _append_file(target: str, write) -> None:
+    with open(target, "ab") as f:
+        write(f)
+
+
+def _truncate(path: str, size: int) -> None:
+    """Cuts a file down to `size` bytes, dropping a partially written tail."""
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+
+def _read_lines(path: str) -> List[str]:
+    """
+    Complete lines of a JSONL file; a partially written last line is truncated from the file.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    if len(complete) < len(data):
+        _truncate(path, len(complete))
+    return complete.decode("utf-8").splitlines()
+
+
+def _read_array(path: str, dtype, count: int) -> np.ndarray:
+    """
+    The first `count` items of a raw array file, truncating whatever follows them.
+    """
+    if count == 0 or not os.path.exists(path):
+        _truncate(path, 0)
+        return np.zeros(0, dtype=dtype)
+    _truncate(path, count * np.dtype(dtype).itemsize)
+    return np.fromfile(path, dtype=dtype, count=count)
+
+
+def _write_documents(f, documents: List[Document]) -> None:
+    f.writelines((json.dumps(doc.to_dict(flatten=False), ensure_ascii=False) + "\n").encode("utf-8") for doc in documents)
+
+
+def _write_changes(f, changes: List[Dict[str, Any]]) -> None:
+    f.writelines((json.dumps(change, ensure_ascii=False) + "\n").encode("utf-8") for change in changes)
+
+
+def _top_k(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+    """
+    Returns the k best (row, score) pairs, optionally restricted to rows where `mask` is set.
+    """
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(scores.shape[0])
+    if candidates.size == 0 or k <= 0:
+        return []
+
+    candidate_scores = scores[candidates]
+    if candidates.size > k:
+        best = np.argpartition(-candidate_scores, k - 1)[:k]
+    else:
+        best = np.arange(candidates.size)
+    best = best[np.argsort(-candidate_scores[best], kind="stable")]
+    return [(int(candidates[i]), float(candidate_scores[i])) for i in best]
+
+
+def get_embedded_document_store() -> EmbeddedDocumentStore:
+    """
+    Returns an embedded in-process document store instance.
+    """
+    return EmbeddedDocumentStore(
+        path=settings.EMBEDDED_STORE_PATH,
+        embedding_dim=settings.EMBEDDING_DIMENSIONS,
+        sparse_idf=settings.SPARSE_IDF,
+    )
@@ -4,6 +4,11 @@ from retrieval.document_stores.qdrant import get_qdrant_document_store
 from retrieval.document_stores.qdrant_hybrid import (
     get_qdrant_hybrid_document_store,
 )
+from retrieval.document_stores.qdrant_matryoshka import (
+    get_qdrant_matryoshka_document_store,
+)
+from retrieval.document_stores.embedded import get_embedded_document_store
+from retrieval.document_stores.sharded import get_sharded_document_store
 
 
 class DocumentStoreFactory:
@@ -18,10 +23,17 @@ class DocumentStoreFactory:
         """
         document_store_type = settings.DOCUMENT_STORE_TYPE
 
+        if settings.SHARD_BY_CATEGORY:
+            return get_sharded_document_store()
+
         if document_store_type == "qdrant":
             return get_qdrant_document_store()
         elif document_store_type == "qdrant_hybrid":
+            if settings.MATRYOSHKA_DIMENSIONS:
+                return get_qdrant_matryoshka_document_store()
             return get_qdrant_hybrid_document_store()
+        elif document_store_type == "embedded":
+            return get_embedded_document_store()
         else:
             raise ValueError(f"unknown document store type: {document_store_type}")
 
@@ -1,17 +1,29 @@
+from typing import Optional
+
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
 
 from core.config import settings
 
+# Payload indexes for direct lookups and search filters
+PAYLOAD_FIELDS_TO_INDEX = [
+    {"field_name": "meta.id", "field_schema": "keyword"},
+    {"field_name": "meta.vbpl_id", "field_schema": "keyword"},
+    {"field_name": "meta.document_id", "field_schema": "keyword"},
+    {"field_name": "meta.document_status", "field_schema": "keyword"},
+]
+
 
-def get_qdrant_document_store() -> QdrantDocumentStore:
+def get_qdrant_document_store(index: Optional[str] = None) -> QdrantDocumentStore:
     """
     Returns a Qdrant document store instance.
+    `index` overrides the collection name (QDRANT_INDEX), e.g. for category shards.
     """
     return QdrantDocumentStore(
         url=settings.QDRANT_URL,
-        index=settings.QDRANT_INDEX,
+        index=index or settings.QDRANT_INDEX,
         embedding_dim=settings.EMBEDDING_DIMENSIONS,
         recreate_index=False,
         hnsw_config={"m": 16, "ef_construct": 64},
         use_sparse_embeddings=False,
+        payload_fields_to_index=PAYLOAD_FIELDS_TO_INDEX,
     )
\ No newline at end of file
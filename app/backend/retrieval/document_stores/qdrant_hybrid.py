@@ -1,17 +1,190 @@
+import inspect
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from haystack.dataclasses import Document, SparseEmbedding
 from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
+from haystack_integrations.document_stores.qdrant.converters import DENSE_VECTORS_NAME, SPARSE_VECTORS_NAME
+from haystack_integrations.document_stores.qdrant.document_store import QdrantStoreError
+from haystack_integrations.document_stores.qdrant.filters import convert_filters_to_qdrant
+from qdrant_client.http import models as rest
 
 from core.config import settings
+from retrieval.document_stores.qdrant import PAYLOAD_FIELDS_TO_INDEX
+from retrieval.fusion import MIN_BRANCH_LIMIT
+
+# Private QdrantDocumentStore methods overridden or called below, with the parameters of
+# qdrant-haystack 9.2.0 (pinned in requirements.txt)
+BASE_SIGNATURES = {
+    "_query_hybrid": [
+        "self", "query_embedding", "query_sparse_embedding", "filters", "top_k",
+        "return_embedding", "score_threshold", "group_by", "group_size",
+    ],
+    "_process_query_point_results": ["self", "results", "scale_score"],
+    "_initialize_client": ["self"],
+}
+
+
+def _check_base_signatures() -> None:
+    """
+    Fails at import when an upgrade of qdrant-haystack changed the private methods this
+    module relies on, instead of silently bypassing or breaking the override.
+    """
+    for name, expected in BASE_SIGNATURES.items():
+        method = getattr(QdrantDocumentStore, name, None)
+        actual = list(inspect.signature(method).parameters) if method is not None else None
+        if actual != expected:
+            raise RuntimeError(
+                f"QdrantDocumentStore.{name} has parameters {actual}, expected {expected}; "
+                f"check QdrantHybridDocumentStore against the installed qdrant-haystack version"
+            )
+
+
+_check_base_signatures()
+
+
+class QdrantHybridDocumentStore(QdrantDocumentStore):
+    """
+    Hybrid Qdrant document store whose prefetch branches fetch at least `top_k` candidates.
+
+    haystack's `_query_hybrid` sends the dense and sparse prefetches without a limit, so
+    Qdrant keeps its default of 10 per branch and a fused result never exceeds ~20 hits,
+    whatever `top_k` is; deep retrievals such as the RERANKER_FETCH_K candidates of the
+    reranker came back truncated. The override relies on private haystack methods, whose
+    signatures are checked at import (BASE_SIGNATURES).
+    """
+
+    def _query_hybrid(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Union[Dict[str, Any], rest.Filter]] = None,
+        top_k: int = 10,
+        return_embedding: bool = False,
+        score_threshold: Optional[float] = None,
+        group_by: Optional[str] = None,
+        group_size: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Fuses the dense and sparse branches with RRF, each branch limited to max(top_k, MIN_BRANCH_LIMIT).
+        """
+        if group_by:
+            return super()._query_hybrid(
+                query_embedding, query_sparse_embedding, filters, top_k,
+                return_embedding, score_threshold, group_by, group_size,
+            )
+
+        self._initialize_client()
+        assert self._client is not None
+
+        qdrant_filters = convert_filters_to_qdrant(filters)
+        branch_limit = max(top_k, MIN_BRANCH_LIMIT)
+
+        try:
+            points = self._client.query_points(
+                collection_name=self.index,
+                prefetch=[
+                    rest.Prefetch(
+                        query=rest.SparseVector(
+                            indices=query_sparse_embedding.indices,
+                            values=query_sparse_embedding.values,
+                        ),
+                        using=SPARSE_VECTORS_NAME,
+                        filter=qdrant_filters,
+                        limit=branch_limit,
+                    ),
+                    rest.Prefetch(
+                        query=query_embedding,
+                        using=DENSE_VECTORS_NAME,
+                        filter=qdrant_filters,
+                        limit=branch_limit,
+                    ),
+                ],
+                query=rest.FusionQuery(fusion=rest.Fusion.RRF),
+                limit=top_k,
+                score_threshold=score_threshold,
+                with_payload=True,
+                with_vectors=return_embedding,
+            ).points
+        except Exception as e:
+            raise QdrantStoreError("Error during hybrid search") from e
+
+        return self._process_query_point_results(points)
+
+    def _dense_branch_request(
+        self,
+        query_embedding: List[float],
+        qdrant_filters: Optional[rest.Filter],
+        limit: int,
+        return_embedding: bool,
+        prefetch_limit: Optional[int] = None,
+    ) -> rest.QueryRequest:
+        """
+        The dense branch of a hybrid search as a standalone query. `prefetch_limit` is only
+        used by stores with a two-stage dense search.
+        """
+        return rest.QueryRequest(
+            query=query_embedding,
+            using=DENSE_VECTORS_NAME,
+            filter=qdrant_filters,
+            limit=limit,
+            with_payload=True,
+            with_vector=[DENSE_VECTORS_NAME] if return_embedding else False,
+        )
+
+    def _query_branches(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Union[Dict[str, Any], rest.Filter]] = None,
+        top_k: int = 10,
+        return_embedding: bool = False,
+        prefetch_limit: Optional[int] = None,
+    ) -> Tuple[List[Document], List[Document]]:
+        """
+        Runs the dense and sparse branches of a hybrid search without fusing them, in one
+        batch request, and returns (dense, sparse) documents with their raw scores. Used to
+        fuse the results of several collections at once.
+        """
+        self._initialize_client()
+        assert self._client is not None
+
+        qdrant_filters = convert_filters_to_qdrant(filters)
+        try:
+            dense, sparse = self._client.query_batch_points(
+                collection_name=self.index,
+                requests=[
+                    self._dense_branch_request(query_embedding, qdrant_filters, top_k, return_embedding, prefetch_limit),
+                    rest.QueryRequest(
+                        query=rest.SparseVector(
+                            indices=query_sparse_embedding.indices,
+                            values=query_sparse_embedding.values,
+                        ),
+                        using=SPARSE_VECTORS_NAME,
+                        filter=qdrant_filters,
+                        limit=top_k,
+                        with_payload=True,
+                        with_vector=[DENSE_VECTORS_NAME] if return_embedding else False,
+                    ),
+                ],
+            )
+        except Exception as e:
+            raise QdrantStoreError("Error during hybrid branch search") from e
+
+        return self._process_query_point_results(dense.points), self._process_query_point_results(sparse.points)
 
 
-def get_qdrant_hybrid_document_store() -> QdrantDocumentStore:
+def get_qdrant_hybrid_document_store(index: Optional[str] = None) -> QdrantHybridDocumentStore:
     """
     Returns a Qdrant document store instance for hybrid search.
+    `index` overrides the collection name (QDRANT_INDEX), e.g. for category shards.
     """
-    return QdrantDocumentStore(
+    return QdrantHybridDocumentStore(
         url=settings.QDRANT_URL,
-        index=settings.QDRANT_INDEX,
+        index=index or settings.QDRANT_INDEX,
         embedding_dim=settings.EMBEDDING_DIMENSIONS,
         recreate_index=False,
         hnsw_config={"m": 16, "ef_construct": 64},
         use_sparse_embeddings=True,
-    )
\ No newline at end of file
+        sparse_idf=settings.SPARSE_IDF,
+        payload_fields_to_index=PAYLOAD_FIELDS_TO_INDEX,
+    )
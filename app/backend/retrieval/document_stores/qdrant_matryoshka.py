@@ -0,0 +1,228 @@
+from typing import Any, Dict, List, Optional, Union
+
+from haystack.dataclasses import Document, SparseEmbedding
+from haystack.document_stores.types import DuplicatePolicy
+from haystack_integrations.document_stores.qdrant.converters import (
+    DENSE_VECTORS_NAME,
+    SPARSE_VECTORS_NAME,
+    convert_haystack_documents_to_qdrant_points,
+)
+from haystack_integrations.document_stores.qdrant.document_store import QdrantStoreError
+from haystack_integrations.document_stores.qdrant.filters import convert_filters_to_qdrant
+from qdrant_client.http import models as rest
+
+from core.config import settings
+from retrieval.document_stores.qdrant import PAYLOAD_FIELDS_TO_INDEX
+from retrieval.document_stores.qdrant_hybrid import QdrantHybridDocumentStore
+from retrieval.fusion import MIN_BRANCH_LIMIT
+
+MATRYOSHKA_VECTORS_NAME = "text-dense-small"
+
+
+class QdrantMatryoshkaDocumentStore(QdrantHybridDocumentStore):
+    """
+    Hybrid Qdrant document store that also keeps the low-dimension Matryoshka prefix
+    of every dense embedding in its own named vector.
+
+    Only the small vector gets an HNSW graph. The full vector is stored on disk
+    without a graph and is only used to rescore the prefetched candidates.
+    """
+
+    def __init__(self, *args, matryoshka_dim: int = 256, **kwargs):
+        self.matryoshka_dim = matryoshka_dim
+        super().__init__(*args, **kwargs)
+        if not self.use_sparse_embeddings:
+            raise ValueError("QdrantMatryoshkaDocumentStore requires use_sparse_embeddings=True")
+
+    def _prepare_collection_config(
+        self,
+        embedding_dim: int,
+        distance: rest.Distance,
+        on_disk: Optional[bool] = None,
+        use_sparse_embeddings: Optional[bool] = None,
+        sparse_idf: bool = False,
+    ):
+        """
+        Adds the small named vector and drops the HNSW graph of the full one.
+        """
+        vectors_config, sparse_vectors_config = super()._prepare_collection_config(
+            embedding_dim, distance, on_disk, use_sparse_embeddings, sparse_idf
+        )
+        full_vector_config = vectors_config[DENSE_VECTORS_NAME]
+        vectors_config = {
+            DENSE_VECTORS_NAME: rest.VectorParams(
+                size=full_vector_config.size,
+                distance=full_vector_config.distance,
+                on_disk=True,
+                hnsw_config=rest.HnswConfigDiff(m=0),
+            ),
+            MATRYOSHKA_VECTORS_NAME: rest.VectorParams(
+                size=self.matryoshka_dim,
+                distance=full_vector_config.distance,
+                on_disk=full_vector_config.on_disk,
+            ),
+        }
+        return vectors_config, sparse_vectors_config
+
+    def _validate_collection_compatibility(
+        self,
+        collection_name: str,
+        collection_info: rest.CollectionInfo,
+        distance: rest.Distance,
+        embedding_dim: int,
+    ) -> None:
+        """
+        Rejects existing collections that were created without the small vector.
+        """
+        super()._validate_collection_compatibility(collection_name, collection_info, distance, embedding_dim)
+
+        small_vector_config = collection_info.config.params.vectors.get(MATRYOSHKA_VECTORS_NAME)
+        if small_vector_config is None or small_vector_config.size != self.matryoshka_dim:
+            raise QdrantStoreError(
+                f"Collection '{collection_name}' has no '{MATRYOSHKA_VECTORS_NAME}' vector of size "
+                f"{self.matryoshka_dim}. Recreate the collection to enable Matryoshka retrieval."
+            )
+
+    def write_documents(
+        self,
+        documents: List[Document],
+        policy: DuplicatePolicy = DuplicatePolicy.FAIL,
+    ) -> int:
+        """
+        Writes documents with the truncated prefix of their dense embedding in the same upsert.
+        """
+        self._initialize_client()
+        assert self._client is not None
+
+        for doc in documents:
+            if not isinstance(doc, Document):
+                raise ValueError(f"write_documents() expects a list of Documents but got an element of {type(doc)}.")
+
+        if not documents:
+            return 0
+
+        document_objects = self._handle_duplicate_documents(documents=documents, policy=policy)
+
+        for start in range(0, len(document_objects), self.write_batch_size):
+            document_batch = document_objects[start:start + self.write_batch_size]
+            points = convert_haystack_documents_to_qdrant_points(document_batch, use_sparse_embeddings=True)
+            for doc, point in zip(document_batch, points):
+                if doc.embedding is not None:
+                    point.vector[MATRYOSHKA_VECTORS_NAME] = doc.embedding[: self.matryoshka_dim]
+
+            self._client.upsert(
+                collection_name=self.index,
+                points=points,
+                wait=self.wait_result_from_api,
+            )
+        return len(document_objects)
+
+    def _query_hybrid_matryoshka(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Union[Dict[str, Any], rest.Filter]] = None,
+        top_k: int = 10,
+        prefetch_limit: int = 100,
+        return_embedding: bool = False,
+        score_threshold: Optional[float] = None,
+    ) -> List[Document]:
+        """
+        Runs the two-stage dense search and the sparse search in one Qdrant query.
+
+        The dense branch prefetches `prefetch_limit` candidates (at least as many as it keeps)
+        on the small vector and rescores them with the full vector; both branches are then
+        fused with RRF.
+        """
+        self._initialize_client()
+        assert self._client is not None
+
+        qdrant_filters = convert_filters_to_qdrant(filters)
+        branch_limit = max(top_k, MIN_BRANCH_LIMIT)
+
+        try:
+            points = self._client.query_points(
+                collection_name=self.index,
+                prefetch=[
+                    rest.Prefetch(
+                        query=rest.SparseVector(
+                            indices=query_sparse_embedding.indices,
+                            values=query_sparse_embedding.values,
+                        ),
+                        using=SPARSE_VECTORS_NAME,
+                        filter=qdrant_filters,
+                        limit=branch_limit,
+                    ),
+                    rest.Prefetch(
+                        prefetch=rest.Prefetch(
+                            query=query_embedding[: self.matryoshka_dim],
+                            using=MATRYOSHKA_VECTORS_NAME,
+                            filter=qdrant_filters,
+                            limit=max(prefetch_limit, branch_limit),
+                        ),
+                        query=query_embedding,
+                        using=DENSE_VECTORS_NAME,
+                        limit=branch_limit,
+                    ),
+                ],
+                query=rest.FusionQuery(fusion=rest.Fusion.RRF),
+                limit=top_k,
+                score_threshold=score_threshold,
+                with_payload=True,
+                # Only the full dense vector is needed by callers (e.g. MMR)
+                with_vectors=[DENSE_VECTORS_NAME] if return_embedding else False,
+            ).points
+        except Exception as e:
+            raise QdrantStoreError("Error during Matryoshka hybrid search") from e
+
+        return self._process_query_point_results(points)
+
+    def _dense_branch_request(
+        self,
+        query_embedding: List[float],
+        qdrant_filters: Optional[rest.Filter],
+        limit: int,
+        return_embedding: bool,
+        prefetch_limit: Optional[int] = None,
+    ) -> rest.QueryRequest:
+        """
+        The two-stage dense branch: `prefetch_limit` candidates from the small vector (at
+        least `limit`), rescored with the full one.
+        """
+        return rest.QueryRequest(
+            prefetch=rest.Prefetch(
+                query=query_embedding[: self.matryoshka_dim],
+                using=MATRYOSHKA_VECTORS_NAME,
+                filter=qdrant_filters,
+                limit=max(prefetch_limit or 0, limit),
+            ),
+            query=query_embedding,
+            using=DENSE_VECTORS_NAME,
+            limit=limit,
+            with_payload=True,
+            with_vector=[DENSE_VECTORS_NAME] if return_embedding else False,
+        )
+
+
+def get_qdrant_matryoshka_document_store(index: Optional[str] = None) -> QdrantMatryoshkaDocumentStore:
+    """
+    Returns a Qdrant document store instance for two-stage Matryoshka hybrid search.
+    `index` overrides the collection name (QDRANT_INDEX), e.g. for category shards.
+    """
+    if not 0 < settings.MATRYOSHKA_DIMENSIONS < settings.EMBEDDING_DIMENSIONS:
+        raise ValueError(
+            f"MATRYOSHKA_DIMENSIONS must be between 1 and EMBEDDING_DIMENSIONS - 1, "
+            f"got {settings.MATRYOSHKA_DIMENSIONS}"
+        )
+
+    return QdrantMatryoshkaDocumentStore(
+        url=settings.QDRANT_URL,
+        index=index or settings.QDRANT_INDEX,
+        embedding_dim=settings.EMBEDDING_DIMENSIONS,
+        matryoshka_dim=settings.MATRYOSHKA_DIMENSIONS,
+        recreate_index=False,
+        hnsw_config={"m": 16, "ef_construct": 64},
+        use_sparse_embeddings=True,
+        sparse_idf=settings.SPARSE_IDF,
+        payload_fields_to_index=PAYLOAD_FIELDS_TO_INDEX,
+    )
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from haystack import default_from_dict, default_to_dict
+from haystack.dataclasses import Document
+from haystack.document_stores.types import DocumentStore, DuplicatePolicy
+from haystack.utils import deserialize_type
+
+from core.config import settings
+from retrieval.document_stores.qdrant import get_qdrant_document_store
+from retrieval.document_stores.qdrant_hybrid import get_qdrant_hybrid_document_store
+from retrieval.document_stores.qdrant_matryoshka import get_qdrant_matryoshka_document_store
+from retrieval.sharding import SHARD_CATEGORIES, category_of, shard_index
+
+
+class ShardedDocumentStore:
+    """
+    Document store that keeps each document category in its own Qdrant collection.
+
+    Writes are routed by the category of `meta.document_id`; reads and deletes are
+    broadcast to every shard. Each shard is a regular Qdrant document store, so the
+    shard retrievers are the usual Qdrant retrievers.
+    """
+
+    def __init__(self, shards: Dict[str, DocumentStore]):
+        self.shards = shards
+
+    def to_dict(self) -> Dict[str, Any]:
+        return default_to_dict(self, shards={category: store.to_dict() for category, store in self.shards.items()})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardedDocumentStore":
+        shards = {
+            category: deserialize_type(store_data["type"]).from_dict(store_data)
+            for category, store_data in data["init_parameters"]["shards"].items()
+        }
+        data["init_parameters"]["shards"] = shards
+        return default_from_dict(cls, data)
+
+    def count_documents(self) -> int:
+        return sum(store.count_documents() for store in self.shards.values())
+
+    def filter_documents(self, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        documents = []
+        for store in self.shards.values():
+            documents.extend(store.filter_documents(filters=filters))
+        return documents
+
+    def write_documents(self, documents: List[Document], policy: DuplicatePolicy = DuplicatePolicy.NONE) -> int:
+        """
+        Groups documents by category and writes each group to its shard.
+        """
+        groups: Dict[str, List[Document]] = defaultdict(list)
+        for doc in documents:
+            groups[self.category_of(doc)].append(doc)
+
+        return sum(self.shards[category].write_documents(group, policy=policy) for category, group in groups.items())
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        for store in self.shards.values():
+            store.delete_documents(document_ids)
+
+    def category_of(self, doc: Document) -> str:
+        """
+        Returns the shard a document belongs to.
+        """
+        return category_of(doc.meta.get("document_id"))
+
+    def collection_names(self) -> List[str]:
+        """
+        Returns the Qdrant collection name of every shard.
+        """
+        return [store.index for store in self.shards.values()]
+
+
+def get_sharded_document_store() -> ShardedDocumentStore:
+    """
+    Returns a document store with one Qdrant collection per document category.
+    Each shard uses the store type selected by DOCUMENT_STORE_TYPE.
+    """
+    document_store_type = settings.DOCUMENT_STORE_TYPE
+
+    get_shard: Callable[[str], DocumentStore]
+    if document_store_type == "qdrant":
+        get_shard = get_qdrant_document_store
+    elif document_store_type == "qdrant_hybrid":
+        if settings.MATRYOSHKA_DIMENSIONS:
+            get_shard = get_qdrant_matryoshka_document_store
+        else:
+            get_shard = get_qdrant_hybrid_document_store
+    else:
+        raise ValueError(f"sharding is not supported for document store type: {document_store_type}")
+
+    return ShardedDocumentStore(
+        shards={category: get_shard(shard_index(settings.QDRANT_INDEX, category)) for category in SHARD_CATEGORIES}
+    )
@@ -1,25 +1,50 @@
+from functools import lru_cache
+from typing import Union
+
 from haystack_integrations.components.embedders.fastembed import (
     FastembedSparseDocumentEmbedder,
     FastembedSparseTextEmbedder,
 )
 from core.config import settings
+from retrieval.embedders.vietnamese_sparse import (
+    VietnameseSparseDocumentEmbedder,
+    VietnameseSparseTextEmbedder,
+    get_vietnamese_sparse_document_embedder,
+    get_vietnamese_sparse_text_embedder,
+)
 
 
-def get_fastembed_sparse_document_embedder() -> FastembedSparseDocumentEmbedder:
+@lru_cache(maxsize=1)
+def get_fastembed_sparse_document_embedder() -> Union[FastembedSparseDocumentEmbedder, VietnameseSparseDocumentEmbedder]:
     """
-    Returns a FastembedSparseDocumentEmbedder instance.
+    Returns the sparse document embedder selected by SPARSE_ENCODER_TYPE.
+    The instance is created and warmed up once per process.
     """
-    model = settings.SPARSE_EMBEDDING_MODEL
-    sparse_doc_embedder = FastembedSparseDocumentEmbedder(model=model)
-    sparse_doc_embedder.warm_up()
-    return sparse_doc_embedder
+    encoder_type = settings.SPARSE_ENCODER_TYPE
 
+    if encoder_type == "vietnamese":
+        return get_vietnamese_sparse_document_embedder()
+    elif encoder_type == "fastembed":
+        sparse_doc_embedder = FastembedSparseDocumentEmbedder(model=settings.SPARSE_EMBEDDING_MODEL)
+        sparse_doc_embedder.warm_up()
+        return sparse_doc_embedder
+    else:
+        raise ValueError(f"unknown sparse encoder type for documents: {encoder_type}")
 
-def get_fastembed_sparse_text_embedder() -> FastembedSparseTextEmbedder:
+
+@lru_cache(maxsize=1)
+def get_fastembed_sparse_text_embedder() -> Union[FastembedSparseTextEmbedder, VietnameseSparseTextEmbedder]:
     """
-    Returns a FastembedSparseTextEmbedder instance.
+    Returns the sparse text embedder selected by SPARSE_ENCODER_TYPE.
+    The instance is created and warmed up once per process.
     """
-    model = settings.SPARSE_EMBEDDING_MODEL
-    sparse_text_embedder = FastembedSparseTextEmbedder(model=model)
-    sparse_text_embedder.warm_up()
-    return sparse_text_embedder
\ No newline at end of file
+    encoder_type = settings.SPARSE_ENCODER_TYPE
+
+    if encoder_type == "vietnamese":
+        return get_vietnamese_sparse_text_embedder()
+    elif encoder_type == "fastembed":
+        sparse_text_embedder = FastembedSparseTextEmbedder(model=settings.SPARSE_EMBEDDING_MODEL)
+        sparse_text_embedder.warm_up()
+        return sparse_text_embedder
+    else:
+        raise ValueError(f"unknown sparse encoder type for text: {encoder_type}")
@@ -0,0 +1,149 @@
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+from haystack import component
+from haystack.dataclasses import Document, SparseEmbedding
+
+from core.config import settings
+from retrieval.citation import LEGAL_NUMBER_REGEX
+
+# Bigrams never span punctuation
+SEGMENT_SPLIT_REGEX = re.compile(r"[.,;:!?()\[\]\"“”‘’\n]+")
+SYLLABLE_REGEX = re.compile(r"\w+")
+
+FNV_OFFSET_BASIS = np.uint32(2166136261)
+FNV_PRIME = np.uint32(16777619)
+
+
+def fold_diacritics(text: str) -> str:
+    """
+    Strips Vietnamese diacritics, e.g. "điều khoản" -> "dieu khoan".
+    """
+    decomposed = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    return "".join(char for char in decomposed if unicodedata.category(char) != "Mn")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits Vietnamese legal text into sparse tokens.
+
+    Emits legal document numbers (full form and number/year prefix), syllable unigrams,
+    adjacent syllable bigrams within a segment, and a diacritic-folded unigram ("~" prefix)
+    for every syllable, so queries typed without accents still match: "dieu" and "điều"
+    both emit "~dieu".
+    """
+    text = unicodedata.normalize("NFC", text).lower()
+
+    tokens = []
+    for number in LEGAL_NUMBER_REGEX.findall(text):
+        tokens.append(number)
+        parts = number.split("/")
+        if len(parts) == 3:
+            tokens.append(f"{parts[0]}/{parts[1]}")
+    text = LEGAL_NUMBER_REGEX.sub(" ", text)
+
+    for segment in SEGMENT_SPLIT_REGEX.split(text):
+        syllables = SYLLABLE_REGEX.findall(segment)
+        tokens.extend(syllables)
+        tokens.extend(f"{first} {second}" for first, second in zip(syllables, syllables[1:]))
+        tokens.extend(f"~{fold_diacritics(syllable)}" for syllable in syllables)
+    return tokens
+
+
+def hash_tokens(tokens: List[str]) -> np.ndarray:
+    """
+    Hashes tokens to uint32 sparse indices with a vectorized 32-bit FNV-1a.
+
+    Tokens are packed into a zero-padded byte matrix so every FNV round runs over
+    all tokens at once.
+    """
+    if not tokens:
+        return np.zeros(0, dtype=np.uint32)
+
+    encoded = [token.encode("utf-8") for token in tokens]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    flat = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(encoded)), lengths)
+    cols = np.arange(flat.size) - np.repeat(offsets, lengths)
+    byte_matrix = np.zeros((len(encoded), int(lengths.max())), dtype=np.uint8)
+    byte_matrix[rows, cols] = flat
+
+    hashes = np.full(len(encoded), FNV_OFFSET_BASIS, dtype=np.uint32)
+    for col in range(byte_matrix.shape[1]):
+        updated = (hashes ^ byte_matrix[:, col]) * FNV_PRIME
+        hashes = np.where(col < lengths, updated, hashes)
+    return hashes
+
+
+@component
+class VietnameseSparseDocumentEmbedder:
+    """
+    Sparse document embedder for Vietnamese legal text.
+
+    Values are the BM25 term-frequency part with a fixed average document length; the
+    IDF part is applied by Qdrant's IDF modifier, so stored vectors never need to be
+    recomputed as the corpus grows.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 256.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def warm_up(self):
+        """Nothing to load; kept for parity with the fastembed embedders."""
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]) -> Dict[str, List[Document]]:
+        """
+        Sets `sparse_embedding` on every document.
+        """
+        token_lists = [tokenize(doc.content or "") for doc in documents]
+        all_hashes = hash_tokens([token for tokens in token_lists for token in tokens])
+
+        start = 0
+        for doc, tokens in zip(documents, token_lists):
+            hashes = all_hashes[start:start + len(tokens)]
+            start += len(tokens)
+
+            indices, tf = np.unique(hashes, return_counts=True)
+            length_norm = 1 - self.b + self.b * len(tokens) / self.avg_doc_length
+            values = tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+            doc.sparse_embedding = SparseEmbedding(indices=indices.tolist(), values=values.tolist())
+        return {"documents": documents}
+
+
+@component
+class VietnameseSparseTextEmbedder:
+    """
+    Sparse query embedder matching VietnameseSparseDocumentEmbedder; each distinct token weighs 1.
+    """
+
+    def warm_up(self):
+        """Nothing to load; kept for parity with the fastembed embedders."""
+
+    @component.output_types(sparse_embedding=SparseEmbedding)
+    def run(self, text: str) -> Dict[str, SparseEmbedding]:
+        """
+        Embeds a query string.
+        """
+        indices = np.unique(hash_tokens(tokenize(text)))
+        return {"sparse_embedding": SparseEmbedding(indices=indices.tolist(), values=[1.0] * len(indices))}
+
+
+def get_vietnamese_sparse_document_embedder() -> VietnameseSparseDocumentEmbedder:
+    """
+    Returns a VietnameseSparseDocumentEmbedder instance.
+    """
+    return VietnameseSparseDocumentEmbedder(avg_doc_length=settings.SPARSE_AVG_DOC_LENGTH)
+
+
+def get_vietnamese_sparse_text_embedder() -> VietnameseSparseTextEmbedder:
+    """
+    Returns a VietnameseSparseTextEmbedder instance.
+    """
+    return VietnameseSparseTextEmbedder()
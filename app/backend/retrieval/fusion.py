@@ -0,0 +1,22 @@
+"""
+Reciprocal Rank Fusion (RRF) of ranked result lists, shared by the hybrid retrieval paths.
+"""
+from typing import Hashable, Iterable, List, Tuple
+
+# Same ranking constant as Qdrant's Reciprocal Rank Fusion, so scores stay comparable
+RRF_RANKING_CONSTANT = 2
+
+# Minimum number of candidates kept per branch before RRF fusion
+MIN_BRANCH_LIMIT = 10
+
+
+def reciprocal_rank_fusion(branches: Iterable[Iterable[Hashable]], top_k: int) -> List[Tuple[Hashable, float]]:
+    """
+    Fuses ranked lists of keys (best first) by summing `1 / (RRF_RANKING_CONSTANT + rank)`
+    over the lists each key appears in. Returns the `top_k` best (key, fused score) pairs.
+    """
+    fused = {}
+    for branch in branches:
+        for rank, key in enumerate(branch):
+            fused[key] = fused.get(key, 0.0) + 1 / (RRF_RANKING_CONSTANT + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
@@ -0,0 +1,184 @@
+"""
+Denormalized relationship adjacency stored in the document store payload.
+
+Each article's payload gets `meta.adjacency = {"incoming": [[type, id], ...], "outgoing": [...]}`,
+so GRAPH_BACKEND=payload can expand relationships without a Neo4j round trip. Neo4j stays
+the source of truth; `diff_adjacency` reports articles whose stored adjacency has drifted.
+
+Neighbors are listed in neighbor order (newest effective_date first, then id), the order
+in which every graph backend applies the per-type neighbor caps.
+
+Run after loading the graph: `python -m retrieval.indexing.adjacency [--check]`
+"""
+import argparse
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from neo4j import Driver
+
+ADJACENCY_FIELD = "adjacency"
+
+# Number of drifted article ids listed in a consistency report
+REPORT_SAMPLE_SIZE = 20
+
+DATE_REGEX = re.compile(r"(\d{2})/(\d{2})/(\d{4})")
+
+
+def effective_date_key(value: Any) -> str:
+    """A "dd/mm/yyyy" date as a sortable "yyyymmdd"; "" when missing or malformed."""
+    match = DATE_REGEX.fullmatch(value) if isinstance(value, str) else None
+    return f"{match[3]}{match[2]}{match[1]}" if match else ""
+
+
+def neighbor_order(variable: str) -> str:
+    """Cypher ORDER BY items for neighbor order, the same as `order_articles`."""
+    date = f"{variable}.effective_date"
+    return (
+        f"CASE WHEN {date} =~ '[0-9]{{2}}/[0-9]{{2}}/[0-9]{{4}}' "
+        f"THEN substring({date}, 6, 4) + substring({date}, 3, 2) + substring({date}, 0, 2) ELSE '' END DESC, "
+        f"{variable}.id"
+    )
+
+
+def order_articles(dates: Dict[str, Any]) -> List[str]:
+    """Article ids of {id: effective_date} in neighbor order: newest effective_date first, then id."""
+    ordered = sorted(dates)
+    # Stable sort: ids stay ascending within a date
+    ordered.sort(key=lambda article_id: effective_date_key(dates[article_id]), reverse=True)
+    return ordered
+
+
+def build_adjacency(
+    ids: Iterable[str],
+    edges: Iterable[Tuple[str, str, str]],
+    dates: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, List[List[str]]]]:
+    """
+    Groups (source, relation type, target) edges into incoming/outgoing [type, id] lists for
+    every article in `ids`, sorted by type and then neighbor order (by id without `dates`);
+    articles without relationships get empty lists.
+    """
+    adjacency: Dict[str, Dict[str, List[List[str]]]] = {article_id: {"incoming": [], "outgoing": []} for article_id in ids}
+    adjacency = defaultdict(lambda: {"incoming": [], "outgoing": []}, adjacency)
+    for source, rel_type, target in edges:
+        adjacency[source]["outgoing"].append([rel_type, target])
+        adjacency[target]["incoming"].append([rel_type, source])
+
+    rank = {article_id: position for position, article_id in enumerate(order_articles(dates or {}))}
+    for lists in adjacency.values():
+        for direction in ("incoming", "outgoing"):
+            lists[direction].sort(key=lambda pair: (pair[0], rank.get(pair[1], len(rank)), pair[1]))
+    return dict(adjacency)
+
+
+def read_graph_adjacency(driver: Driver) -> Dict[str, Dict[str, List[List[str]]]]:
+    """
+    Reads the adjacency of every Article from Neo4j.
+    """
+    def read(tx):
+        dates = {
+            record["id"]: record["effective_date"]
+            for record in tx.run("MATCH (a:Article) RETURN a.id AS id, a.effective_date AS effective_date")
+        }
+        edges = [
+            (record["source"], record["type"], record["target"])
+            for record in tx.run("MATCH (a:Article)-[r]->(b:Article) RETURN a.id AS source, type(r) AS type, b.id AS target")
+        ]
+        return dates, edges
+
+    with driver.session() as session:
+        dates, edges = session.execute_read(read)
+    return build_adjacency(dates, edges, dates)
+
+
+def diff_adjacency(
+    expected: Dict[str, Dict[str, List[List[str]]]],
+    stored: Iterable[Dict[str, Any]],
+    sample_size: int = REPORT_SAMPLE_SIZE,
+) -> Dict[str, Any]:
+    """
+    Compares stored payloads ({"id", "adjacency"}) with the adjacency read from Neo4j.
+
+    Returns the number of checked articles, of articles whose adjacency differs (including
+    its order, which decides what the neighbor caps keep) and of articles stored without any
+    adjacency (never materialized), with up to `sample_size` ids of each.
+    """
+    checked = 0
+    mismatched = 0
+    missing = 0
+    mismatched_sample: List[str] = []
+    missing_sample: List[str] = []
+    for payload in stored:
+        checked += 1
+        article_id = payload.get("id")
+        adjacency = payload.get(ADJACENCY_FIELD)
+        if adjacency is None:
+            missing += 1
+            if len(missing_sample) < sample_size:
+                missing_sample.append(article_id)
+            continue
+
+        graph = expected.get(article_id, {"incoming": [], "outgoing": []})
+        if list(map(list, adjacency.get("incoming", []))) != graph["incoming"] or \
+                list(map(list, adjacency.get("outgoing", []))) != graph["outgoing"]:
+            mismatched += 1
+            if len(mismatched_sample) < sample_size:
+                mismatched_sample.append(article_id)
+
+    return {
+        "checked": checked,
+        "mismatched": mismatched,
+        "missing": missing,
+        "mismatched_sample": mismatched_sample,
+        "missing_sample": missing_sample,
+    }
+
+
+def materialize_adjacency(driver: Driver) -> Dict[str, Dict[str, List[List[str]]]]:
+    """
+    Writes every article's adjacency to the document store payload.
+    """
+    from retrieval.utils import update_article_meta
+
+    adjacency = read_graph_adjacency(driver)
+    update_article_meta({article_id: {ADJACENCY_FIELD: lists} for article_id, lists in adjacency.items()})
+    logger.info(f"Wrote relationship adjacency of {len(adjacency)} articles to the document store payload")
+    return adjacency
+
+
+def check_adjacency(driver: Driver) -> Dict[str, Any]:
+    """
+    Compares the adjacency stored in the document store payload with Neo4j (GRAPH_BACKEND=payload).
+    """
+    from retrieval.utils import scan_article_payloads
+
+    report = diff_adjacency(read_graph_adjacency(driver), scan_article_payloads([ADJACENCY_FIELD], with_content=False))
+    report["status"] = "consistent" if not report["mismatched"] and not report["missing"] else "inconsistent"
+    logger.info(f"Payload adjacency check: {report['status']} ({report['checked']} articles, "
+                f"{report['mismatched']} mismatched, {report['missing']} missing)")
+    if report["mismatched_sample"]:
+        logger.info(f"Mismatched articles (sample): {report['mismatched_sample']}")
+    if report["missing_sample"]:
+        logger.info(f"Articles without adjacency (sample): {report['missing_sample']}")
+    return report
+
+
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+
+    from core.config import settings
+
+    parser = argparse.ArgumentParser(description="Write relationship adjacency to the document store payload")
+    parser.add_argument("--check", action="store_true", help="only compare the stored adjacency with Neo4j")
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    try:
+        if args.check:
+            check_adjacency(driver)
+        else:
+            materialize_adjacency(driver)
+    finally:
+        driver.close()
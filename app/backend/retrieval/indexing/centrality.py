@@ -0,0 +1,71 @@
+"""
+Offline job computing the PageRank and in-degree of every article over the relationship
+graph and writing them to the document store payload (`meta.pagerank`, `meta.in_degree`).
+
+Run after loading the graph: `python -m retrieval.indexing.centrality`
+"""
+from typing import Dict, List
+
+import numpy as np
+from loguru import logger
+from neo4j import Driver
+
+from core.config import settings
+from retrieval.centrality import IN_DEGREE_FIELD, PAGERANK_FIELD, pagerank
+
+
+def compute_centrality(driver: Driver, relation_types: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Returns {article id: {"pagerank", "in_degree"}} over `relation_types` edges.
+    PageRank is normalised so the most central article scores 1.0.
+    """
+    def read(tx):
+        ids = [record["id"] for record in tx.run("MATCH (a:Article) RETURN a.id AS id")]
+        edges = [
+            (record["source"], record["target"])
+            for record in tx.run(
+                "MATCH (a:Article)-[r]->(b:Article) WHERE type(r) IN $types RETURN a.id AS source, b.id AS target",
+                types=relation_types,
+            )
+        ]
+        return ids, edges
+
+    with driver.session() as session:
+        ids, edges = session.execute_read(read)
+
+    codes = {article_id: code for code, article_id in enumerate(ids)}
+    sources = np.fromiter((codes[source] for source, _ in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((codes[target] for _, target in edges), dtype=np.int64, count=len(edges))
+
+    ranks = pagerank(len(ids), sources, targets, damping=settings.CENTRALITY_DAMPING)
+    if ranks.size:
+        ranks = ranks / ranks.max()
+    in_degrees = np.bincount(targets, minlength=len(ids))
+
+    logger.info(f"Computed centrality of {len(ids)} articles over {len(edges)} relationships")
+    return {
+        article_id: {PAGERANK_FIELD: round(float(ranks[code]), 6), IN_DEGREE_FIELD: int(in_degrees[code])}
+        for code, article_id in enumerate(ids)
+    }
+
+
+def materialize_centrality(driver: Driver) -> Dict[str, Dict[str, float]]:
+    """
+    Recomputes centrality over CENTRALITY_RELATION_TYPES and writes it to the document store payload.
+    """
+    from retrieval.utils import update_article_meta
+
+    centrality = compute_centrality(driver, settings.CENTRALITY_RELATION_TYPES)
+    update_article_meta(centrality)
+    logger.info("Wrote centrality to the document store payload")
+    return centrality
+
+
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    try:
+        materialize_centrality(driver)
+    finally:
+        driver.close()
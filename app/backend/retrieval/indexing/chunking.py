@@ -2,6 +2,7 @@ import re
 import json
 import unicodedata
 from enum import Enum
+from typing import List, Tuple
 from loguru import logger
 from core.config import settings
 from core.prompts import CHUNKING_SYSTEM_PROMPT, PARSING_RELATIONSHIP_PROMPT
@@ -17,6 +18,32 @@ class VBPLSection(Enum):
     POINT = "Điểm"
     SUBPOINT = "Mục con"
 
+
+def split_clauses(content: str) -> Tuple[str, List[str]]:
+    """
+    Splits an article into its header (the lines before clause 1) and its clauses (Khoản),
+    with the boundaries of `VBPLChunker.parse_helper`: clauses are numbered consecutively
+    from 1, and a numbered line inside a quotation does not start a clause. Text is kept
+    as is; an article without numbered clauses is all header.
+    """
+    header: List[str] = []
+    clauses: List[List[str]] = []
+    inquote = 0
+    for line in content.splitlines():
+        # Count quotes to determine if we are in a quote
+        inquote += sum(line.count(quote) for quote in '"“”‘’')
+        if inquote % 2 == 0:
+            inquote = 0
+
+        if re.match(rf"^\s*{len(clauses) + 1}\s*\.", line.strip()) and (not clauses or inquote == 0):
+            clauses.append([line])
+        elif clauses:
+            clauses[-1].append(line)
+        else:
+            header.append(line)
+    return "\n".join(header), ["\n".join(lines) for lines in clauses]
+
+
 class VBPLChunker:
     """
     A class to chunk and parse legal documents from crawled data.
@@ -0,0 +1,333 @@
+"""
+Bulk loader for the article relationship graph.
+
+Nodes and relationships are written in batches with UNWIND, one write transaction per
+batch. Relationships are grouped by type and each type has its own static query, so no
+Cypher is built from data. Progress is checkpointed after every committed batch, so a
+failed load resumes where it stopped (all writes are MERGEs, replaying a batch is harmless).
+
+Every node stores a `content_hash` of its properties and a `relations_hash` of its outgoing
+relationships, so `--sync` only writes new, changed and deleted nodes and edges. Nodes also
+store the `snippet_token_count` of their neighbor snippet, used for context budgeting.
+
+    python -m retrieval.indexing.graph_loader backend/dataset/articles_full_data.json [--sync]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from neo4j import Driver
+
+from core.config import settings
+from core.tokens import SNIPPET_TOKEN_COUNT_FIELD, count_tokens, snippet
+from retrieval.indexing.graph_schema import bump_graph_version, ensure_article_schema
+
+# Dataset field -> relationship type (source article -> target article)
+REL_MAP = {
+    "sua_doi_bo_sung": "SUA_DOI_BO_SUNG",
+    "huong_dan_quy_dinh": "HUONG_DAN_QUY_DINH",
+    "thay_the": "THAY_THE",
+    "bai_bo": "BAI_BO",
+    "dinh_chi": "DINH_CHI",
+}
+
+NODE_PROPERTIES = [
+    "id", "title", "content", "vbpl_id", "document_id",
+    "document_title", "document_status", "effective_date", "expired_date",
+]
+
+NODE_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Article {id: row.id})
+SET a += row
+"""
+
+RELATIONS_HASH_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Article {id: row.id})
+SET a.relations_hash = row.relations_hash
+"""
+
+DELETE_NODES_QUERY = """
+UNWIND $ids AS id
+MATCH (a:Article {id: id})
+DETACH DELETE a
+"""
+
+DELETE_RELATIONSHIPS_QUERY = f"""
+UNWIND $ids AS id
+MATCH (a:Article {{id: id}})-[r:{"|".join(REL_MAP.values())}]->(:Article)
+DELETE r
+"""
+
+# One query per relationship type, built from REL_MAP: relationship types cannot be parameters
+RELATIONSHIP_QUERIES = {
+    rel_type: f"""
+        UNWIND $rows AS row
+        MATCH (a:Article {{id: row.source}})
+        MATCH (b:Article {{id: row.target}})
+        MERGE (a)-[:{rel_type}]->(b)
+    """
+    for rel_type in REL_MAP.values()
+}
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def article_nodes(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Node properties of every dataset row, with the token count of the neighbor snippet and
+    the `content_hash` of those properties.
+    """
+    nodes = []
+    for row in rows:
+        node = {prop: row.get(prop) for prop in NODE_PROPERTIES}
+        node[SNIPPET_TOKEN_COUNT_FIELD] = count_tokens(snippet(node["content"] or ""))
+        node["content_hash"] = _hash(node)
+        nodes.append(node)
+    return nodes
+
+
+def relations_hashes(relationships: Dict[str, List[Dict[str, str]]]) -> Dict[str, str]:
+    """{source id: hash of its sorted outgoing (type, target) pairs}."""
+    outgoing: Dict[str, List[List[str]]] = {}
+    for rel_type, rel_rows in relationships.items():
+        for rel in rel_rows:
+            outgoing.setdefault(rel["source"], []).append([rel_type, rel["target"]])
+    return {source: _hash(sorted(pairs)) for source, pairs in outgoing.items()}
+
+
+def article_relationships(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, str]]]:
+    """{relationship type: [{"source", "target"}, ...]} of every dataset row, without duplicates."""
+    relationships: Dict[str, List[Dict[str, str]]] = {rel_type: [] for rel_type in RELATIONSHIP_QUERIES}
+    for row in rows:
+        for field, rel_type in REL_MAP.items():
+            for target in dict.fromkeys(str(target) for target in row.get(field) or []):
+                relationships[rel_type].append({"source": str(row["id"]), "target": target})
+    return relationships
+
+
+class Checkpoint:
+    """
+    Number of rows committed per stage ("nodes", relationship types), persisted as JSON.
+    Bound to a dataset fingerprint, so a checkpoint of another dataset is ignored.
+    """
+
+    def __init__(self, path: Optional[str], fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done: Dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("fingerprint") == fingerprint:
+                self.done = state.get("done", {})
+                logger.info(f"Resuming graph load from checkpoint {path}: {self.done}")
+            else:
+                logger.warning(f"Ignoring checkpoint {path} written for another dataset")
+
+    def get(self, stage: str) -> int:
+        return self.done.get(stage, 0)
+
+    def set(self, stage: str, rows_done: int) -> None:
+        self.done[stage] = rows_done
+        if self.path:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint, "done": self.done}, f)
+            os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _write_batches(
+    driver: Driver,
+    stage: str,
+    query: str,
+    rows: List[Dict[str, Any]],
+    batch_size: int,
+    checkpoint: Checkpoint,
+) -> int:
+    """
+    Runs `query` over `rows` in batches of `batch_size`, one transaction each, skipping
+    rows already committed according to the checkpoint. Returns the number of rows written.
+    """
+    start = checkpoint.get(stage)
+    if start >= len(rows):
+        return 0
+
+    started_at = time.monotonic()
+    with driver.session() as session:
+        for offset in range(start, len(rows), batch_size):
+            batch = rows[offset:offset + batch_size]
+            session.execute_write(lambda tx, batch: tx.run(query, rows=batch).consume(), batch)
+            done = offset + len(batch)
+            checkpoint.set(stage, done)
+
+            elapsed = time.monotonic() - started_at
+            logger.info(f"{stage}: {done}/{len(rows)} rows ({(done - start) / elapsed if elapsed else 0:.0f} rows/s)")
+    return len(rows) - start
+
+
+def dataset_fingerprint(rows: List[Dict[str, Any]]) -> str:
+    """Hash of the article ids in order; changes when the dataset is replaced."""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(str(row.get("id")).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def load_graph(
+    driver: Driver,
+    rows: List[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Loads dataset rows into Neo4j: schema, Article nodes, then relationships type by type.
+
+    Returns the number of rows written per stage. The checkpoint is removed once the load
+    completes and the graph version is bumped for the API caches.
+    """
+    batch_size = batch_size or settings.GRAPH_LOAD_BATCH_SIZE
+    checkpoint = Checkpoint(checkpoint_path, dataset_fingerprint(rows))
+
+    # MERGE on Article.id relies on the uniqueness constraint to avoid a label scan per row
+    ensure_article_schema(driver)
+
+    relationships = article_relationships(rows)
+    written = {"nodes": _write_batches(driver, "nodes", NODE_QUERY, article_nodes(rows), batch_size, checkpoint)}
+    for rel_type, rel_rows in relationships.items():
+        written[rel_type] = _write_batches(driver, rel_type, RELATIONSHIP_QUERIES[rel_type], rel_rows, batch_size, checkpoint)
+
+    # Articles without relationships get the hash of an empty list, so a later sync sees them as unchanged
+    hashes = relations_hashes(relationships)
+    hash_rows = [{"id": str(row["id"]), "relations_hash": hashes.get(str(row["id"]), _hash([]))} for row in rows]
+    _write_batches(driver, "relations_hash", RELATIONS_HASH_QUERY, hash_rows, batch_size, checkpoint)
+
+    # Invalidates cached relationship expansions and graph snapshots in the API
+    bump_graph_version(driver)
+    checkpoint.clear()
+    logger.info(f"Graph load complete: {written}")
+    return written
+
+
+def sync_graph(driver: Driver, rows: List[Dict[str, Any]], batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Brings Neo4j in line with the dataset by writing only what changed, compared through
+    the stored content and relations hashes:
+
+    - nodes that are new or whose properties changed are upserted;
+    - nodes missing from the dataset are deleted with their relationships;
+    - sources whose outgoing relationships changed (or point at a new node) get their edges
+      replaced, one transaction per batch so readers never see a half-updated article.
+
+    The graph version is bumped only when something was written.
+    """
+    batch_size = batch_size or settings.GRAPH_LOAD_BATCH_SIZE
+    ensure_article_schema(driver)
+
+    with driver.session() as session:
+        stored = session.execute_read(lambda tx: {
+            record["id"]: (record["content_hash"], record["relations_hash"])
+            for record in tx.run(
+                "MATCH (a:Article) RETURN a.id AS id, a.content_hash AS content_hash, a.relations_hash AS relations_hash"
+            )
+        })
+
+    nodes = article_nodes(rows)
+    relationships = article_relationships(rows)
+    hashes = relations_hashes(relationships)
+    empty_hash = _hash([])
+
+    changed_nodes = [node for node in nodes if stored.get(str(node["id"]), (None, None))[0] != node["content_hash"]]
+    new_ids = {str(node["id"]) for node in nodes if str(node["id"]) not in stored}
+    dataset_ids = {str(node["id"]) for node in nodes}
+    deleted_ids = [article_id for article_id in stored if article_id not in dataset_ids]
+
+    # Edges to a node that did not exist were never created, so their sources are re-synced too
+    changed_sources = {
+        article_id for article_id in dataset_ids
+        if stored.get(article_id, (None, None))[1] != hashes.get(article_id, empty_hash)
+    }
+    changed_sources.update(
+        rel["source"] for rel_rows in relationships.values() for rel in rel_rows if rel["target"] in new_ids
+    )
+
+    logger.info(
+        f"Graph sync: {len(changed_nodes)} new or changed nodes ({len(new_ids)} new), "
+        f"{len(deleted_ids)} deleted nodes, {len(changed_sources)} articles with changed relationships"
+    )
+
+    with driver.session() as session:
+        for offset in range(0, len(changed_nodes), batch_size):
+            session.execute_write(lambda tx, batch: tx.run(NODE_QUERY, rows=batch).consume(), changed_nodes[offset:offset + batch_size])
+
+        for offset in range(0, len(deleted_ids), batch_size):
+            session.execute_write(lambda tx, batch: tx.run(DELETE_NODES_QUERY, ids=batch).consume(), deleted_ids[offset:offset + batch_size])
+
+        def replace_relationships(tx, sources: List[str]):
+            source_set = set(sources)
+            tx.run(DELETE_RELATIONSHIPS_QUERY, ids=sources).consume()
+            for rel_type, rel_rows in relationships.items():
+                batch = [rel for rel in rel_rows if rel["source"] in source_set]
+                if batch:
+                    tx.run(RELATIONSHIP_QUERIES[rel_type], rows=batch).consume()
+            tx.run(
+                RELATIONS_HASH_QUERY,
+                rows=[{"id": source, "relations_hash": hashes.get(source, empty_hash)} for source in sources],
+            ).consume()
+
+        sources = sorted(changed_sources)
+        for offset in range(0, len(sources), batch_size):
+            session.execute_write(replace_relationships, sources[offset:offset + batch_size])
+            logger.info(f"relationships: {min(offset + batch_size, len(sources))}/{len(sources)} articles")
+
+    written = {"nodes": len(changed_nodes), "deleted": len(deleted_ids), "relationships": len(changed_sources)}
+    if any(written.values()):
+        bump_graph_version(driver)
+    logger.info(f"Graph sync complete: {written}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load articles and their relationships into Neo4j")
+    parser.add_argument("dataset", help="JSON list of articles (e.g. articles_full_data.json)")
+    parser.add_argument("--batch-size", type=int, default=settings.GRAPH_LOAD_BATCH_SIZE)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <dataset>.graph_load.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--sync", action="store_true", help="Only write new, changed and deleted nodes and edges")
+    args = parser.parse_args()
+
+    from neo4j import GraphDatabase
+
+    from core.utils import read_json_file
+
+    checkpoint_path = args.checkpoint or f"{args.dataset}.graph_load.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    rows = read_json_file(args.dataset)
+    if rows is None:
+        raise SystemExit(1)
+
+    driver = GraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    try:
+        if args.sync:
+            sync_graph(driver, rows, batch_size=args.batch_size)
+        else:
+            load_graph(driver, rows, batch_size=args.batch_size, checkpoint_path=checkpoint_path)
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Idempotent Neo4j schema for the article graph.
+
+Shared by the API (at startup) and the indexing scripts (before loading), so both the
+`MATCH (a:Article {id: ...})` lookups and the loader's `MERGE` use an index.
+"""
+from typing import Dict
+
+from loguru import logger
+from neo4j import Driver
+
+# Schema object name -> idempotent creation statement
+ARTICLE_SCHEMA = {
+    "article_id_unique": "CREATE CONSTRAINT article_id_unique IF NOT EXISTS FOR (a:Article) REQUIRE a.id IS UNIQUE",
+    "article_document_id": "CREATE INDEX article_document_id IF NOT EXISTS FOR (a:Article) ON (a.document_id)",
+    "article_vbpl_id": "CREATE INDEX article_vbpl_id IF NOT EXISTS FOR (a:Article) ON (a.vbpl_id)",
+    "graph_meta_key_unique": "CREATE CONSTRAINT graph_meta_key_unique IF NOT EXISTS FOR (m:GraphMeta) REQUIRE m.key IS UNIQUE",
+}
+
+
+def ensure_article_schema(driver: Driver) -> Dict[str, str]:
+    """
+    Creates the Article uniqueness constraint, lookup indexes and GraphMeta constraint if they are missing.
+
+    Returns the state of each schema object (see `article_schema_status`).
+    """
+    with driver.session() as session:
+        for name, statement in ARTICLE_SCHEMA.items():
+            session.run(statement).consume()
+            logger.debug(f"Ensured Neo4j schema object {name}")
+
+    status = article_schema_status(driver)
+    logger.info(f"Neo4j article schema: {status}")
+    return status
+
+
+def article_schema_status(driver: Driver) -> Dict[str, str]:
+    """
+    Returns the state of each schema object: ONLINE, POPULATING, FAILED or MISSING.
+
+    A uniqueness constraint is backed by an index with the same name, so every
+    object is reported through SHOW INDEXES.
+    """
+    with driver.session() as session:
+        records = session.run(
+            "SHOW INDEXES YIELD name, state WHERE name IN $names RETURN name, state",
+            names=list(ARTICLE_SCHEMA),
+        )
+        states = {record["name"]: record["state"] for record in records}
+
+    return {name: states.get(name, "MISSING") for name in ARTICLE_SCHEMA}
+
+
+# Single metadata node whose version is bumped by every graph write, so readers can drop cached expansions
+GRAPH_META_KEY = "article_graph"
+
+
+def bump_graph_version(driver: Driver) -> int:
+    """
+    Increments the article graph version; call after every batch of graph writes.
+    """
+    with driver.session() as session:
+        record = session.run(
+            """
+            MERGE (m:GraphMeta {key: $key})
+            SET m.version = coalesce(m.version, 0) + 1, m.updated_at = datetime()
+            RETURN m.version AS version
+            """,
+            key=GRAPH_META_KEY,
+        ).single()
+    logger.info(f"Article graph version bumped to {record['version']}")
+    return record["version"]
+
+
+def read_graph_version(driver: Driver) -> int:
+    """
+    Returns the current article graph version (0 if the graph was never versioned).
+    """
+    with driver.session() as session:
+        record = session.run(
+            "OPTIONAL MATCH (m:GraphMeta {key: $key}) RETURN coalesce(m.version, 0) AS version",
+            key=GRAPH_META_KEY,
+        ).single()
+    return record["version"]
@@ -0,0 +1,56 @@
+"""
+Backfill of the per-article token counts stored in the document store payload.
+
+New documents get `token_count`, `snippet_token_count` and `content_hash` when they are
+inserted; this job adds them to articles indexed before, and recomputes them after a change
+of OPENAI_MODEL or NEIGHBOR_SNIPPET_CHARS. Graph nodes get their `snippet_token_count` from
+the graph loader (`python -m retrieval.indexing.graph_loader ... --sync`).
+
+    python -m retrieval.indexing.token_counts [--all]
+"""
+import argparse
+from typing import Dict
+
+from loguru import logger
+
+from core.tokens import CONTENT_HASH_FIELD, SNIPPET_TOKEN_COUNT_FIELD, TOKEN_COUNT_FIELD, content_hash, content_token_stats
+
+
+def backfill_token_counts(recompute: bool = False, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Writes token counts for every article missing them or whose content changed since they
+    were computed (by `content_hash`); with `recompute`, for every article.
+    """
+    from retrieval.utils import scan_article_payloads, update_article_meta
+
+    fields = [TOKEN_COUNT_FIELD, SNIPPET_TOKEN_COUNT_FIELD, CONTENT_HASH_FIELD]
+    scanned = 0
+    updated = 0
+    updates = {}
+    for payload in scan_article_payloads(fields):
+        scanned += 1
+        up_to_date = payload.get(CONTENT_HASH_FIELD) == content_hash(payload["content"]) and \
+            payload.get(TOKEN_COUNT_FIELD) is not None and payload.get(SNIPPET_TOKEN_COUNT_FIELD) is not None
+        if up_to_date and not recompute:
+            continue
+        updates[payload["id"]] = content_token_stats(payload["content"])
+        if len(updates) >= batch_size:
+            update_article_meta(updates, batch_size=batch_size)
+            updated += len(updates)
+            updates = {}
+
+    update_article_meta(updates, batch_size=batch_size)
+    updated += len(updates)
+    logger.info(f"Token counts: scanned {scanned} articles, updated {updated}")
+    return {"scanned": scanned, "updated": updated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store per-article token counts in the document store payload")
+    parser.add_argument("--all", action="store_true", help="recompute the counts of every article")
+    args = parser.parse_args()
+    backfill_token_counts(recompute=args.all)
+
+
+if __name__ == "__main__":
+    main()
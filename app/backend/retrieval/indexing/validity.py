@@ -0,0 +1,181 @@
+"""
+Offline job materializing, for every article, its currently effective version.
+
+An edge (a)-[:THAY_THE]->(b) means a replaces b, and (a)-[:BAI_BO]->(b) means a abolishes b,
+but either may only touch part of b (a phrase, one clause), so an edge only counts when b's
+document fully expired. Following replacements from an expired article leads to its current
+version; an abolished article without replacement has none. The result is written to the
+Article nodes in Neo4j and to the document store payload (`meta.current_version_id`,
+`meta.is_effective`), so the chat path reads it without traversing the graph.
+
+Run after loading the graph: `python -m retrieval.indexing.validity`
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from neo4j import Driver
+
+from retrieval.indexing.graph_schema import bump_graph_version
+
+# document_status of fully expired documents
+EXPIRED_STATUS = "Hết hiệu lực toàn bộ"
+
+REPLACED_BY = "THAY_THE"
+ABOLISHED_BY = "BAI_BO"
+
+
+def _parse_date(value: Any) -> datetime:
+    try:
+        return datetime.strptime(str(value).strip(), "%d/%m/%Y")
+    except ValueError:
+        return datetime.min
+
+
+def compute_validity(
+    articles: Dict[str, Dict[str, Any]],
+    edges: List[Tuple[str, str, str]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Computes {article id: {"current_version_id", "is_effective"}} from article properties
+    (document_status, effective_date) and (source, relation type, target) edges.
+
+    An article is effective unless its document fully expired. THAY_THE and BAI_BO edges
+    carry no scope and are often partial ("Thay cụm từ ...", "Bãi bỏ khoản 3 Điều 8"), so
+    they only count for expired targets. The current version of an article is the end of
+    its replacement chain (the newest replacement when there are several): None when the
+    chain ends in an abolished article, the article itself when it is not replaced (an
+    expired article whose successor is unknown stays its own latest version).
+    """
+    def expired(article_id: str) -> bool:
+        return str(articles.get(article_id, {}).get("document_status") or "").startswith(EXPIRED_STATUS)
+
+    replaced_by: Dict[str, List[str]] = defaultdict(list)
+    abolished = set()
+    for source, rel_type, target in edges:
+        if not expired(target):
+            continue
+        if rel_type == REPLACED_BY and source != target:
+            replaced_by[target].append(source)
+        elif rel_type == ABOLISHED_BY:
+            abolished.add(target)
+
+    def effective(article_id: str) -> bool:
+        return not expired(article_id)
+
+    def newest(candidates: List[str]) -> str:
+        return max(candidates, key=lambda article_id: (_parse_date(articles.get(article_id, {}).get("effective_date")), article_id))
+
+    current: Dict[str, Optional[str]] = {}
+    for article_id in articles:
+        if article_id in current:
+            continue
+
+        # Walk the replacement chain, then resolve every article on it at once
+        path = [article_id]
+        on_path = {article_id}
+        head = article_id
+        while head in replaced_by and head not in current:
+            successor = newest(replaced_by[head])
+            if successor in on_path:
+                break
+            path.append(successor)
+            on_path.add(successor)
+            head = successor
+
+        if head in current:
+            resolved = current[head]
+        else:
+            resolved = None if head in abolished and not effective(head) else head
+        for step in path:
+            current[step] = resolved
+
+    return {
+        article_id: {"current_version_id": current[article_id], "is_effective": effective(article_id)}
+        for article_id in articles
+    }
+
+
+def read_graph(driver: Driver) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str, str]]]:
+    """
+    Reads article statuses and the replacement/abolition edges from Neo4j.
+    """
+    def read(tx):
+        articles = {
+            record["id"]: {"document_status": record["document_status"], "effective_date": record["effective_date"]}
+            for record in tx.run(
+                "MATCH (a:Article) RETURN a.id AS id, a.document_status AS document_status, a.effective_date AS effective_date"
+            )
+        }
+        edges = [
+            (record["source"], record["type"], record["target"])
+            for record in tx.run(
+                f"MATCH (a:Article)-[r:{REPLACED_BY}|{ABOLISHED_BY}]->(b:Article) "
+                "RETURN a.id AS source, type(r) AS type, b.id AS target"
+            )
+        ]
+        return articles, edges
+
+    with driver.session() as session:
+        return session.execute_read(read)
+
+
+def write_validity_to_neo4j(driver: Driver, validity: Dict[str, Dict[str, Any]], batch_size: int = 1000) -> None:
+    """
+    Sets current_version_id and is_effective on the Article nodes, one UNWIND per batch.
+    """
+    rows = [{"id": article_id, **fields} for article_id, fields in validity.items()]
+    with driver.session() as session:
+        for start in range(0, len(rows), batch_size):
+            session.execute_write(
+                lambda tx, batch: tx.run(
+                    """
+                    UNWIND $rows AS row
+                    MATCH (a:Article {id: row.id})
+                    SET a.current_version_id = row.current_version_id, a.is_effective = row.is_effective
+                    """,
+                    rows=batch,
+                ).consume(),
+                rows[start:start + batch_size],
+            )
+
+
+def materialize_validity(driver: Driver, update_payload: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Recomputes the validity of every article and writes it to Neo4j and, with
+    `update_payload`, to the document store payload.
+    """
+    articles, edges = read_graph(driver)
+    validity = compute_validity(articles, edges)
+
+    superseded = sum(
+        1 for article_id, fields in validity.items()
+        if fields["current_version_id"] is not None and fields["current_version_id"] != article_id
+    )
+    logger.info(
+        f"Computed validity of {len(validity)} articles: "
+        f"{sum(fields['is_effective'] for fields in validity.values())} effective, {superseded} with a newer version"
+    )
+
+    write_validity_to_neo4j(driver, validity)
+    bump_graph_version(driver)
+
+    if update_payload:
+        from retrieval.utils import update_article_meta
+        update_article_meta(validity)
+        logger.info("Wrote validity to the document store payload")
+
+    return validity
+
+
+if __name__ == "__main__":
+    from neo4j import GraphDatabase
+
+    from core.config import settings
+
+    driver = GraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD))
+    try:
+        materialize_validity(driver)
+    finally:
+        driver.close()
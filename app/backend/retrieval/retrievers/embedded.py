@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from haystack import component
+from haystack.dataclasses import Document, SparseEmbedding
+
+from core.config import settings
+from retrieval.document_stores.embedded import EmbeddedDocumentStore
+
+
+@component
+class EmbeddedHybridRetriever:
+    """
+    Hybrid retriever for the embedded in-process document store.
+
+    Falls back to dense-only search when no sparse query embedding is given.
+    """
+
+    def __init__(
+        self,
+        document_store: EmbeddedDocumentStore,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        return_embedding: bool = False,
+    ):
+        if not isinstance(document_store, EmbeddedDocumentStore):
+            raise ValueError("document_store must be an instance of EmbeddedDocumentStore")
+
+        self._document_store = document_store
+        self._top_k = top_k
+        self._filters = filters
+        self._return_embedding = return_embedding
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: Optional[SparseEmbedding] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        return_embedding: Optional[bool] = None,
+    ):
+        """
+        Retrieves documents using the dense and, if given, the sparse embedding of the query.
+        """
+        filters = filters or self._filters
+        top_k = top_k or self._top_k
+        return_embedding = self._return_embedding if return_embedding is None else return_embedding
+
+        if query_sparse_embedding is None:
+            docs = self._document_store.query_by_embedding(query_embedding, filters, top_k, return_embedding)
+        else:
+            docs = self._document_store.query_hybrid(
+                query_embedding, query_sparse_embedding, filters, top_k, return_embedding
+            )
+        return {"documents": docs}
+
+
+def get_embedded_retriever(
+    document_store: EmbeddedDocumentStore,
+) -> EmbeddedHybridRetriever:
+    """
+    Returns a hybrid retriever instance for the embedded document store.
+    """
+    return EmbeddedHybridRetriever(document_store=document_store, top_k=settings.RETRIEVER_TOP_K)
@@ -4,6 +4,12 @@ from retrieval.retrievers.qdrant import get_qdrant_retriever
 from retrieval.retrievers.qdrant_hybrid import (
     get_qdrant_hybrid_retriever,
 )
+from retrieval.retrievers.qdrant_matryoshka import (
+    QdrantMatryoshkaHybridRetriever,
+    get_qdrant_matryoshka_retriever,
+)
+from retrieval.retrievers.embedded import EmbeddedHybridRetriever, get_embedded_retriever
+from retrieval.retrievers.sharded import ShardedRetriever, get_sharded_retriever
 from haystack_integrations.components.retrievers.qdrant import QdrantEmbeddingRetriever, QdrantHybridRetriever
 from typing import Union
 
@@ -13,16 +19,29 @@ class RetrieverFactory:
     """
 
     @staticmethod
-    def get_retriever() -> Union[QdrantEmbeddingRetriever, QdrantHybridRetriever]:
+    def get_retriever() -> Union[
+        QdrantEmbeddingRetriever,
+        QdrantHybridRetriever,
+        QdrantMatryoshkaHybridRetriever,
+        EmbeddedHybridRetriever,
+        ShardedRetriever,
+    ]:
         """
         Returns a document retriever instance based on the DOCUMENT_STORE_TYPE in settings.
         """
         document_store_type = settings.DOCUMENT_STORE_TYPE
-        
+
+        if settings.SHARD_BY_CATEGORY:
+            return get_sharded_retriever(document_store)
+
         if document_store_type == "qdrant":
             return get_qdrant_retriever(document_store)
         elif document_store_type == "qdrant_hybrid":
+            if settings.MATRYOSHKA_DIMENSIONS:
+                return get_qdrant_matryoshka_retriever(document_store)
             return get_qdrant_hybrid_retriever(document_store)
+        elif document_store_type == "embedded":
+            return get_embedded_retriever(document_store)
         else:
             raise ValueError(
                 f"unknown document store type for retriever: {document_store_type}"
@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional, Union
+
+from haystack import component
+from haystack.dataclasses import Document, SparseEmbedding
+from qdrant_client.http import models as rest
+
+from core.config import settings
+from retrieval.document_stores.qdrant_matryoshka import QdrantMatryoshkaDocumentStore
+
+
+@component
+class QdrantMatryoshkaHybridRetriever:
+    """
+    Hybrid retriever that prefetches a large candidate set on the low-dimension
+    Matryoshka vector and rescores it with the full dense vector before fusion.
+    """
+
+    def __init__(
+        self,
+        document_store: QdrantMatryoshkaDocumentStore,
+        top_k: int = 10,
+        prefetch_limit: int = 100,
+        filters: Optional[Union[Dict[str, Any], rest.Filter]] = None,
+        return_embedding: bool = False,
+    ):
+        if not isinstance(document_store, QdrantMatryoshkaDocumentStore):
+            raise ValueError("document_store must be an instance of QdrantMatryoshkaDocumentStore")
+
+        self._document_store = document_store
+        self._top_k = top_k
+        self._prefetch_limit = prefetch_limit
+        self._filters = filters
+        self._return_embedding = return_embedding
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Union[Dict[str, Any], rest.Filter]] = None,
+        top_k: Optional[int] = None,
+        return_embedding: Optional[bool] = None,
+    ):
+        """
+        Retrieves documents using both embeddings of the query.
+        """
+        docs = self._document_store._query_hybrid_matryoshka(
+            query_embedding=query_embedding,
+            query_sparse_embedding=query_sparse_embedding,
+            filters=filters or self._filters,
+            top_k=top_k or self._top_k,
+            prefetch_limit=self._prefetch_limit,
+            return_embedding=self._return_embedding if return_embedding is None else return_embedding,
+        )
+        return {"documents": docs}
+
+
+def get_qdrant_matryoshka_retriever(
+    document_store: QdrantMatryoshkaDocumentStore,
+) -> QdrantMatryoshkaHybridRetriever:
+    """
+    Returns a two-stage Matryoshka hybrid retriever instance.
+    """
+    return QdrantMatryoshkaHybridRetriever(
+        document_store=document_store,
+        top_k=settings.RETRIEVER_TOP_K,
+        prefetch_limit=settings.MATRYOSHKA_PREFETCH_LIMIT,
+    )
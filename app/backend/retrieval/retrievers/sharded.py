@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from haystack import component
+from haystack.dataclasses import Document, SparseEmbedding
+
+from core.config import settings
+from retrieval.document_stores.sharded import ShardedDocumentStore
+from retrieval.fusion import MIN_BRANCH_LIMIT, reciprocal_rank_fusion
+from retrieval.retrievers.qdrant import get_qdrant_retriever
+from retrieval.retrievers.qdrant_hybrid import get_qdrant_hybrid_retriever
+from retrieval.retrievers.qdrant_matryoshka import get_qdrant_matryoshka_retriever
+
+
+@component
+class ShardedRetriever:
+    """
+    Retriever that searches the category shards of a ShardedDocumentStore in parallel
+    and merges the per-shard results.
+
+    Dense results are merged by similarity, which is comparable across shards. Hybrid
+    results are fused once over all shards: each shard returns its dense and sparse branches
+    unfused, the branches are merged across shards by raw score and RRF is applied to the
+    merged lists. Merging per-shard RRF scores would only interleave shard ranks.
+
+    `categories` restricts the search to the given shards (e.g. from
+    `retrieval.sharding.classify_query`); all shards are searched when it is empty.
+    """
+
+    def __init__(
+        self,
+        document_store: ShardedDocumentStore,
+        retrievers: Dict[str, Any],
+        top_k: int = 10,
+        prefetch_limit: Optional[int] = None,
+    ):
+        if not isinstance(document_store, ShardedDocumentStore):
+            raise ValueError("document_store must be an instance of ShardedDocumentStore")
+
+        self._document_store = document_store
+        self._retrievers = retrievers
+        self._top_k = top_k
+        self._prefetch_limit = prefetch_limit
+        self._executor = ThreadPoolExecutor(max_workers=len(retrievers), thread_name_prefix="shard-search")
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        query_sparse_embedding: Optional[SparseEmbedding] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        return_embedding: Optional[bool] = None,
+        categories: Optional[List[str]] = None,
+    ):
+        """
+        Retrieves `top_k` documents from each selected shard and keeps the best `top_k` overall.
+        """
+        top_k = top_k or self._top_k
+        selected = [category for category in (categories or []) if category in self._retrievers] or list(self._retrievers)
+
+        if query_sparse_embedding is not None:
+            documents = self._fuse_shards(selected, query_embedding, query_sparse_embedding, filters, top_k, return_embedding)
+            return {"documents": documents}
+
+        kwargs: Dict[str, Any] = {"query_embedding": query_embedding, "filters": filters, "top_k": top_k}
+        if return_embedding is not None:
+            kwargs["return_embedding"] = return_embedding
+
+        futures = [self._executor.submit(self._retrievers[category].run, **kwargs) for category in selected]
+
+        documents = [doc for future in futures for doc in future.result()["documents"]]
+        documents.sort(key=lambda doc: doc.score if doc.score is not None else float("-inf"), reverse=True)
+        return {"documents": documents[:top_k]}
+
+    def _fuse_shards(
+        self,
+        categories: List[str],
+        query_embedding: List[float],
+        query_sparse_embedding: SparseEmbedding,
+        filters: Optional[Dict[str, Any]],
+        top_k: int,
+        return_embedding: Optional[bool],
+    ) -> List[Document]:
+        """
+        Reciprocal Rank Fusion over the dense and sparse branches of all selected shards.
+        """
+        branch_limit = max(top_k, MIN_BRANCH_LIMIT)
+        futures = [
+            self._executor.submit(
+                self._document_store.shards[category]._query_branches,
+                query_embedding=query_embedding,
+                query_sparse_embedding=query_sparse_embedding,
+                filters=filters,
+                top_k=branch_limit,
+                return_embedding=bool(return_embedding),
+                prefetch_limit=self._prefetch_limit,
+            )
+            for category in categories
+        ]
+        results = [future.result() for future in futures]
+
+        documents: Dict[str, Document] = {}
+        branches = []
+        for branch in (0, 1):
+            merged = sorted(
+                (doc for result in results for doc in result[branch]),
+                key=lambda doc: doc.score if doc.score is not None else float("-inf"),
+                reverse=True,
+            )[:branch_limit]
+            for doc in merged:
+                documents.setdefault(doc.id, doc)
+            branches.append([doc.id for doc in merged])
+
+        return [replace(documents[doc_id], score=score) for doc_id, score in reciprocal_rank_fusion(branches, top_k)]
+
+
+def get_sharded_retriever(document_store: ShardedDocumentStore) -> ShardedRetriever:
+    """
+    Returns a retriever fanning out to one Qdrant retriever per category shard.
+    """
+    document_store_type = settings.DOCUMENT_STORE_TYPE
+
+    prefetch_limit = None
+    if document_store_type == "qdrant":
+        get_shard_retriever = get_qdrant_retriever
+    elif settings.MATRYOSHKA_DIMENSIONS:
+        get_shard_retriever = get_qdrant_matryoshka_retriever
+        prefetch_limit = settings.MATRYOSHKA_PREFETCH_LIMIT
+    else:
+        get_shard_retriever = get_qdrant_hybrid_retriever
+
+    return ShardedRetriever(
+        document_store=document_store,
+        retrievers={category: get_shard_retriever(store) for category, store in document_store.shards.items()},
+        top_k=settings.RETRIEVER_TOP_K,
+        prefetch_limit=prefetch_limit,
+    )
@@ -0,0 +1,91 @@
+"""
+Document category routing for collection sharding.
+
+Categories follow `VBPLCrawler.categories`; articles whose document type cannot be
+determined go to the OTHER_CATEGORY shard.
+"""
+import re
+import unicodedata
+from typing import List, Optional
+
+from retrieval.citation import LEGAL_NUMBER_REGEX, normalize_document_number
+
+OTHER_CATEGORY = "khac"
+
+SHARD_CATEGORIES = ["thong_tu", "nghi_dinh", "quyet_dinh", "chi_thi", "luat", "phap_lenh", OTHER_CATEGORY]
+
+# Leading code of the issuer part of a document number, e.g. "TT" in 37/2024/TT-NHNN
+DOCUMENT_CODE_CATEGORIES = {
+    "TT": "thong_tu",
+    "TTLT": "thong_tu",
+    "NĐ": "nghi_dinh",
+    "ND": "nghi_dinh",
+    "QĐ": "quyet_dinh",
+    "QD": "quyet_dinh",
+    "CT": "chi_thi",
+}
+
+# Document type names followed by a number, e.g. "Thông tư 37", "nghị định số 102"
+DOCUMENT_TYPE_REGEX = re.compile(
+    r"\b(thông tư|nghị định|quyết định|chỉ thị|luật|pháp lệnh)\s+(?:số\s+)?\d",
+    re.IGNORECASE,
+)
+
+DOCUMENT_TYPE_CATEGORIES = {
+    "thông tư": "thong_tu",
+    "nghị định": "nghi_dinh",
+    "quyết định": "quyet_dinh",
+    "chỉ thị": "chi_thi",
+    "luật": "luat",
+    "pháp lệnh": "phap_lenh",
+}
+
+
+def shard_index(base_index: str, category: str) -> str:
+    """
+    Returns the collection name of a category shard, e.g. "law_documents_thong_tu".
+    """
+    return f"{base_index}_{category}"
+
+
+def category_of(document_number: Optional[str]) -> str:
+    """
+    Maps a document number to its shard category.
+
+    "37/2024/TT-NHNN" -> thong_tu, "102/2022/NĐ-CP" -> nghi_dinh, "32/2024/QH15" -> luat,
+    "01/2012/UBTVQH13" -> phap_lenh; anything else -> OTHER_CATEGORY.
+    """
+    if not document_number:
+        return OTHER_CATEGORY
+
+    issuer = normalize_document_number(document_number).rsplit("/", 1)[-1]
+    code = issuer.split("-", 1)[0]
+    if code in DOCUMENT_CODE_CATEGORIES:
+        return DOCUMENT_CODE_CATEGORIES[code]
+    if code.startswith("UBTVQH"):
+        return "phap_lenh"
+    if code.startswith("QH"):
+        return "luat"
+    return OTHER_CATEGORY
+
+
+def classify_query(query: str) -> List[str]:
+    """
+    Returns the shard categories a query explicitly targets, or an empty list when it
+    does not name a document type, in which case every shard should be searched.
+
+    Only document numbers and type names followed by a number count, so generic
+    wording such as "quyết định cho vay" or "pháp luật" does not narrow the search.
+    """
+    text = unicodedata.normalize("NFC", query)
+
+    categories = []
+    for match in LEGAL_NUMBER_REGEX.finditer(text):
+        category = category_of(match.group(0))
+        if category != OTHER_CATEGORY and category not in categories:
+            categories.append(category)
+    for match in DOCUMENT_TYPE_REGEX.finditer(text):
+        category = DOCUMENT_TYPE_CATEGORIES[match.group(1).lower()]
+        if category not in categories:
+            categories.append(category)
+    return categories
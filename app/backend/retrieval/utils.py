@@ -1,24 +1,43 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
 from haystack.dataclasses import Document
 from haystack.components.writers import DocumentWriter
 from haystack.document_stores.types import DuplicatePolicy
+from haystack_integrations.document_stores.qdrant import QdrantDocumentStore
+from haystack_integrations.document_stores.qdrant.converters import DENSE_VECTORS_NAME
+from qdrant_client.http import models as rest
 
+from core.cache import LRUCache
 from core.config import settings
+from core.tokens import content_token_stats
+from retrieval.centrality import boost_by_centrality
+from retrieval.diversification import diversify
+from retrieval.document_stores.embedded import EmbeddedDocumentStore
 from retrieval.document_stores.factory import document_store
+from retrieval.document_stores.qdrant import PAYLOAD_FIELDS_TO_INDEX
+from retrieval.document_stores.sharded import ShardedDocumentStore
 from retrieval.embedders.factory import document_embedder, text_embedder
-from retrieval.retrievers.factory import retriever
 from retrieval.generation.factory import generator
+from retrieval.retrievers.factory import retriever
+from retrieval.sharding import classify_query
+
+# Query embeddings are reused by search, neighbor ranking and repeated questions
+query_embedding_cache = LRUCache(max_size=settings.QUERY_EMBEDDING_CACHE_SIZE)
 
 
 def insert(documents: List[Document]):
     """
     Embeds and writes documents to the document store.
     Handles both dense and hybrid embedding strategies.
+    Token counts of the content and of its neighbor snippet are stored in meta.
     """
+    for doc in documents:
+        doc.meta.update(content_token_stats(doc.content))
+
     document_store_type = settings.DOCUMENT_STORE_TYPE
     writer = DocumentWriter(document_store=document_store, policy=DuplicatePolicy.OVERWRITE)
 
-    if document_store_type == "qdrant_hybrid":
+    if document_store_type in ("qdrant_hybrid", "embedded"):
         from retrieval.embedders.fastembed_sparse import get_fastembed_sparse_document_embedder
 
         sparse_doc_embedder = get_fastembed_sparse_document_embedder()
@@ -36,36 +55,282 @@ def insert(documents: List[Document]):
         raise ValueError(f"unknown document store type for insertion: {document_store_type}")
 
 
-def search(query: str) -> List[Document]:
+def embed_query(query: str) -> List[float]:
+    """
+    Returns the dense embedding of a query, cached by exact query text.
+    """
+    embedding = query_embedding_cache.get(query)
+    if embedding is None:
+        embedding = text_embedder.run(text=query)["embedding"]
+        query_embedding_cache.set(query, embedding)
+    return embedding
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Dense embeddings of passages (e.g. clauses of an article) with the document embedder,
+    batched by EMBEDDING_BATCH_SIZE; one row per text.
+    """
+    if not texts:
+        return np.zeros((0, settings.EMBEDDING_DIMENSIONS), dtype=np.float32)
+    documents = document_embedder.run(documents=[Document(content=text) for text in texts])["documents"]
+    return np.asarray([doc.embedding for doc in documents], dtype=np.float32)
+
+
+def search(query: str, top_k: Optional[int] = None, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
     """
     Embeds a query and retrieves relevant documents from the document store.
+    `top_k` overrides the retriever default (RETRIEVER_TOP_K); `filters` are haystack metadata filters.
+
+    With MMR_ENABLED, MMR_FETCH_K candidates are retrieved with their vectors and
+    diversified down to `top_k` with Maximal Marginal Relevance. With CENTRALITY_BOOST,
+    CENTRALITY_FETCH_K candidates are re-ranked by their stored PageRank first.
     """
     document_store_type = settings.DOCUMENT_STORE_TYPE
+    top_k = top_k or settings.RETRIEVER_TOP_K
+    fetch_k = max(top_k, settings.MMR_FETCH_K) if settings.MMR_ENABLED else top_k
+    if settings.CENTRALITY_BOOST > 0:
+        fetch_k = max(fetch_k, settings.CENTRALITY_FETCH_K)
+
+    # The sharded retriever only searches the shards the query names (all shards otherwise)
+    shard_kwargs = {}
+    if settings.SHARD_BY_CATEGORY and settings.SHARD_QUERY_ROUTING:
+        shard_kwargs["categories"] = classify_query(query)
     
-    if document_store_type == "qdrant_hybrid":
+    if document_store_type in ("qdrant_hybrid", "embedded"):
         from retrieval.embedders.fastembed_sparse import get_fastembed_sparse_text_embedder
 
         sparse_text_embedder = get_fastembed_sparse_text_embedder()
 
-        query_embedding = text_embedder.run(text=query)["embedding"]
+        query_embedding = embed_query(query)
         query_sparse_embedding = sparse_text_embedder.run(text=query)["sparse_embedding"]
 
-        # The retriever is a QdrantHybridRetriever, which takes both embeddings
+        # The retriever is a hybrid retriever (Qdrant or embedded), which takes both embeddings
         results = retriever.run(
             query_embedding=query_embedding,
-            query_sparse_embedding=query_sparse_embedding
+            query_sparse_embedding=query_sparse_embedding,
+            filters=filters,
+            top_k=fetch_k,
+            return_embedding=settings.MMR_ENABLED,
+            **shard_kwargs
         )
-        return results["documents"]
 
     elif document_store_type == "qdrant":
-        query_embedding = text_embedder.run(text=query)["embedding"]
+        query_embedding = embed_query(query)
 
         # The retriever is a QdrantEmbeddingRetriever
-        results = retriever.run(query_embedding=query_embedding)
-        return results["documents"]
+        results = retriever.run(
+            query_embedding=query_embedding,
+            filters=filters,
+            top_k=fetch_k,
+            return_embedding=settings.MMR_ENABLED,
+            **shard_kwargs
+        )
     else:
         raise ValueError(f"unknown document store type for searching: {document_store_type}")
 
+    documents = results["documents"]
+    if settings.CENTRALITY_BOOST > 0:
+        documents = boost_by_centrality(documents, weight=settings.CENTRALITY_BOOST)
+
+    # MMR recomputes relevance from the embeddings, so it applies the centrality boost itself
+    if settings.MMR_ENABLED:
+        return diversify(
+            query_embedding, documents, top_k=top_k, lambda_mult=settings.MMR_LAMBDA,
+            centrality_weight=settings.CENTRALITY_BOOST,
+        )
+    return documents[:top_k]
+
+
+def fetch_by_article_ids(article_ids: List[str]) -> List[Document]:
+    """
+    Fetches documents directly by article id (meta.id), without embedding anything.
+    Documents are returned in the order of `article_ids`; unknown ids are skipped.
+    """
+    if not article_ids:
+        return []
+
+    documents = document_store.filter_documents(
+        filters={"field": "meta.id", "operator": "in", "value": list(article_ids)}
+    )
+    documents_by_id = {doc.meta.get("id"): doc for doc in documents}
+    return [documents_by_id[article_id] for article_id in article_ids if article_id in documents_by_id]
+
+
+def fetch_article_payloads(article_ids: List[str], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches `content` and the given meta fields by article id (meta.id), without vectors.
+    Articles that are not indexed are missing from the result.
+    """
+    article_ids = list(dict.fromkeys(article_ids))
+    if not article_ids:
+        return {}
+
+    if isinstance(document_store, EmbeddedDocumentStore):
+        return {
+            doc.meta.get("id"): {**{field: doc.meta.get(field) for field in fields}, "content": doc.content}
+            for doc in fetch_by_article_ids(article_ids)
+        }
+
+    stores = document_store.shards.values() if isinstance(document_store, ShardedDocumentStore) else [document_store]
+    payloads: Dict[str, Dict[str, Any]] = {}
+    for store in stores:
+        store._initialize_client()
+        points, _ = store._client.scroll(
+            collection_name=store.index,
+            scroll_filter=rest.Filter(
+                must=[rest.FieldCondition(key="meta.id", match=rest.MatchAny(any=article_ids))]
+            ),
+            limit=len(article_ids),
+            with_payload=["content", "meta.id"] + [f"meta.{field}" for field in fields],
+            with_vectors=False,
+        )
+        for point in points:
+            meta = point.payload.get("meta", {})
+            payloads[meta["id"]] = {**{field: meta.get(field) for field in fields}, "content": point.payload.get("content")}
+    return payloads
+
+
+def scan_article_payloads(fields: List[str], batch_size: int = 1000, with_content: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the given meta fields (plus `id`, and `content` unless `with_content` is False) of
+    every stored article, without vectors.
+    """
+    def payload(meta: Dict[str, Any], content: Optional[str]) -> Dict[str, Any]:
+        scanned = {"id": meta.get("id"), **{field: meta.get(field) for field in fields}}
+        if with_content:
+            scanned["content"] = content
+        return scanned
+
+    if isinstance(document_store, EmbeddedDocumentStore):
+        for doc in document_store.filter_documents():
+            yield payload(doc.meta, doc.content)
+        return
+
+    with_payload = ["meta.id"] + [f"meta.{field}" for field in fields] + (["content"] if with_content else [])
+    stores = document_store.shards.values() if isinstance(document_store, ShardedDocumentStore) else [document_store]
+    for store in stores:
+        store._initialize_client()
+        offset = None
+        while True:
+            points, offset = store._client.scroll(
+                collection_name=store.index,
+                with_payload=with_payload,
+                with_vectors=False,
+                limit=batch_size,
+                offset=offset,
+            )
+            for point in points:
+                yield payload(point.payload.get("meta", {}), point.payload.get("content"))
+            if offset is None:
+                break
+
+
+def _fetch_qdrant_embeddings(store: QdrantDocumentStore, article_ids: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Scrolls the points of the given article ids with only the dense vector and meta.id.
+    """
+    store._initialize_client()
+    dense_vector = [DENSE_VECTORS_NAME] if store.use_sparse_embeddings else True
+
+    points, _ = store._client.scroll(
+        collection_name=store.index,
+        scroll_filter=rest.Filter(
+            must=[rest.FieldCondition(key="meta.id", match=rest.MatchAny(any=list(article_ids)))]
+        ),
+        limit=len(article_ids),
+        with_payload=["meta.id"],
+        with_vectors=dense_vector,
+    )
+
+    embeddings = {}
+    for point in points:
+        vector = point.vector.get(DENSE_VECTORS_NAME) if isinstance(point.vector, dict) else point.vector
+        if vector is not None:
+            embeddings[point.payload["meta"]["id"]] = np.asarray(vector, dtype=np.float32)
+    return embeddings
+
+
+def fetch_embeddings(article_ids: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Fetches dense vectors by article id (meta.id) in bulk, without payloads.
+    Articles that are not indexed are missing from the result.
+    """
+    article_ids = list(dict.fromkeys(article_ids))
+    if not article_ids:
+        return {}
+
+    if isinstance(document_store, EmbeddedDocumentStore):
+        return document_store.get_embeddings(article_ids)
+
+    stores = document_store.shards.values() if isinstance(document_store, ShardedDocumentStore) else [document_store]
+    embeddings: Dict[str, np.ndarray] = {}
+    for store in stores:
+        embeddings.update(_fetch_qdrant_embeddings(store, article_ids))
+    return embeddings
+
+
+def _update_qdrant_meta(store: QdrantDocumentStore, updates: Dict[str, Dict[str, Any]], batch_size: int) -> None:
+    """
+    Merges fields into meta of the points with the given article ids, in batched set-payload operations.
+    """
+    store._initialize_client()
+    operations = [
+        rest.SetPayloadOperation(
+            set_payload=rest.SetPayload(
+                payload=fields,
+                key="meta",
+                filter=rest.Filter(must=[rest.FieldCondition(key="meta.id", match=rest.MatchValue(value=article_id))]),
+            )
+        )
+        for article_id, fields in updates.items()
+    ]
+    for start in range(0, len(operations), batch_size):
+        store._client.batch_update_points(collection_name=store.index, update_operations=operations[start:start + batch_size])
+
+
+def ensure_payload_indexes() -> Dict[str, List[str]]:
+    """
+    Creates the PAYLOAD_FIELDS_TO_INDEX indexes missing from existing collections; haystack only
+    creates them with a new collection. Idempotent. Returns the created fields per collection.
+    """
+    if isinstance(document_store, EmbeddedDocumentStore):
+        return {}
+
+    stores = document_store.shards.values() if isinstance(document_store, ShardedDocumentStore) else [document_store]
+    created: Dict[str, List[str]] = {}
+    for store in stores:
+        store._initialize_client()
+        indexed = store._client.get_collection(store.index).payload_schema or {}
+        for field in PAYLOAD_FIELDS_TO_INDEX:
+            if field["field_name"] in indexed:
+                continue
+            store._client.create_payload_index(
+                collection_name=store.index,
+                field_name=field["field_name"],
+                field_schema=field["field_schema"],
+            )
+            created.setdefault(store.index, []).append(field["field_name"])
+    return created
+
+
+def update_article_meta(updates: Dict[str, Dict[str, Any]], batch_size: int = 500) -> None:
+    """
+    Merges the given fields into the stored meta of each article id (meta.id), without
+    re-embedding. Used by offline jobs that materialize graph-derived fields into the payload.
+    """
+    if not updates:
+        return
+
+    if isinstance(document_store, EmbeddedDocumentStore):
+        document_store.update_meta(updates)
+        return
+
+    stores = document_store.shards.values() if isinstance(document_store, ShardedDocumentStore) else [document_store]
+    for store in stores:
+        # A set-payload filter that matches nothing in a shard is a no-op
+        _update_qdrant_meta(store, updates, batch_size)
+
 
 def generate_response(
     query: str,
@@ -4,8 +4,11 @@ from datetime import datetime
 import logging
 
 from domain.models import ChatRequest, ChatResponse
+from services.compression_service import compression_service
 from services.qdrant_service import qdrant_service, RetrievalMode
 from services.neo4j_service import neo4j_service
+from services.neighbor_ranking_service import neighbor_ranking_service
+from services.rerank_service import rerank_service
 from services.synthesis_service import synthesis_service
 from core.config import settings
 
@@ -18,6 +21,9 @@ class ChatService:
     def __init__(self):
         self.qdrant_service = qdrant_service
         self.neo4j_service = neo4j_service
+        self.neighbor_ranking_service = neighbor_ranking_service
+        self.rerank_service = rerank_service
+        self.compression_service = compression_service
         self.synthesis_service = synthesis_service
     
     async def process_chat(
@@ -36,12 +42,30 @@ class ChatService:
             
             # Step 1: Qdrant retrieval
             logger.info(f"Step 1: Retrieving similar documents from Qdrant using {retrieval_mode} mode")
-            retrieved_documents = await self.qdrant_service.retrieve_similar_documents(
-                query=request.message,
-                mode=retrieval_mode,
-                top_k=settings.RETRIEVER_TOP_K,
-                threshold=settings.RETRIEVER_SCORE_THRESHOLD
-            )
+            if settings.RERANKER_ENABLED:
+                # Over-fetch without the fusion score cut; the cross-encoder decides what is kept
+                retrieved_documents = await self.qdrant_service.retrieve_similar_documents(
+                    query=request.message,
+                    mode=retrieval_mode,
+                    top_k=settings.RERANKER_FETCH_K,
+                    threshold=0.0
+                )
+                logger.info("Step 1b: Reranking retrieved documents with cross-encoder")
+                retrieved_documents = self.rerank_service.rerank(
+                    query=request.message,
+                    documents=retrieved_documents,
+                    top_k=settings.RETRIEVER_TOP_K
+                )
+            else:
+                retrieved_documents = await self.qdrant_service.retrieve_similar_documents(
+                    query=request.message,
+                    mode=retrieval_mode,
+                    top_k=settings.RETRIEVER_TOP_K,
+                    threshold=settings.RETRIEVER_SCORE_THRESHOLD
+                )
+            if settings.SUPERSEDED_HANDLING == "swap":
+                logger.info("Step 1c: Swapping superseded documents for their current versions")
+                retrieved_documents = self.qdrant_service.resolve_current_versions(retrieved_documents)
             
             # Step 2: Neo4j expansion
             logger.info("Step 2: Expanding with related documents and relationships from Neo4j")
@@ -49,13 +73,31 @@ class ChatService:
                 query=request.message,
                 documents=retrieved_documents
             )
+            if settings.NEIGHBOR_RANKING_ENABLED:
+                logger.info("Step 2b: Ranking and pruning related documents against the query")
+                related_documents = self.neighbor_ranking_service.rank(
+                    query=request.message,
+                    documents=related_documents
+                )
             
             # Step 3: LLM synthesis
+            context_documents = related_documents
+            compression_report = None
+            if settings.COMPRESSION_ENABLED:
+                logger.info("Step 3a: Compressing long articles to the clauses relevant to the query")
+                context_documents, compression_report = self.compression_service.compress(
+                    query=request.message,
+                    documents=related_documents
+                )
+
             logger.info("Step 3: Synthesizing response using LLM")
-            response_text = self.synthesis_service.generate_response(
+            response_text, context_report = self.synthesis_service.generate_response_with_report(
                 query=request.message,
-                related_documents=related_documents
+                related_documents=context_documents,
+                corpus_version=self.neo4j_service.corpus_version()
             )
+            if compression_report is not None:
+                context_report["compression"] = compression_report
             
             # Calculate processing time
             processing_time = time.time() - start_time
@@ -66,7 +108,7 @@ class ChatService:
                 session_id=session_id,
                 related_documents=related_documents,
                 timestamp=datetime.now(),
-                metadata={"processing_time": processing_time}
+                metadata={"processing_time": processing_time, "context": context_report}
             )
             
             logger.info(f"Response for request (ID: {session_id}): {chat_response.message}...")
@@ -105,6 +147,7 @@ class ChatService:
             services_status = {
                 "qdrant": "connected" if qdrant_healthy else "disconnected",
                 "neo4j": "connected" if neo4j_healthy else "disconnected", 
+                "neo4j_schema": self.neo4j_service.schema_state() if neo4j_healthy else "unknown",
                 "llm": "available" if llm_healthy else "unavailable"
             }
             
@@ -0,0 +1,137 @@
+"""
+Query-focused extractive compression of long articles before synthesis.
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from core.cache import LRUCache
+from core.config import settings
+from core.tokens import content_hash, count_tokens
+from domain.models import RetrievedDocument
+from retrieval.indexing.chunking import split_clauses
+from retrieval.utils import embed_query, embed_texts
+
+logger = logging.getLogger(__name__)
+
+# Marks clauses left out of a compressed article
+OMITTED = "[...]"
+
+
+class CompressionService:
+    """Service for cutting long articles down to the clauses most relevant to the query."""
+
+    def __init__(self):
+        # Clause embeddings by clause text hash; articles are re-read for every question about them
+        self.embedding_cache = LRUCache(max_size=settings.COMPRESSION_CACHE_SIZE)
+
+    def compress(self, query: str, documents: List[RetrievedDocument]) -> Tuple[List[RetrievedDocument], Dict[str, Any]]:
+        """
+        Replace every article longer than COMPRESSION_MIN_TOKENS by its header and the clauses
+        (Khoản) most similar to the query, in their original order, within COMPRESSION_ARTICLE_TOKENS.
+
+        Clauses of all long articles are scored in one vectorized pass against the query
+        embedding; uncached clauses are embedded in one batch. Compressed articles are copies,
+        the given documents are left untouched. Returns the documents and a report.
+        """
+        # (document index, header, clauses)
+        candidates: List[Tuple[int, str, List[str]]] = []
+        for i, doc in enumerate(documents):
+            tokens = doc.token_count if doc.token_count is not None else count_tokens(doc.content)
+            if tokens <= settings.COMPRESSION_MIN_TOKENS:
+                continue
+            header, clauses = split_clauses(doc.content)
+            if len(clauses) > 1:
+                candidates.append((i, header, clauses))
+        if not candidates:
+            return documents, {"compressed": 0}
+
+        clauses = [clause for _, _, article_clauses in candidates for clause in article_clauses]
+        scores = self._score(query, clauses)
+
+        compressed = list(documents)
+        tokens_before = 0
+        tokens_after = 0
+        offset = 0
+        for i, header, article_clauses in candidates:
+            article_scores = scores[offset:offset + len(article_clauses)]
+            offset += len(article_clauses)
+
+            content, tokens = self._select(header, article_clauses, article_scores)
+            tokens_before += documents[i].token_count or count_tokens(documents[i].content)
+            tokens_after += tokens
+            compressed[i] = documents[i].model_copy(update={
+                "content": content,
+                "token_count": tokens,
+                "content_hash": content_hash(content),
+            })
+
+        logger.info(f"Compressed {len(candidates)} articles from {tokens_before} to {tokens_after} tokens")
+        return compressed, {"compressed": len(candidates), "tokens_before": tokens_before, "tokens_after": tokens_after}
+
+    def _score(self, query: str, clauses: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of every clause to the query.
+        """
+        keys = [content_hash(clause) for clause in clauses]
+        vectors = {key: self.embedding_cache.get(key) for key in dict.fromkeys(keys)}
+        pending = [key for key, vector in vectors.items() if vector is None]
+        if pending:
+            texts = {key: clause for key, clause in zip(keys, clauses)}
+            for key, vector in zip(pending, embed_texts([texts[key] for key in pending])):
+                vectors[key] = vector
+                self.embedding_cache.set(key, vector)
+
+        query_vector = np.asarray(embed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        matrix = np.stack([vectors[key] for key in keys])
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        return (matrix @ query_vector) / norms
+
+    def _select(self, header: str, clauses: List[str], scores: np.ndarray) -> Tuple[str, int]:
+        """
+        Header plus the best-scoring clauses that fit in COMPRESSION_ARTICLE_TOKENS (the best
+        one is always kept), in article order, with OMITTED where clauses were left out.
+
+        The budget covers the joined content, markers and line breaks included; the returned
+        token count is that of the final content.
+        """
+        costs = [count_tokens(clause) for clause in clauses]
+        header_cost = count_tokens(header) if header else 0
+        marker_cost = count_tokens(OMITTED)
+        newline_cost = count_tokens("\n")
+
+        def cost_of(kept: set) -> int:
+            tokens, lines = header_cost, 1 if header else 0
+            previous_kept = True
+            for index, clause_cost in enumerate(costs):
+                if index in kept:
+                    tokens += clause_cost
+                    lines += 1
+                elif previous_kept:
+                    tokens += marker_cost
+                    lines += 1
+                previous_kept = index in kept
+            return tokens + newline_cost * max(lines - 1, 0)
+
+        kept = set()
+        for index in np.argsort(-scores, kind="stable"):
+            candidate = kept | {int(index)}
+            if kept and cost_of(candidate) > settings.COMPRESSION_ARTICLE_TOKENS:
+                continue
+            kept = candidate
+
+        lines = [header] if header else []
+        for index, clause in enumerate(clauses):
+            if index in kept:
+                lines.append(clause)
+            elif not lines or lines[-1] != OMITTED:
+                lines.append(OMITTED)
+        content = "\n".join(lines)
+        return content, count_tokens(content)
+
+# Global service instance
+compression_service = CompressionService()
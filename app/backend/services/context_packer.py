@@ -0,0 +1,103 @@
+"""
+Token-budgeted selection of the documents and neighbors sent to the LLM.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from domain.models import RelatedDocument, RetrievedDocument
+
+
+@dataclass
+class Fragment:
+    """A document or neighbor as rendered in the context, with its token count."""
+
+    text: str
+    tokens: int
+    # JSON format: the document's own relationship members, joined with its neighbors
+    relationships: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PackedDocument:
+    """A retrieved document with the neighbors that fit in the budget."""
+
+    document: RetrievedDocument
+    incoming: List[RelatedDocument] = field(default_factory=list)
+    outgoing: List[RelatedDocument] = field(default_factory=list)
+
+
+@dataclass
+class PackedContext:
+    """Packed documents in retrieval order, their estimated token count and what was dropped."""
+
+    documents: List[PackedDocument]
+    tokens: int
+    budget: int
+    dropped: List[Dict[str, Any]]
+
+    def report(self) -> Dict[str, Any]:
+        """Summary for response metadata."""
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "documents": len(self.documents),
+            "neighbors": sum(len(doc.incoming) + len(doc.outgoing) for doc in self.documents),
+            "dropped": self.dropped,
+        }
+
+
+class ContextPacker:
+    """
+    Greedy packer: retrieved documents first (in rank order), then their neighbors by
+    depth and score. Each item costs its rendered token count; an item that does not fit
+    is dropped and packing continues with the next one, so a long article does not
+    crowd out shorter ones behind it. Neighbors of a dropped document are dropped too.
+    """
+
+    def __init__(
+        self,
+        document_cost: Callable[[RetrievedDocument], int],
+        neighbor_cost: Callable[[RelatedDocument, str], int],
+    ):
+        self.document_cost = document_cost
+        self.neighbor_cost = neighbor_cost
+
+    def pack(self, documents: List[RetrievedDocument], budget: int) -> PackedContext:
+        tokens = 0
+        dropped: List[Dict[str, Any]] = []
+        packed: Dict[int, PackedDocument] = {}
+
+        for i, doc in enumerate(documents):
+            cost = self.document_cost(doc)
+            if tokens + cost > budget:
+                dropped.append({"id": doc.id, "kind": "document", "tokens": cost})
+                continue
+            tokens += cost
+            packed[i] = PackedDocument(document=doc)
+
+        # Direct neighbors before chain neighbors, then the most query-relevant first (when ranked)
+        neighbors = [
+            (i, direction, rel)
+            for i, doc in enumerate(documents)
+            for direction, rels in (("incoming", doc.relationships.incoming), ("outgoing", doc.relationships.outgoing))
+            for rel in rels
+        ]
+        neighbors.sort(key=lambda item: (item[2].depth, -(item[2].score or 0.0)))
+
+        for i, direction, rel in neighbors:
+            if i not in packed:
+                dropped.append({"id": rel.id, "kind": "neighbor", "parent": documents[i].id, "reason": "parent dropped"})
+                continue
+            cost = self.neighbor_cost(rel, direction)
+            if tokens + cost > budget:
+                dropped.append({"id": rel.id, "kind": "neighbor", "parent": documents[i].id, "tokens": cost})
+                continue
+            tokens += cost
+            getattr(packed[i], direction).append(rel)
+
+        return PackedContext(
+            documents=[packed[i] for i in sorted(packed)],
+            tokens=tokens,
+            budget=budget,
+            dropped=dropped,
+        )
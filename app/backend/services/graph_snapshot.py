@@ -0,0 +1,223 @@
+"""
+In-memory, array-backed snapshot of the article relationship graph.
+
+Neo4j stays the source of truth; the snapshot serves neighbor expansion without a
+network round trip and is rebuilt when the graph changes.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+from neo4j import Driver
+
+from core.config import settings
+from retrieval.indexing.adjacency import order_articles
+from retrieval.indexing.graph_schema import read_graph_version
+from retrieval.indexing.validity import EXPIRED_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Article properties kept for neighbors (everything RelatedDocument needs besides content)
+NODE_PROPERTIES = [
+    "id", "title", "vbpl_id", "document_id", "document_title",
+    "document_status", "effective_date", "expired_date", "snippet_token_count",
+]
+
+
+def is_expired(props: Dict[str, Any]) -> bool:
+    """Whether the article's document is fully expired; multi-hop expansion does not continue through it."""
+    return str(props.get("document_status") or "").startswith(EXPIRED_STATUS)
+
+
+def neighbor_projection(variable: str) -> str:
+    """
+    Cypher map projection of a neighbor node: NODE_PROPERTIES plus a `content` snippet of
+    $snippet_chars characters cut server-side ("..." marks a cut).
+    """
+    properties = ", ".join(f".{prop}" for prop in NODE_PROPERTIES)
+    content = f"coalesce({variable}.content, '')"
+    return (
+        f"{variable} {{{properties}, content: substring({content}, 0, $snippet_chars) "
+        f"+ CASE WHEN size({content}) > $snippet_chars THEN '...' ELSE '' END}}"
+    )
+
+
+def graph_signature(driver: Driver) -> Tuple[int, int, int]:
+    """
+    Cheap change detector: (graph version, article count, relationship count).
+    The counts are served from count stores and catch writes that did not bump the version.
+    """
+    with driver.session() as session:
+        nodes = session.run("MATCH (a:Article) RETURN count(a) AS n").single()["n"]
+        edges = session.run("MATCH ()-[r]->() RETURN count(r) AS n").single()["n"]
+    return read_graph_version(driver), nodes, edges
+
+
+def _build_csr(rows: np.ndarray, cols: np.ndarray, types: np.ndarray, n_nodes: int, rank: np.ndarray):
+    """Group (row, col, type) edges by row into CSR arrays, each row's neighbors in `rank` order."""
+    order = np.lexsort((rank[cols], rows))
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), types[order].astype(np.uint8)
+
+
+class GraphSnapshot:
+    """
+    Typed article graph in CSR form.
+
+    Article ids and relation types are interned to integer codes. Outgoing and incoming
+    edges each get their own CSR (indptr, neighbor codes, type codes), so expanding a
+    node is two array slices; each node's neighbors are stored in neighbor order. Only
+    articles with at least one relationship are kept, each with the same projected fields
+    (and content snippet) as the Neo4j expansion query.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        properties: List[Dict[str, Any]],
+        relation_types: List[str],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        type_codes: np.ndarray,
+        signature: Tuple[int, int, int] = (0, 0, 0),
+    ):
+        self.ids = ids
+        self.id_codes = {article_id: code for code, article_id in enumerate(ids)}
+        self.properties = properties
+        self.relation_types = relation_types
+        self.signature = signature
+
+        # Neighbor order (newest effective_date first, then id), as in the Cypher and payload backends
+        n_nodes = len(ids)
+        rank = np.empty(n_nodes, dtype=np.int64)
+        ordered = order_articles({article_id: props.get("effective_date") for article_id, props in zip(ids, properties)})
+        rank[[self.id_codes[article_id] for article_id in ordered]] = np.arange(n_nodes)
+        self.out_indptr, self.out_neighbors, self.out_types = _build_csr(sources, targets, type_codes, n_nodes, rank)
+        self.in_indptr, self.in_neighbors, self.in_types = _build_csr(targets, sources, type_codes, n_nodes, rank)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.out_neighbors.size)
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self.id_codes
+
+    def _expand(self, article_id: str, indptr: np.ndarray, neighbors: np.ndarray, types: np.ndarray) -> List[Tuple[str, int]]:
+        code = self.id_codes.get(article_id)
+        if code is None:
+            return []
+        start, end = indptr[code], indptr[code + 1]
+        return [(self.relation_types[t], int(n)) for n, t in zip(neighbors[start:end], types[start:end])]
+
+    def outgoing(self, article_id: str) -> List[Tuple[str, int]]:
+        """(relation type, neighbor code) pairs for edges leaving `article_id`."""
+        return self._expand(article_id, self.out_indptr, self.out_neighbors, self.out_types)
+
+    def incoming(self, article_id: str) -> List[Tuple[str, int]]:
+        """(relation type, neighbor code) pairs for edges pointing at `article_id`."""
+        return self._expand(article_id, self.in_indptr, self.in_neighbors, self.in_types)
+
+    def node(self, code: int) -> Dict[str, Any]:
+        """Projected properties of an interned article, including its id and content snippet."""
+        return self.properties[code]
+
+    def chain(
+        self,
+        article_id: str,
+        direction: str,
+        relation_types: Iterable[str],
+        max_depth: int,
+        max_fanout: int,
+        max_nodes: int,
+        prune_expired: bool = True,
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Breadth-first walk from `article_id` along `relation_types` edges in one direction
+        ("incoming" or "outgoing"), returning (relation type, neighbor code, depth) for
+        depths 2..max_depth.
+
+        At most `max_fanout` new neighbors are followed per node and `max_nodes` are returned;
+        the Cypher chain query in Neo4jService walks the graph the same way.
+        With `prune_expired`, fully expired articles beyond the first hop are neither returned
+        nor expanded; first-hop neighbors are always expanded, since an expired direct neighbor
+        is what leads to its replacement.
+        """
+        start = self.id_codes.get(article_id)
+        if start is None or max_depth < 2:
+            return []
+
+        if direction == "incoming":
+            indptr, neighbors, types = self.in_indptr, self.in_neighbors, self.in_types
+        else:
+            indptr, neighbors, types = self.out_indptr, self.out_neighbors, self.out_types
+        followed = {code for code, rel_type in enumerate(self.relation_types) if rel_type in set(relation_types)}
+
+        visited = {start}
+        frontier = [start]
+        results: List[Tuple[str, int, int]] = []
+        for depth in range(1, max_depth + 1):
+            # Every frontier node follows its first `max_fanout` neighbors unvisited before this
+            # hop; nodes reached from several frontier nodes are kept once, first come first served
+            hops: Dict[int, str] = {}
+            for code in frontier:
+                taken = 0
+                for neighbor, type_code in zip(neighbors[indptr[code]:indptr[code + 1]], types[indptr[code]:indptr[code + 1]]):
+                    neighbor = int(neighbor)
+                    if taken >= max_fanout:
+                        break
+                    if type_code not in followed or neighbor in visited:
+                        continue
+                    if depth >= 2 and prune_expired and is_expired(self.properties[neighbor]):
+                        continue
+                    hops.setdefault(neighbor, self.relation_types[type_code])
+                    taken += 1
+
+            visited.update(hops)
+            frontier = list(hops)
+            if depth >= 2:
+                frontier = frontier[:max_nodes - len(results)]
+                results.extend((hops[neighbor], neighbor, depth) for neighbor in frontier)
+        return results
+
+    @classmethod
+    def load(cls, driver: Driver) -> "GraphSnapshot":
+        """
+        Reads every typed Article-to-Article edge and its endpoints from Neo4j.
+        """
+        signature = graph_signature(driver)
+
+        def read_graph(tx):
+            edges = [
+                (record["source"], record["type"], record["target"])
+                for record in tx.run(
+                    "MATCH (a:Article)-[r]->(b:Article) RETURN a.id AS source, type(r) AS type, b.id AS target"
+                )
+            ]
+            nodes = {
+                record["id"]: dict(record["props"])
+                for record in tx.run(
+                    f"MATCH (a:Article) WHERE (a)--(:Article) RETURN a.id AS id, {neighbor_projection('a')} AS props",
+                    snippet_chars=settings.NEIGHBOR_SNIPPET_CHARS,
+                )
+            }
+            return edges, nodes
+
+        with driver.session() as session:
+            edges, nodes = session.execute_read(read_graph)
+
+        ids = list(nodes)
+        id_codes = {article_id: code for code, article_id in enumerate(ids)}
+        relation_types = sorted({rel_type for _, rel_type, _ in edges})
+        type_codes = {rel_type: code for code, rel_type in enumerate(relation_types)}
+
+        sources = np.fromiter((id_codes[source] for source, _, _ in edges), dtype=np.int32, count=len(edges))
+        targets = np.fromiter((id_codes[target] for _, _, target in edges), dtype=np.int32, count=len(edges))
+        types = np.fromiter((type_codes[rel_type] for _, rel_type, _ in edges), dtype=np.uint8, count=len(edges))
+
+        snapshot = cls(ids, [nodes[article_id] for article_id in ids], relation_types, sources, targets, types, signature)
+        logger.info(f"Loaded graph snapshot with {len(snapshot)} articles and {snapshot.edge_count} relationships")
+        return snapshot
@@ -0,0 +1,77 @@
+"""
+Query-aware ranking and pruning of graph neighbors.
+"""
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from core.config import settings
+from domain.models import RelatedDocument, RetrievedDocument
+from retrieval.utils import embed_query, fetch_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class NeighborRankingService:
+    """Service for ranking the Neo4j neighbors of retrieved articles against the query."""
+
+    def rank(self, query: str, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        """
+        Score every neighbor as cosine(query, neighbor) * relation weight, keep the best
+        NEIGHBOR_TOP_M per article and at most NEIGHBOR_BUDGET overall.
+
+        Neighbor vectors are fetched from the document store in one bulk request; neighbors
+        that are not indexed score 0 and are dropped first.
+        """
+        # (document index, direction, neighbor)
+        neighbors: List[Tuple[int, str, RelatedDocument]] = [
+            (i, direction, rel)
+            for i, doc in enumerate(documents)
+            for direction, rels in (("incoming", doc.relationships.incoming), ("outgoing", doc.relationships.outgoing))
+            for rel in rels
+        ]
+        if not neighbors:
+            return documents
+
+        query_vector = np.asarray(embed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+
+        vectors = fetch_embeddings([rel.id for _, _, rel in neighbors])
+        matrix = np.zeros((len(neighbors), query_vector.size), dtype=np.float32)
+        for row, (_, _, rel) in enumerate(neighbors):
+            vector = vectors.get(rel.id)
+            if vector is not None:
+                matrix[row] = vector
+
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ query_vector) / norms
+        weights = np.array([
+            settings.NEIGHBOR_RELATION_WEIGHTS.get(rel.rela_type, settings.NEIGHBOR_DEFAULT_WEIGHT)
+            for _, _, rel in neighbors
+        ], dtype=np.float32)
+        scores = similarities * weights
+
+        # Top-m per article, then the global budget over what is left
+        document_indices = np.array([i for i, _, _ in neighbors])
+        candidates = []
+        for i in range(len(documents)):
+            rows = np.flatnonzero(document_indices == i)
+            candidates.extend(rows[np.argsort(-scores[rows], kind="stable")][:settings.NEIGHBOR_TOP_M])
+        kept = sorted(candidates, key=lambda row: -scores[row])[:settings.NEIGHBOR_BUDGET]
+
+        for doc in documents:
+            doc.relationships.incoming = []
+            doc.relationships.outgoing = []
+        for row in kept:
+            i, direction, rel = neighbors[row]
+            rel.score = float(scores[row])
+            getattr(documents[i].relationships, direction).append(rel)
+
+        logger.info(f"Ranked {len(neighbors)} neighbors ({len(vectors)} with vectors), kept {len(kept)}")
+        return documents
+
+
+# Global service instance
+neighbor_ranking_service = NeighborRankingService()
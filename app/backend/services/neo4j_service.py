@@ -1,18 +1,186 @@
-from typing import List, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 import logging
+import re
+import threading
+import time
 
 from domain.models import RetrievedDocument, RelatedDocument, Relationships
 from core.config import settings
 from neo4j import GraphDatabase, Driver
+from core.cache import LRUCache
+from retrieval.indexing.adjacency import ADJACENCY_FIELD, neighbor_order
+from retrieval.indexing.graph_schema import article_schema_status, ensure_article_schema, read_graph_version
+from retrieval.utils import fetch_article_payloads
+from services.graph_snapshot import EXPIRED_STATUS, NODE_PROPERTIES, GraphSnapshot, graph_signature, neighbor_projection
 
 logger = logging.getLogger(__name__)
 
+def convert_node_to_related_doc(props: Dict[str, Any], rela_type: str, depth: int = 1) -> RelatedDocument:
+    """
+    Convert Neo4j node properties + relationship type into RelatedDocument.
+    Missing properties come back as null from map projections; they fall back to the defaults.
+    """
+    props = {key: value for key, value in props.items() if value is not None}
+    return RelatedDocument(
+        rela_type=rela_type or "unknown",
+        depth=depth,
+        id=str(props.get("id", "unknown")),
+        title=props.get("title", "unknown"),
+        content=props.get("content", "unknown"),
+        vbpl_id=props.get("vbpl_id", "unknown"),
+        document_id=props.get("document_id", "unknown"),
+        document_title=props.get("document_title", "unknown"),
+        document_status=props.get("document_status", "unknown"),
+        effective_date=props.get("effective_date", "unknown"),
+        expired_date=props.get("expired_date", "unknown"),
+        snippet_token_count=props.get("snippet_token_count"),
+    )
+
+
+def cap_neighbors(neighbors: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """
+    Keep at most NEO4J_NEIGHBOR_CAPS[type] (or NEO4J_NEIGHBOR_DEFAULT_CAP) neighbors per relation type.
+    Snapshot rows and payload adjacency lists are stored in neighbor order, so the first ones are kept.
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    capped = []
+    for rela_type, code in neighbors:
+        if counts[rela_type] < settings.NEO4J_NEIGHBOR_CAPS.get(rela_type, settings.NEO4J_NEIGHBOR_DEFAULT_CAP):
+            counts[rela_type] += 1
+            capped.append((rela_type, code))
+    return capped
+
+
+def chain_relation_types() -> List[str]:
+    """GRAPH_CHAIN_RELATION_TYPES, validated since they are interpolated into Cypher."""
+    for rel_type in settings.GRAPH_CHAIN_RELATION_TYPES:
+        if not re.fullmatch(r"[A-Z_]+", rel_type):
+            raise ValueError(f"invalid relation type in GRAPH_CHAIN_RELATION_TYPES: {rel_type}")
+    return settings.GRAPH_CHAIN_RELATION_TYPES
+
+
+def expansion_cypher() -> str:
+    """
+    First-hop expansion of a batch of article ids ($ids), in one round trip. Neighbors are
+    projected to the fields we use, content is cut server-side to NEIGHBOR_SNIPPET_CHARS and
+    each relation type is capped in neighbor order.
+    """
+    return """
+            UNWIND $ids AS id
+            MATCH (a:Article {id: id})
+            CALL {
+                WITH a
+                MATCH (a)-[r]->(b:Article)
+                WITH type(r) AS type, b
+                ORDER BY %(outgoing_order)s
+                WITH type, collect(%(outgoing)s) AS nodes
+                RETURN collect({type: type, nodes: nodes[..coalesce($caps[type], $default_cap)]}) AS outgoing_rels
+            }
+            CALL {
+                WITH a
+                MATCH (c:Article)-[r]->(a)
+                WITH type(r) AS type, c
+                ORDER BY %(incoming_order)s
+                WITH type, collect(%(incoming)s) AS nodes
+                RETURN collect({type: type, nodes: nodes[..coalesce($caps[type], $default_cap)]}) AS incoming_rels
+            }
+            RETURN id, outgoing_rels, incoming_rels
+        """ % {
+            "outgoing": neighbor_projection("b"),
+            "incoming": neighbor_projection("c"),
+            "outgoing_order": neighbor_order("b"),
+            "incoming_order": neighbor_order("c"),
+        }
+
+
+def chain_cypher(max_depth: int, relation_types: List[str]) -> Optional[str]:
+    """
+    Multi-hop chain walk of a batch of article ids ($ids) along `relation_types`, for depths
+    2..max_depth; None when there is nothing to walk. The query grows with `max_depth`
+    (GRAPH_MAX_DEPTH, bounded in Settings), so it is built once.
+
+    The walk is unrolled hop by hop, like the snapshot walk: every frontier node follows at
+    most $max_fanout unvisited neighbors in neighbor order, expired articles are pruned
+    from the second hop on, and a hop stops adding nodes once $max_nodes are collected.
+    """
+    if max_depth < 2 or not relation_types:
+        return None
+    chain_types = "|".join(relation_types)
+    query = "UNWIND $ids AS id\nMATCH (a:Article {id: id})\nWITH id, a"
+    for direction, pattern in (("outgoing", "(f)-[r:%s]->(n:Article)"), ("incoming", "(f)<-[r:%s]-(n:Article)")):
+        query += ", [a] AS frontier, [a.id] AS visited, [] AS %s_chain" % direction
+        carried = "id, a" if direction == "outgoing" else "id, a, outgoing_chain"
+        for depth in range(1, max_depth + 1):
+            query += """
+        CALL {
+            WITH frontier, visited
+            UNWIND range(0, size(frontier) - 1) AS position
+            WITH position, frontier[position] AS f, visited
+            CALL {
+                WITH f, visited
+                MATCH %(pattern)s
+                WHERE NOT n.id IN visited %(prune)s
+                WITH r, n ORDER BY %(order)s
+                LIMIT $max_fanout
+                RETURN collect({type: type(r), node: n, props: %(projection)s}) AS hits
+            }
+            WITH position, hits ORDER BY position
+            WITH reduce(found = [], node_hits IN collect(hits) | found + node_hits) AS found
+            RETURN reduce(fresh = {ids: [], hops: []}, hop IN found |
+                CASE WHEN hop.node.id IN fresh.ids THEN fresh
+                ELSE {ids: fresh.ids + hop.node.id, hops: fresh.hops + hop} END) AS fresh
+        }""" % {
+                "pattern": pattern % chain_types,
+                "prune": "AND NOT ($prune_expired AND coalesce(n.document_status STARTS WITH $expired_status, false))"
+                if depth >= 2 else "",
+                "order": neighbor_order("n"),
+                "projection": neighbor_projection("n"),
+            }
+            if depth == 1:
+                query += """
+        WITH %(carried)s, [hop IN fresh.hops | hop.node] AS frontier, visited + fresh.ids AS visited, %(chain)s""" % {
+                    "carried": carried, "chain": "%s_chain" % direction,
+                }
+            else:
+                query += """
+        WITH %(carried)s, fresh.hops[..$max_nodes - size(%(chain)s)] AS hops, visited + fresh.ids AS visited, %(chain)s
+        WITH %(carried)s, [hop IN hops | hop.node] AS frontier, visited,
+            %(chain)s + [hop IN hops | {type: hop.type, depth: %(depth)d, node: hop.props}] AS %(chain)s""" % {
+                    "carried": carried, "chain": "%s_chain" % direction, "depth": depth,
+                }
+        if direction == "outgoing":
+            query += "\n            WITH id, a, outgoing_chain"
+    query += "\n            RETURN id, outgoing_chain, incoming_chain"
+    return query
+
+
+def append_chain(neighbors: List[RelatedDocument], chain: List[RelatedDocument], article_id: str) -> List[RelatedDocument]:
+    """Append multi-hop neighbors that are not already first-hop neighbors (or the article itself)."""
+    seen = {rel.id for rel in neighbors} | {article_id}
+    for rel in chain:
+        if rel.id not in seen:
+            seen.add(rel.id)
+            neighbors.append(rel)
+    return neighbors
+
 
 class Neo4jService:
     """Service for Neo4j graph database operations."""
     
     def __init__(self):
         self.driver: Optional[Driver] = None
+        self.snapshot: Optional[GraphSnapshot] = None
+        self._stop_refresh = threading.Event()
+        self.relationship_cache = LRUCache(
+            max_size=settings.RELATIONSHIP_CACHE_SIZE,
+            ttl_seconds=settings.RELATIONSHIP_CACHE_TTL_SECONDS,
+            size_fn=lambda relationships: len(relationships.model_dump_json()),
+        )
+        self.graph_version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self.expansion_cypher = expansion_cypher()
+        self.chain_cypher = chain_cypher(settings.GRAPH_MAX_DEPTH, chain_relation_types())
         self._connect()
 
     def _connect(self):
@@ -40,9 +208,210 @@ class Neo4jService:
     
     def close(self):
         """Close Neo4j connection."""
+        self._stop_refresh.set()
         if self.driver:
             self.driver.close()
 
+    def _check_graph_version(self):
+        """
+        Drop cached relationships when the loader bumped the graph version.
+        The version is read at most every GRAPH_VERSION_CHECK_SECONDS.
+        """
+        if time.monotonic() - self._version_checked_at < settings.GRAPH_VERSION_CHECK_SECONDS:
+            return
+        self._version_checked_at = time.monotonic()
+
+        version = read_graph_version(self.driver)
+        if version != self.graph_version:
+            if self.graph_version is not None:
+                logger.info(f"Graph version changed {self.graph_version} -> {version}; clearing relationship cache")
+            self.relationship_cache.clear()
+            self.graph_version = version
+
+    def corpus_version(self) -> Optional[int]:
+        """
+        Current graph version on every backend, None when it is unknown (Neo4j unreachable).
+        The snapshot backend reports the version its snapshot was loaded at; the others read
+        it from Neo4j at most every GRAPH_VERSION_CHECK_SECONDS.
+        """
+        if settings.GRAPH_BACKEND == "snapshot" and self.snapshot is not None:
+            return self.snapshot.signature[0]
+        if not self.driver:
+            return None
+        try:
+            self._check_graph_version()
+        except Exception as e:
+            logger.warning(f"Failed to read graph version: {e}")
+            return None
+        return self.graph_version
+
+    def stats(self) -> Dict[str, Any]:
+        """Return relationship cache and snapshot statistics."""
+        stats: Dict[str, Any] = {
+            "backend": settings.GRAPH_BACKEND,
+            "graph_version": self.graph_version,
+            "relationship_cache": self.relationship_cache.stats(),
+        }
+        if self.snapshot is not None:
+            stats["snapshot"] = {"articles": len(self.snapshot), "relationships": self.snapshot.edge_count}
+        return stats
+
+    def refresh_snapshot(self, force: bool = False) -> bool:
+        """
+        Reload the in-memory graph snapshot if the graph changed since the last load.
+        Returns True when a new snapshot was swapped in.
+        """
+        if not self.driver:
+            return False
+
+        if not force and self.snapshot is not None and graph_signature(self.driver) == self.snapshot.signature:
+            return False
+
+        # Built off to the side and swapped in one assignment; readers never see a partial snapshot
+        self.snapshot = GraphSnapshot.load(self.driver)
+        return True
+
+    def start_snapshot_refresh(self):
+        """Load the graph snapshot and keep it fresh every GRAPH_SNAPSHOT_REFRESH_SECONDS (GRAPH_BACKEND=snapshot)."""
+        if settings.GRAPH_BACKEND != "snapshot" or not self.driver:
+            return
+
+        try:
+            self.refresh_snapshot(force=True)
+        except Exception as e:
+            logger.error(f"Failed to load graph snapshot, falling back to Neo4j queries: {e}")
+
+        def refresh_loop():
+            while not self._stop_refresh.wait(settings.GRAPH_SNAPSHOT_REFRESH_SECONDS):
+                try:
+                    if self.refresh_snapshot():
+                        logger.info("Graph changed; snapshot refreshed")
+                except Exception as e:
+                    logger.error(f"Failed to refresh graph snapshot: {e}")
+
+        threading.Thread(target=refresh_loop, name="graph-snapshot-refresh", daemon=True).start()
+
+    def _relationships_from_snapshot(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        """Populate relationships from the in-memory snapshot, without a Neo4j round trip."""
+        snapshot = self.snapshot
+        chain_types = chain_relation_types()
+
+        def chain(article_id: str, direction: str) -> List[RelatedDocument]:
+            return [
+                convert_node_to_related_doc(snapshot.node(code), rela_type, depth)
+                for rela_type, code, depth in snapshot.chain(
+                    article_id,
+                    direction,
+                    chain_types,
+                    max_depth=settings.GRAPH_MAX_DEPTH,
+                    max_fanout=settings.GRAPH_MAX_FANOUT,
+                    max_nodes=settings.GRAPH_MAX_CHAIN_NODES,
+                    prune_expired=settings.GRAPH_PRUNE_EXPIRED,
+                )
+            ]
+
+        for doc in documents:
+            doc.relationships = Relationships(
+                incoming=append_chain(
+                    [
+                        convert_node_to_related_doc(snapshot.node(code), rela_type)
+                        for rela_type, code in cap_neighbors(snapshot.incoming(doc.id))
+                    ],
+                    chain(doc.id, "incoming"),
+                    doc.id,
+                ),
+                outgoing=append_chain(
+                    [
+                        convert_node_to_related_doc(snapshot.node(code), rela_type)
+                        for rela_type, code in cap_neighbors(snapshot.outgoing(doc.id))
+                    ],
+                    chain(doc.id, "outgoing"),
+                    doc.id,
+                ),
+            )
+
+        total_in = sum(len(d.relationships.incoming) for d in documents)
+        total_out = sum(len(d.relationships.outgoing) for d in documents)
+        logger.info(f"Sucessfully retrieve relationships from snapshot for {len(documents)} documents "
+                    f"(incoming={total_in}, outgoing={total_out})")
+        return documents
+
+    def _relationships_from_payload(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        """
+        Populate relationships from the adjacency stored in the document payload, without Neo4j.
+
+        Adjacency missing from a document (e.g. lazy expansion by id) and neighbor fields come
+        from two batched payload fetches; only direct neighbors are expanded.
+        """
+        adjacency = {doc.id: doc.adjacency for doc in documents if doc.adjacency is not None}
+        missing = [doc.id for doc in documents if doc.adjacency is None]
+        if missing:
+            for article_id, payload in fetch_article_payloads(missing, [ADJACENCY_FIELD]).items():
+                if payload.get(ADJACENCY_FIELD) is not None:
+                    adjacency[article_id] = payload[ADJACENCY_FIELD]
+
+        capped = {
+            article_id: {
+                direction: cap_neighbors([tuple(pair) for pair in lists.get(direction, [])])
+                for direction in ("incoming", "outgoing")
+            }
+            for article_id, lists in adjacency.items()
+        }
+        neighbor_ids = [
+            neighbor_id
+            for lists in capped.values()
+            for pairs in lists.values()
+            for _, neighbor_id in pairs
+        ]
+        payloads = fetch_article_payloads(neighbor_ids, [prop for prop in NODE_PROPERTIES if prop != "id"])
+
+        def neighbor(rela_type: str, neighbor_id: str) -> RelatedDocument:
+            props = dict(payloads.get(neighbor_id, {}), id=neighbor_id)
+            content = props.get("content") or ""
+            limit = settings.NEIGHBOR_SNIPPET_CHARS
+            props["content"] = content[:limit] + "..." if len(content) > limit else content
+            return convert_node_to_related_doc(props, rela_type)
+
+        for doc in documents:
+            lists = capped.get(doc.id, {"incoming": [], "outgoing": []})
+            doc.relationships = Relationships(
+                incoming=[neighbor(rela_type, neighbor_id) for rela_type, neighbor_id in lists["incoming"]],
+                outgoing=[neighbor(rela_type, neighbor_id) for rela_type, neighbor_id in lists["outgoing"]],
+            )
+
+        logger.info(f"Sucessfully retrieve relationships from payload for {len(documents)} documents "
+                    f"({len(missing)} adjacency lookups, {len(payloads)} neighbors fetched)")
+        return documents
+
+    def ensure_schema(self) -> Dict[str, str]:
+        """Create the Article constraint and indexes if missing; returns their state."""
+        if not self.driver:
+            logger.warning("Neo4j not connected, skipping schema bootstrap")
+            return {}
+
+        try:
+            return ensure_article_schema(self.driver)
+        except Exception as e:
+            logger.error(f"Failed to ensure Neo4j schema: {e}")
+            return {}
+
+    def schema_state(self) -> str:
+        """Summarize the Article schema state for readiness checks: online, populating, missing or unknown."""
+        if not self.driver:
+            return "unknown"
+
+        try:
+            states = set(article_schema_status(self.driver).values())
+        except Exception as e:
+            logger.error(f"Failed to read Neo4j schema state: {e}")
+            return "unknown"
+
+        if states == {"ONLINE"}:
+            return "online"
+        if "MISSING" in states or "FAILED" in states:
+            return "missing"
+        return "populating"
+
     def get_document_relationships(
             self, 
             query: str, 
@@ -52,71 +421,97 @@ class Neo4jService:
         Populate each RetrievedDocument in `documents` with relationships.incoming/outgoing based on ids
         """
 
+        if settings.GRAPH_BACKEND == "payload":
+            return self._relationships_from_payload(documents)
+
         if not self.driver:
             logger.warning("Neo4j not connected, returning original documents unchanged")
             return documents
         
-        def convert_node_to_related_doc(node, rela_type: str) -> RelatedDocument:
-            """Convert a Neo4j node + relationship type into RelatedDocument."""
-
-            props = dict(node) if node else {}
-            return RelatedDocument(
-                rela_type=rela_type or "unknown",
-                id=str(props.get("id", "unknown")),
-                title=props.get("title", "unknown"),
-                content=props.get("content", "unknown"),
-                vbpl_id=props.get("vbpl_id", "unknown"),
-                document_id=props.get("document_id", "unknown"),
-                document_title=props.get("document_title", "unknown"),
-                document_status=props.get("document_status", "unknown"),
-                effective_date=props.get("effective_date", "unknown"),
-                expired_date=props.get("expired_date", "unknown"),
-            )
+        if settings.GRAPH_BACKEND == "snapshot" and self.snapshot is not None:
+            return self._relationships_from_snapshot(documents)
 
-        cypher = """
-            MATCH (a:Article {id: $id})
-            OPTIONAL MATCH (a)-[r_out]->(b:Article)
-            WITH a, collect({type: type(r_out), target: b, props: properties(r_out)}) AS outgoing_rels
-            OPTIONAL MATCH (c:Article)-[r_in]->(a)
-            WITH a, outgoing_rels, collect({type: type(r_in), source: c, props: properties(r_in)}) AS incoming_rels
-            RETURN a, outgoing_rels, incoming_rels
-        """
+        def fetch_relationships(tx, ids: List[str]):
+            records = {
+                record["id"]: dict(record)
+                for record in tx.run(
+                    self.expansion_cypher,
+                    ids=ids,
+                    snippet_chars=settings.NEIGHBOR_SNIPPET_CHARS,
+                    caps=settings.NEO4J_NEIGHBOR_CAPS,
+                    default_cap=settings.NEO4J_NEIGHBOR_DEFAULT_CAP,
+                )
+            }
+            if self.chain_cypher is not None:
+                for record in tx.run(
+                    self.chain_cypher,
+                    ids=list(records),
+                    snippet_chars=settings.NEIGHBOR_SNIPPET_CHARS,
+                    prune_expired=settings.GRAPH_PRUNE_EXPIRED,
+                    expired_status=EXPIRED_STATUS,
+                    max_fanout=settings.GRAPH_MAX_FANOUT,
+                    max_nodes=settings.GRAPH_MAX_CHAIN_NODES,
+                ):
+                    records[record["id"]].update(dict(record))
+            return records
 
         try:
-            with self.driver.session() as session:
-                logger.info(f"Starting retrieve relationships for document ids: {[doc.id for doc in documents]}")
-                for i, doc in enumerate(documents):
-                    result = session.run(cypher, {"id": doc.id})
-                    record = result.single()
-
-                    if not record or not record["a"]:
-                        logger.warning(f"Document {doc.id} not found in Neo4j; leaving relationships empty")
-                        documents[i].relationships = Relationships()
-                        continue
-
-                    outgoing_rels = record["outgoing_rels"] or []
-                    incoming_rels = record["incoming_rels"] or []
-
-                    outgoing_list: List[RelatedDocument] = []
-                    for rel in outgoing_rels:
-                        target = rel.get("target")
-                        if target is None:
-                            continue
-                        rtype = rel.get("type") or "unknown"
-                        outgoing_list.append(convert_node_to_related_doc(target, rtype))
-
-                    incoming_list: List[RelatedDocument] = []
-                    for rel in incoming_rels:
-                        source = rel.get("source")
-                        if source is None:
-                            continue
-                        rtype = rel.get("type") or "unknown"
-                        incoming_list.append(convert_node_to_related_doc(source, rtype))
-
-                    documents[i].relationships = Relationships(
-                        incoming=incoming_list,
-                        outgoing=outgoing_list
-                    )
+            self._check_graph_version()
+
+            # Serve hot articles from the cache; only the misses go to Neo4j
+            relationships_by_id = {}
+            ids = []
+            for doc_id in dict.fromkeys(doc.id for doc in documents):
+                cached = self.relationship_cache.get(doc_id)
+                if cached is None:
+                    ids.append(doc_id)
+                else:
+                    relationships_by_id[doc_id] = cached
+            logger.info(f"Starting retrieve relationships for document ids: {ids} ({len(relationships_by_id)} cached)")
+
+            if ids:
+                # Managed read transaction: retried by the driver on transient errors
+                with self.driver.session() as session:
+                    records = session.execute_read(fetch_relationships, ids)
+
+                for doc_id in ids:
+                    record = records.get(doc_id)
+                    if record is None:
+                        logger.warning(f"Document {doc_id} not found in Neo4j; leaving relationships empty")
+                        relationships = Relationships()
+                    else:
+                        relationships = Relationships(
+                            incoming=append_chain(
+                                [
+                                    convert_node_to_related_doc(node, group["type"])
+                                    for group in record["incoming_rels"] or []
+                                    for node in group["nodes"]
+                                ],
+                                [
+                                    convert_node_to_related_doc(hop["node"], hop["type"], hop["depth"])
+                                    for hop in record.get("incoming_chain") or []
+                                ],
+                                doc_id,
+                            ),
+                            outgoing=append_chain(
+                                [
+                                    convert_node_to_related_doc(node, group["type"])
+                                    for group in record["outgoing_rels"] or []
+                                    for node in group["nodes"]
+                                ],
+                                [
+                                    convert_node_to_related_doc(hop["node"], hop["type"], hop["depth"])
+                                    for hop in record.get("outgoing_chain") or []
+                                ],
+                                doc_id,
+                            ),
+                        )
+                    relationships_by_id[doc_id] = relationships
+                    self.relationship_cache.set(doc_id, relationships)
+
+            # Copies, so callers can modify their documents without touching the cache
+            for i, doc in enumerate(documents):
+                documents[i].relationships = relationships_by_id[doc.id].model_copy(deep=True)
 
             # Optional: brief summary log
             total_in = sum(len(d.relationships.incoming) for d in documents)
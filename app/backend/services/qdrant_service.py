@@ -1,10 +1,15 @@
-from typing import List, Dict, Any, Literal
+from typing import List, Dict, Any, Literal, Optional
 from qdrant_client import QdrantClient
+from haystack.dataclasses import Document
 import logging
+import threading
+import time
 
 from domain.models import RetrievedDocument
 from core.config import settings
-from retrieval.utils import search
+from core.tokens import CONTENT_HASH_FIELD, TOKEN_COUNT_FIELD
+from retrieval.citation import CitationIndex, parse_citations
+from retrieval.utils import embed_query, fetch_by_article_ids, scan_article_payloads, search
 
 logger = logging.getLogger(__name__)
 RetrievalMode = Literal["dense", "sparse", "hybrid"]
@@ -15,11 +20,15 @@ class QdrantService:
     def __init__(self):
         self.config = settings
         self.client = QdrantClient(url=settings.QDRANT_URL)
+        self.citation_index: Optional[CitationIndex] = None
+        self.citation_index_built_at = 0.0
+        self._citation_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
     
     async def embed_query(self, query: str) -> List[float]:
         """Generate embeddings for a query text."""
         try:
-            embedding = await self.adapter.embed_text(query)
+            embedding = embed_query(query)
             logger.info(f"Generated embedding for query: {query[:50]}...")
             return embedding
             
@@ -27,47 +36,167 @@ class QdrantService:
             logger.error(f"Failed to embed query: {e}")
             raise
     
+    def _to_retrieved_document(self, doc: Document, score: Optional[float] = None) -> RetrievedDocument:
+        """Convert a haystack Document into the domain model."""
+        return RetrievedDocument(
+            id=doc.meta.get("id", "unknown"),
+            score=score if score is not None else getattr(doc, "score", None),
+            title=doc.meta.get("title", "unknown"),
+            content=getattr(doc, "content", None),
+            vbpl_id=doc.meta.get("vbpl_id", "unknown"),
+            document_id=doc.meta.get("document_id", "unknown"),
+            document_title=doc.meta.get("document_title", "unknown"),
+            document_status=doc.meta.get("document_status", "unknown"),
+            effective_date=doc.meta.get("effective_date", "unknown"),
+            expired_date=doc.meta.get("expired_date", "unknown"),
+            sua_doi_bo_sung=doc.meta.get("sua_doi_bo_sung", "unknown"),
+            thay_the=doc.meta.get("thay_the", "unknown"),
+            bai_bo=doc.meta.get("bai_bo", "unknown"),
+            dinh_chi=doc.meta.get("dinh_chi", "unknown"),
+            huong_dan_quy_dinh=doc.meta.get("huong_dan_quy_dinh", "unknown"),
+            current_version_id=doc.meta.get("current_version_id"),
+            is_effective=doc.meta.get("is_effective"),
+            adjacency=doc.meta.get("adjacency"),
+            token_count=doc.meta.get(TOKEN_COUNT_FIELD),
+            content_hash=doc.meta.get(CONTENT_HASH_FIELD),
+        )
+
+    def build_citation_index(self) -> CitationIndex:
+        """Rebuild the citation index with a scan of the stored article metadata."""
+        index = CitationIndex.build(scan_article_payloads(["vbpl_id", "document_id"], with_content=False))
+        self.citation_index = index
+        self.citation_index_built_at = time.monotonic()
+        logger.info(f"Built citation index with {len(index)} articles")
+        return index
+
+    def get_citation_index(self) -> CitationIndex:
+        """
+        Return the citation index. It is kept fresh by `start_citation_index_refresh`, off the
+        request path; it is only built here when it was never built yet.
+        """
+        if self.citation_index is None:
+            with self._citation_lock:
+                if self.citation_index is None:
+                    self.build_citation_index()
+        return self.citation_index
+
+    def start_citation_index_refresh(self):
+        """Build the citation index and rebuild it every CITATION_INDEX_TTL_SECONDS in the background."""
+        if not settings.CITATION_FAST_PATH_ENABLED:
+            return
+
+        try:
+            self.build_citation_index()
+        except Exception as e:
+            logger.error(f"Failed to build citation index: {e}")
+
+        def refresh_loop():
+            while not self._stop_refresh.wait(settings.CITATION_INDEX_TTL_SECONDS):
+                try:
+                    self.build_citation_index()
+                except Exception as e:
+                    logger.error(f"Failed to rebuild citation index: {e}")
+
+        threading.Thread(target=refresh_loop, name="citation-index-refresh", daemon=True).start()
+
+    def close(self):
+        """Stop the background citation index refresh."""
+        self._stop_refresh.set()
+
+    def retrieve_cited_documents(self, query: str, top_k: int = 5) -> List[RetrievedDocument]:
+        """
+        Resolve exact citations in the query (e.g. "Điều 2 Thông tư 37/2024/TT-NHNN") to articles.
+
+        Cited articles are fetched by id with score 1.0, without embedding the query.
+        """
+        citations = parse_citations(query)
+        if not any(citation.article is not None for citation in citations):
+            return []
+
+        index = self.get_citation_index()
+        article_ids: List[str] = []
+        for citation in citations:
+            for article_id in index.resolve(citation):
+                if article_id not in article_ids:
+                    article_ids.append(article_id)
+        if not article_ids:
+            return []
+
+        cited_docs = [self._to_retrieved_document(doc, score=1.0) for doc in fetch_by_article_ids(article_ids[:top_k])]
+        logger.info(f"Resolved {len(cited_docs)} cited documents [document IDs: {[doc.id for doc in cited_docs]}]")
+        return cited_docs
+
+    def resolve_current_versions(self, documents: List[RetrievedDocument]) -> List[RetrievedDocument]:
+        """
+        Replace superseded articles with their currently effective version, using the
+        precomputed `current_version_id` (one bulk fetch, no graph traversal).
+
+        The current version takes the rank and score of the article it replaces; it is
+        dropped when it is already in the results. Articles without a current version are kept.
+        """
+        superseded_ids = [
+            doc.current_version_id for doc in documents
+            if doc.current_version_id and doc.current_version_id != doc.id
+        ]
+        if not superseded_ids:
+            return documents
+
+        current_versions = {
+            version.id: version
+            for version in map(self._to_retrieved_document, fetch_by_article_ids(list(dict.fromkeys(superseded_ids))))
+        }
+
+        resolved: List[RetrievedDocument] = []
+        seen = set()
+        for doc in documents:
+            version = current_versions.get(doc.current_version_id) if doc.current_version_id != doc.id else None
+            if version is not None:
+                logger.info(f"Swapped superseded article {doc.id} for its current version {version.id}")
+                doc = version.model_copy(update={"score": doc.score})
+            if doc.id not in seen:
+                seen.add(doc.id)
+                resolved.append(doc)
+        return resolved
+
     async def retrieve_similar_documents(
             self, 
             query: str, 
             mode: RetrievalMode = "hybrid",
             top_k: int = 5,
-            threshold: float = 0.5
+            threshold: float = 0.5,
+            filters: Optional[Dict[str, Any]] = None,
+            fill_remaining: Optional[bool] = None
         ) -> List[RetrievedDocument]:
-            """Retrieve documents similar to the query using specified mode."""
-            
-            try:                
+            """
+            Retrieve documents similar to the query using specified mode, optionally restricted by metadata filters.
+            `fill_remaining` overrides CITATION_FILL_REMAINING (fill the slots left by cited articles with search results).
+            """
+            if fill_remaining is None:
+                fill_remaining = settings.CITATION_FILL_REMAINING
+
+            try:
+                # Exact citations bypass vector search; semantic search only fills the remaining slots
+                cited_docs = []
+                if settings.CITATION_FAST_PATH_ENABLED and not filters:
+                    cited_docs = self.retrieve_cited_documents(query, top_k=top_k)
+                    if cited_docs and (not fill_remaining or len(cited_docs) >= top_k):
+                        return cited_docs
+
                 # Use existing search function from retrieval utils
-                search_results = search(query)
+                search_results = search(query, top_k=top_k, filters=filters)
                 
                 # Convert to domain models
-                retrieved_docs = []
-                for doc in search_results:
-                    # Extract metadata following the specified format
-                    retrieved_doc = RetrievedDocument(
-                        id=doc.meta.get("id", "unknown"),
-                        score=getattr(doc, "score", None),
-                        title=doc.meta.get("title", "unknown"),
-                        content=getattr(doc, "content", None),
-                        vbpl_id=doc.meta.get("vbpl_id", "unknown"),
-                        document_id=doc.meta.get("document_id", "unknown"),
-                        document_title=doc.meta.get("document_title", "unknown"),
-                        document_status=doc.meta.get("document_status", "unknown"),
-                        effective_date=doc.meta.get("effective_date", "unknown"),
-                        expired_date=doc.meta.get("expired_date", "unknown"),
-                        sua_doi_bo_sung=doc.meta.get("sua_doi_bo_sung", "unknown"),
-                        thay_the=doc.meta.get("thay_the", "unknown"),
-                        bai_bo=doc.meta.get("bai_bo", "unknown"),
-                        dinh_chi=doc.meta.get("dinh_chi", "unknown"),
-                        huong_dan_quy_dinh=doc.meta.get("huong_dan_quy_dinh", "unknown"),
-                    )        
-                    retrieved_docs.append(retrieved_doc)
+                retrieved_docs = [self._to_retrieved_document(doc) for doc in search_results]
                 logger.info(f"Sucessfully retrieved {len(retrieved_docs)} documents [document IDs: {[doc.id for doc in retrieved_docs]}]")
 
                 # Apply threshold filtering
                 filtered_docs = [doc for doc in retrieved_docs if doc.score >= threshold]
                 logger.info(f"Filtered down to {len(filtered_docs)} documents above threshold {threshold} [document IDs: {[doc.id for doc in filtered_docs]}]")
 
+                if cited_docs:
+                    cited_ids = {doc.id for doc in cited_docs}
+                    filtered_docs = cited_docs + [doc for doc in filtered_docs if doc.id not in cited_ids][:top_k - len(cited_docs)]
+
                 return filtered_docs
 
             except Exception as e:
@@ -77,6 +206,12 @@ class QdrantService:
     async def health_check(self) -> bool:
         """Check if Qdrant is healthy."""
         try:
+            if settings.DOCUMENT_STORE_TYPE == "embedded":
+                # No Qdrant server in embedded deployments; the store lives in-process
+                from retrieval.document_stores import document_store
+                logger.info(f"Embedded document store contains {document_store.count_documents()} documents")
+                return True
+
             if not self.client:
                 logger.error("Qdrant client not initialized")
                 return False
@@ -0,0 +1,80 @@
+"""
+Cross-encoder reranking of retrieved articles.
+"""
+import hashlib
+import logging
+from typing import Any, Dict, List
+
+from core.cache import LRUCache
+from core.config import settings
+from domain.models import RetrievedDocument
+
+logger = logging.getLogger(__name__)
+
+
+class RerankService:
+    """Service for reranking retrieved documents with a cross-encoder."""
+
+    def __init__(self):
+        self.model = None
+        self.score_cache = LRUCache(max_size=settings.RERANKER_CACHE_SIZE)
+
+    def _load_model(self):
+        """Load the ONNX cross-encoder on first use."""
+        if self.model is None:
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+            self.model = TextCrossEncoder(
+                model_name=settings.RERANKER_MODEL_NAME,
+                threads=settings.RERANKER_THREADS or None,
+            )
+            logger.info(f"Loaded reranker model {settings.RERANKER_MODEL_NAME}")
+        return self.model
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[RetrievedDocument],
+        top_k: int = 5,
+    ) -> List[RetrievedDocument]:
+        """
+        Score every (query, article) pair and keep the best `top_k` articles.
+
+        Scores are cached by (query hash, article id); only uncached pairs are sent
+        to the model, in batches of RERANKER_BATCH_SIZE.
+        """
+        if not documents:
+            return documents
+
+        query_hash = hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()
+
+        scores: Dict[str, float] = {}
+        pending: List[RetrievedDocument] = []
+        for doc in documents:
+            cached = self.score_cache.get((query_hash, doc.id))
+            if cached is None:
+                pending.append(doc)
+            else:
+                scores[doc.id] = cached
+
+        if pending:
+            model = self._load_model()
+            passages = [f"{doc.title}\n{doc.content}" for doc in pending]
+            for doc, score in zip(pending, model.rerank(query, passages, batch_size=settings.RERANKER_BATCH_SIZE)):
+                scores[doc.id] = float(score)
+                self.score_cache.set((query_hash, doc.id), float(score))
+
+        logger.info(f"Reranked {len(documents)} documents ({len(pending)} scored, {len(documents) - len(pending)} cached)")
+
+        reranked = sorted(documents, key=lambda doc: scores[doc.id], reverse=True)
+        for doc in reranked:
+            doc.score = scores[doc.id]
+        return reranked[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return reranker cache statistics."""
+        return {"score_cache": self.score_cache.stats()}
+
+
+# Global service instance
+rerank_service = RerankService()
@@ -0,0 +1,142 @@
+"""
+Retrieval-only search with cursor pagination, without Neo4j expansion or LLM synthesis by default.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from core.cache import LRUCache
+from core.config import settings
+from domain.models import Relationships, RetrievedDocument, SearchFilters, SearchRequest, SearchResponse
+from services.neo4j_service import neo4j_service
+from services.qdrant_service import qdrant_service
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor is malformed or belongs to a different query."""
+
+
+class SearchService:
+    """Service for the retrieval-only search endpoint."""
+
+    def __init__(self):
+        self.qdrant_service = qdrant_service
+        self.neo4j_service = neo4j_service
+        # Ranked results per (query, filters), so later pages do not embed the query again
+        self.ranking_cache = LRUCache(max_size=settings.SEARCH_CACHE_SIZE, ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def _fingerprint(query: str, filters: Optional[SearchFilters]) -> str:
+        """
+        Stable hash of a query and its filters; cursors are only valid for the same fingerprint.
+        The query is taken as is, since retrieval ranks the raw query.
+        """
+        filters_json = filters.model_dump_json(exclude_none=True) if filters else ""
+        return hashlib.sha1(f"{query}\n{filters_json}".encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _encode_cursor(fingerprint: str, offset: int) -> str:
+        payload = json.dumps({"f": fingerprint, "o": offset}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, fingerprint: str) -> int:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            offset = int(payload["o"])
+        except (binascii.Error, ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError("Malformed cursor") from e
+
+        if payload.get("f") != fingerprint or offset < 0:
+            raise InvalidCursorError("Cursor does not belong to this query")
+        return offset
+
+    @staticmethod
+    def _to_haystack_filters(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+        """Convert request filters into haystack metadata filters."""
+        if not filters:
+            return None
+
+        conditions = [
+            {"field": f"meta.{field}", "operator": "==", "value": value}
+            for field, value in filters.model_dump(exclude_none=True).items()
+        ]
+        if not conditions:
+            return None
+        return {"operator": "AND", "conditions": conditions}
+
+    async def _ranked_documents(
+        self,
+        query: str,
+        filters: Optional[SearchFilters],
+        fingerprint: str,
+        depth: int
+    ) -> List[RetrievedDocument]:
+        """
+        Return at least `depth` ranked documents (fewer if the collection runs out).
+
+        Rankings are cached; a deeper page re-runs retrieval only when the cached
+        ranking is too short and was not already exhausted.
+        """
+        cached = self.ranking_cache.get(fingerprint)
+        if cached is not None:
+            ranked, exhausted = cached
+            if exhausted or len(ranked) >= depth:
+                return ranked
+
+        # Fetch a few pages ahead so the next requests are served from the cache
+        top_k = min(depth * 2, settings.SEARCH_MAX_RESULTS)
+        ranked = await self.qdrant_service.retrieve_similar_documents(
+            query=query,
+            top_k=top_k,
+            threshold=0.0,
+            filters=self._to_haystack_filters(filters),
+            # Cited articles come first, but the ranking must go on past them to paginate
+            fill_remaining=True
+        )
+        self.ranking_cache.set(fingerprint, (ranked, len(ranked) < top_k or top_k >= settings.SEARCH_MAX_RESULTS))
+        return ranked
+
+    async def search(self, request: SearchRequest) -> SearchResponse:
+        """Return one page of ranked documents for the request."""
+        start_time = time.time()
+
+        fingerprint = self._fingerprint(request.query, request.filters)
+        offset = self._decode_cursor(request.cursor, fingerprint) if request.cursor else 0
+
+        # One extra document tells whether there is a next page
+        depth = min(offset + request.limit + 1, settings.SEARCH_MAX_RESULTS)
+        ranked = await self._ranked_documents(request.query, request.filters, fingerprint, depth)
+
+        end = min(offset + request.limit, settings.SEARCH_MAX_RESULTS)
+        page = [doc.model_copy(deep=True) for doc in ranked[offset:end]]
+        next_cursor = self._encode_cursor(fingerprint, end) if len(ranked) > end else None
+
+        if request.expand_relationships and page:
+            page = self.neo4j_service.get_document_relationships(query=request.query, documents=page)
+
+        logger.info(f"Search returned {len(page)} documents at offset {offset} [document IDs: {[doc.id for doc in page]}]")
+
+        return SearchResponse(
+            documents=page,
+            next_cursor=next_cursor,
+            metadata={"offset": offset, "processing_time": time.time() - start_time}
+        )
+
+    def get_relationships(self, article_id: str) -> Relationships:
+        """Load the relationships of a single article, for lazy expansion from the search results."""
+        documents = self.neo4j_service.get_document_relationships(
+            query="",
+            documents=[RetrievedDocument(id=article_id)]
+        )
+        return documents[0].relationships
+
+
+# Global service instance
+search_service = SearchService()
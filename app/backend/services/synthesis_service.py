@@ -1,19 +1,26 @@
 """
 Synthesis service for LLM-based response generation.
 """
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
 import json
-import tiktoken
+import unicodedata
 from openai import OpenAI
 from loguru import logger
 import logging
 
+from core.cache import LRUCache, SQLiteCache
 from core.config import settings
-from core.prompts import LEGAL_RAG_PROMPT
-from domain.models import RetrievedDocument
+from core.prompts import LEGAL_RAG_PROMPTS
+from core.tokens import content_hash, count_tokens, snippet
+from domain.models import RelatedDocument, RetrievedDocument
+from services.context_packer import ContextPacker, Fragment, PackedDocument
 
 logger = logging.getLogger(__name__)
 
+# Placeholder for the [Dn] reference in cached compact fragments, filled in when the context is built
+_REF = "\x00"
+
 class SynthesisService:
     """Service for synthesizing responses using LLM."""
     
@@ -21,7 +28,28 @@ class SynthesisService:
         """Initialize synthesis service."""
 
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self.context_format = settings.CONTEXT_FORMAT
+        if self.context_format not in LEGAL_RAG_PROMPTS:
+            raise ValueError(f"unknown CONTEXT_FORMAT: {self.context_format}")
+        self.system_prompt = LEGAL_RAG_PROMPTS[self.context_format]
+        self.system_prompt_tokens = self._count_tokens(self.system_prompt)
+        # Rendered documents/neighbors with their token counts, by article id and version
+        self.fragment_cache = LRUCache(
+            max_size=settings.CONTEXT_FRAGMENT_CACHE_SIZE,
+            size_fn=lambda fragment: len(fragment.text),
+        )
+        self.context_packer = ContextPacker(
+            document_cost=lambda doc: self._document_fragment(doc).tokens,
+            neighbor_cost=lambda rel, direction: self._neighbor_fragment(rel, direction).tokens,
+        )
+        # Generated responses by prompt fingerprint, persisted across restarts
+        self.prompt_version = content_hash(self.system_prompt)
+        self.response_cache: Optional[SQLiteCache] = None
+        if settings.RESPONSE_CACHE_ENABLED:
+            self.response_cache = SQLiteCache(
+                settings.RESPONSE_CACHE_PATH,
+                ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+            )
         logger.info("SynthesisService initialized")
     
     def generate_response(
@@ -32,20 +60,57 @@ class SynthesisService:
         """
         Generate response using retrieved documents and relationships.
         """
+        response, _ = self.generate_response_with_report(query, related_documents)
+        return response
+
+    def generate_response_with_report(
+        self,
+        query: str,
+        related_documents: List[RetrievedDocument],
+        corpus_version: Optional[Any] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate response like `generate_response`, also returning the context packing
+        report (estimated tokens, budget and dropped documents/neighbors).
+
+        With RESPONSE_CACHE_ENABLED, a response generated for the same question, prompt and
+        packed articles is returned without calling the LLM (report["cached"] is True).
+        Cached responses are dropped when `corpus_version` (the graph version) changes; an
+        unknown (None) version leaves the cache as it is.
+        """
+        report: Dict[str, Any] = {}
         try:
-            context = self._prepare_structured_context(related_documents)
+            # The context gets what MAX_INPUT_TOKENS leaves after the system prompt and the question
+            budget = settings.MAX_INPUT_TOKENS - self.system_prompt_tokens - self._count_tokens(query)
+            packed = self.context_packer.pack(related_documents, budget=budget)
+            report = packed.report()
+            if packed.dropped:
+                logger.info(f"Context budget {budget} tokens: dropped {len(packed.dropped)} documents/neighbors")
+
+            cache_key = None
+            if self.response_cache is not None:
+                if corpus_version is not None:
+                    self.response_cache.set_version(corpus_version)
+                cache_key = self._response_key(query, packed.documents)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Returning cached response")
+                    report["cached"] = True
+                    return cached, report
+
+            context = self._prepare_structured_context(packed.documents)
 
             content = f"""
                 <input>{query}</input>
                 <legal_documents>{context}</legal_documents>
             """.strip()
 
-            logger.info(f"Prepared context for query ~{self._count_tokens(context)}")
+            logger.info(f"Prepared context for query ~{packed.tokens}")
                 
             response = self.client.chat.completions.create(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": LEGAL_RAG_PROMPT},
+                    {"role": "system", "content": self.system_prompt},
                     {"role": "user", "content": content}
                 ],
                 temperature=settings.GENERATION_TEMPERATURE,
@@ -53,98 +118,270 @@ class SynthesisService:
             
             generated_response = response.choices[0].message.content
             logger.info(f"Successfully generated response using OpenAI model {settings.OPENAI_MODEL}")
+            if cache_key is not None and generated_response:
+                self.response_cache.set(cache_key, generated_response)
             
-            return generated_response
+            return generated_response, report
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return "Xin lỗi, đã có lỗi xảy ra khi tạo phản hồi. Vui lòng thử lại sau."
-    
-    def _prepare_structured_context(self, retrieved_documents: List[RetrievedDocument]) -> str:
-        """
-        Prepare structured context with relationship information from retrieved documents.
-        """
-        documents_data = []
-        
-        for doc in retrieved_documents:
-            # Prepare main document info
-            doc_data = {
-                "id": doc.id,
-                "title": doc.title,
-                "vbpl_id": doc.vbpl_id,
-                "document_id": doc.document_id,
-                "document_title": doc.document_title,
-                "document_status": doc.document_status,
-                "effective_date": doc.effective_date,
-                "expired_date": doc.expired_date,
-                "content": doc.content
-            }
+            return "Xin lỗi, đã có lỗi xảy ra khi tạo phản hồi. Vui lòng thử lại sau.", report
+
+    def _response_key(self, query: str, packed_documents: List[PackedDocument]) -> str:
+        """
+        Response cache key: model, prompt version and context format, generation settings,
+        query fingerprint (normalized text) and the sorted article id, content version and
+        validity (document_status, is_effective, current_version_id) of the packed documents
+        and neighbors.
+        """
+        fingerprint = " ".join(unicodedata.normalize("NFC", query).casefold().split())
+        articles = sorted((
+            [
+                packed.document.id, packed.document.content_hash or content_hash(packed.document.content),
+                packed.document.document_status, packed.document.is_effective, packed.document.current_version_id,
+            ]
+            for packed in packed_documents
+        ), key=lambda article: article[:2])
+        neighbors = sorted(
+            [direction, rel.rela_type, rel.id, content_hash(rel.content), rel.document_status]
+            for packed in packed_documents
+            for direction, rels in (("incoming", packed.incoming), ("outgoing", packed.outgoing))
+            for rel in rels
+        )
+        key = [
+            settings.OPENAI_MODEL, self.prompt_version, self.context_format, settings.GENERATION_TEMPERATURE,
+            content_hash(fingerprint), articles, neighbors,
+        ]
+        return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _document_data(self, doc: RetrievedDocument) -> Dict[str, Any]:
+        """
+        Main document info, with the relationship fields from chunking.
+        """
+        doc_data = {
+            "id": doc.id,
+            "title": doc.title,
+            "vbpl_id": doc.vbpl_id,
+            "document_id": doc.document_id,
+            "document_title": doc.document_title,
+            "document_status": doc.document_status,
+            "effective_date": doc.effective_date,
+            "expired_date": doc.expired_date,
+            "content": doc.content
+        }
+        if settings.SUPERSEDED_HANDLING != "off" and doc.is_effective is not None:
+            doc_data["is_effective"] = doc.is_effective
+            if doc.current_version_id != doc.id:
+                doc_data["current_version_id"] = doc.current_version_id
+
+        # Process relationship fields from chunking
+        relationships = {}
+        if hasattr(doc, 'sua_doi_bo_sung') and doc.sua_doi_bo_sung != "unknown":
+            relationships["Sửa đổi, bổ sung"] = doc.sua_doi_bo_sung
             
-            # Add relationship information
-            relationships = {}
+        if hasattr(doc, 'thay_the') and doc.thay_the != "unknown":
+            relationships["Thay thế"] = doc.thay_the
             
-            # Process relationship fields from chunking
-            if hasattr(doc, 'sua_doi_bo_sung') and doc.sua_doi_bo_sung != "unknown":
-                relationships["Sửa đổi, bổ sung"] = doc.sua_doi_bo_sung
-                
-            if hasattr(doc, 'thay_the') and doc.thay_the != "unknown":
-                relationships["Thay thế"] = doc.thay_the
-                
-            if hasattr(doc, 'bai_bo') and doc.bai_bo != "unknown":
-                relationships["Bãi bỏ"] = doc.bai_bo
-                
-            if hasattr(doc, 'dinh_chi') and doc.dinh_chi != "unknown":
-                relationships["Đình chỉ việc thi hành"] = doc.dinh_chi
-                
-            if hasattr(doc, 'huong_dan_quy_dinh') and doc.huong_dan_quy_dinh != "unknown":
-                relationships["Hướng dẫn, quy định"] = doc.huong_dan_quy_dinh
+        if hasattr(doc, 'bai_bo') and doc.bai_bo != "unknown":
+            relationships["Bãi bỏ"] = doc.bai_bo
             
-            # Process incoming and outgoing relationships
-            if doc.relationships:
-                if doc.relationships.incoming:
-                    relationships["incoming_references"] = [
-                        {
-                            "relationship_type": rel.rela_type,
-                            "id": rel.id,
-                            "title": rel.title,
-                            "document_id": rel.document_id,
-                            "document_title": rel.document_title,
-                            "document_status": rel.document_status,
-                            "effective_date": rel.effective_date,
-                            "expired_date": rel.expired_date,
-                            "content_snippet": rel.content[:200] + "..." if len(rel.content) > 200 else rel.content
-                        } for rel in doc.relationships.incoming
-                    ]
-                
-                if doc.relationships.outgoing:
-                    relationships["outgoing_references"] = [
-                        {
-                            "relationship_type": rel.rela_type,
-                            "id": rel.id,
-                            "title": rel.title,
-                            "document_id": rel.document_id,
-                            "document_title": rel.document_title,
-                            "document_status": rel.document_status,
-                            "effective_date": rel.effective_date,
-                            "expired_date": rel.expired_date,
-                            "content_snippet": rel.content[:200] + "..." if len(rel.content) > 200 else rel.content
-                        } for rel in doc.relationships.outgoing
-                    ]
+        if hasattr(doc, 'dinh_chi') and doc.dinh_chi != "unknown":
+            relationships["Đình chỉ việc thi hành"] = doc.dinh_chi
             
+        if hasattr(doc, 'huong_dan_quy_dinh') and doc.huong_dan_quy_dinh != "unknown":
+            relationships["Hướng dẫn, quy định"] = doc.huong_dan_quy_dinh
+
+        if relationships:
+            doc_data["relationships"] = relationships
+        return doc_data
+
+    def _neighbor_data(self, rel: RelatedDocument) -> Dict[str, Any]:
+        """
+        Neighbor info with a content snippet.
+        """
+        return {
+            "relationship_type": rel.rela_type,
+            "id": rel.id,
+            "title": rel.title,
+            "document_id": rel.document_id,
+            "document_title": rel.document_title,
+            "document_status": rel.document_status,
+            "effective_date": rel.effective_date,
+            "expired_date": rel.expired_date,
+            "content_snippet": snippet(rel.content)
+        }
+
+    def _document_fragment(self, doc: RetrievedDocument) -> Fragment:
+        """
+        The document as rendered in the context (without neighbors) and its token count,
+        cached by article id and version. With a `token_count` from indexing, only the
+        fields around the content are encoded.
+        """
+        key = (
+            self.context_format, doc.id, doc.content_hash or content_hash(doc.content),
+            doc.title, doc.vbpl_id, doc.document_id, doc.document_title, doc.document_status,
+            doc.effective_date, doc.expired_date, doc.is_effective, doc.current_version_id,
+            repr((doc.sua_doi_bo_sung, doc.thay_the, doc.bai_bo, doc.dinh_chi, doc.huong_dan_quy_dinh)),
+        )
+        fragment = self.fragment_cache.get(key)
+        if fragment is None:
+            fragment = self._render_document(doc)
+            if doc.token_count is not None:
+                fragment.tokens = self._render_document(doc.model_copy(update={"content": ""})).tokens + doc.token_count
+            self.fragment_cache.set(key, fragment)
+        return fragment
+
+    def _neighbor_fragment(self, rel: RelatedDocument, direction: str) -> Fragment:
+        """
+        The neighbor as rendered in the context and its token count, cached like documents;
+        `snippet_token_count` from indexing stands in for encoding the snippet.
+        """
+        key = (
+            self.context_format, direction, rel.rela_type, rel.id, rel.title, rel.document_id,
+            rel.document_title, rel.document_status, rel.effective_date, rel.expired_date, rel.content,
+        )
+        fragment = self.fragment_cache.get(key)
+        if fragment is None:
+            fragment = self._render_neighbor(rel, direction)
+            if rel.snippet_token_count is not None:
+                fragment.tokens = self._render_neighbor(rel.model_copy(update={"content": ""}), direction).tokens \
+                    + rel.snippet_token_count
+            self.fragment_cache.set(key, fragment)
+        return fragment
+
+    def _render_document(self, doc: RetrievedDocument) -> Fragment:
+        """
+        JSON: the document's field lines, its chunking relationships kept apart so neighbors can
+        join them. Compact: the article record, with a placeholder for its [Dn] reference.
+        """
+        if self.context_format == "compact":
+            text = self._compact_document(doc, _REF)
+            return Fragment(text=text, tokens=self._count_tokens(text.replace(_REF, "D0", 1)))
+
+        doc_data = self._document_data(doc)
+        relationships = doc_data.pop("relationships", {})
+        text = ",\n".join(_json_members(doc_data, 4))
+        relationship_lines = _json_members(relationships, 6)
+        return Fragment(
+            text=text,
+            tokens=self._count_tokens("\n".join([text, *relationship_lines])),
+            relationships=relationship_lines,
+        )
+
+    def _render_neighbor(self, rel: RelatedDocument, direction: str) -> Fragment:
+        """
+        JSON: the neighbor object, indented as a relationships list item. Compact: the neighbor line.
+        """
+        if self.context_format == "compact":
+            text = self._compact_neighbor(rel, direction, _REF)
+            return Fragment(text=text, tokens=self._count_tokens(text.replace(_REF, "D0", 1)))
+
+        text = "        {\n" + ",\n".join(_json_members(self._neighbor_data(rel), 10)) + "\n        }"
+        return Fragment(text=text, tokens=self._count_tokens(text))
+
+    def _prepare_structured_context(self, packed_documents: List[PackedDocument]) -> str:
+        """
+        Prepare structured context with relationship information from the packed documents,
+        by joining their cached fragments.
+        """
+        if self.context_format == "compact":
+            return self._prepare_compact_context(packed_documents)
+
+        # Same text as json.dumps(documents, ensure_ascii=False, indent=2)
+        blocks = []
+        for packed in packed_documents:
+            fragment = self._document_fragment(packed.document)
+            relationships = list(fragment.relationships)
+
+            # Process incoming and outgoing relationships
+            for key, direction, rels in (
+                ("incoming_references", "incoming", packed.incoming),
+                ("outgoing_references", "outgoing", packed.outgoing),
+            ):
+                if rels:
+                    items = ",\n".join(self._neighbor_fragment(rel, direction).text for rel in rels)
+                    relationships.append(f'      "{key}": [\n{items}\n      ]')
+
+            body = fragment.text
             if relationships:
-                doc_data["relationships"] = relationships
-            
-            documents_data.append(doc_data)
-        
-        # Convert to JSON for structured representation
-        return json.dumps(documents_data, ensure_ascii=False, indent=2)
+                body += ',\n    "relationships": {\n' + ",\n".join(relationships) + "\n    }"
+            blocks.append("  {\n" + body + "\n  }")
+
+        return "[\n" + ",\n".join(blocks) + "\n]" if blocks else "[]"
     
+    def _prepare_compact_context(self, packed_documents: List[PackedDocument]) -> str:
+        """
+        Line-oriented context (CONTEXT_FORMAT=compact): every source document is listed once
+        under DOCUMENTS and referenced as [Dn]; articles and neighbor lines follow under
+        ARTICLES, and unknown or empty fields are left out.
+        """
+        document_refs: Dict[Tuple[str, ...], str] = {}
+
+        def document_ref(item) -> str:
+            key = (item.document_id, item.document_title, item.document_status, item.effective_date, item.expired_date)
+            if key not in document_refs:
+                document_refs[key] = f"D{len(document_refs) + 1}"
+            return document_refs[key]
+
+        article_lines = []
+        for packed in packed_documents:
+            fragment = self._document_fragment(packed.document)
+            article_lines.append(fragment.text.replace(_REF, document_ref(packed.document), 1))
+            for direction, rels in (("incoming", packed.incoming), ("outgoing", packed.outgoing)):
+                for rel in rels:
+                    fragment = self._neighbor_fragment(rel, direction)
+                    article_lines.append(fragment.text.replace(_REF, document_ref(rel), 1))
+
+        document_lines = []
+        for (document_id, document_title, status, effective_date, expired_date), ref in document_refs.items():
+            fields = [
+                document_title if _known(document_title) else None,
+                document_id if _known(document_id) else None,
+                status if _known(status) else None,
+                f"hiệu lực: {effective_date}" if _known(effective_date) else None,
+                f"hết hiệu lực: {expired_date}" if _known(expired_date) else None,
+            ]
+            document_lines.append(f"[{ref}] " + " | ".join(field for field in fields if field))
+
+        return "\n".join(["DOCUMENTS", *document_lines, "", "ARTICLES", *article_lines])
+
+    def _compact_document(self, doc: RetrievedDocument, ref: str) -> str:
+        """
+        "=== id | Dn | title", an optional "[...]" line of relations and validity, then the content.
+        """
+        lines = [" | ".join(field for field in (doc.id, ref, doc.title) if _known(field))]
+
+        notes = [
+            f"{label}: {', '.join(map(str, value)) if isinstance(value, list) else value}"
+            for label, value in self._document_data(doc).get("relationships", {}).items()
+            if _known(value)
+        ]
+        if settings.SUPERSEDED_HANDLING != "off" and doc.is_effective is not None:
+            notes.append(f"is_effective: {str(doc.is_effective).lower()}")
+            if doc.current_version_id != doc.id:
+                notes.append(f"current_version: {doc.current_version_id or 'none'}")
+        if notes:
+            lines.append(f"[{'; '.join(notes)}]")
+
+        if _known(doc.content):
+            lines.append(doc.content)
+        return "=== " + "\n".join(lines)
+
+    def _compact_neighbor(self, rel: RelatedDocument, direction: str, ref: str) -> str:
+        """
+        "<- TYPE | id | Dn | title: snippet" for incoming neighbors, "->" for outgoing ones.
+        """
+        arrow = "<-" if direction == "incoming" else "->"
+        line = " | ".join(field for field in (f"{arrow} {rel.rela_type}", rel.id, ref, rel.title) if _known(field))
+        content_snippet = snippet(rel.content)
+        return f"{line}: {content_snippet}" if _known(content_snippet) else line
+
     def _count_tokens(self, text: str) -> int:
         """
-        Count tokens in text using tiktoken.
+        Count tokens in text with the encoding of OPENAI_MODEL.
         """
         try:
-            return len(self.encoding.encode(text))
+            return count_tokens(text)
         except Exception as e:
             logger.warning(f"Token counting failed, using character estimate: {e}")
             return len(text) // 4  # Rough estimate: 4 chars per token
@@ -167,5 +404,20 @@ class SynthesisService:
             return False
 
 
+def _json_members(data: Dict[str, Any], indent: int) -> List[str]:
+    """`"key": value` lines of a JSON object whose members sit at `indent`, as json.dumps(indent=2) writes them."""
+    pad = " " * indent
+    return [
+        f"{pad}{json.dumps(key, ensure_ascii=False)}: "
+        + json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + pad)
+        for key, value in data.items()
+    ]
+
+
+def _known(value: Any) -> bool:
+    """False for missing, empty and "unknown" values, which the compact context leaves out."""
+    return value not in (None, "", "unknown", [], {})
+
+
 # Global service instances
 synthesis_service = SynthesisService()
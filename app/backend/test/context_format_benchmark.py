@@ -0,0 +1,69 @@
+"""
+Compare the prompt size of the JSON and compact context formats on real retrieval results.
+
+Needs the Qdrant and Neo4j services and the tiktoken encoding of OPENAI_MODEL: counts are
+only reported with the real encoding, never with the character estimate fallback.
+
+    PYTHONPATH=. python test/context_format_benchmark.py "câu hỏi 1" "câu hỏi 2" ...
+"""
+import asyncio
+import sys
+
+from core.config import settings
+from core.prompts import LEGAL_RAG_PROMPTS
+from core.tokens import count_tokens
+from services.context_packer import PackedDocument
+from services.neo4j_service import neo4j_service
+from services.qdrant_service import qdrant_service
+from services.synthesis_service import synthesis_service
+
+SAMPLE_QUERIES = [
+    "Cơ cấu tổ chức của Ngân hàng Nhà nước Việt Nam được quy định tại nghị định 102/2022 như thế nào?",
+    "Điều 2 Thông tư 37/2024/TT-NHNN quy định gì",
+    "Trình tự Ngân hàng Nhà nước xem xét, quyết định gia hạn thời hạn cho vay đặc biệt đối với tổ chức tín dụng được kiểm soát đặc biệt như thế nào?",
+]
+
+
+def context_tokens(documents, context_format):
+    """Tokens of the full context (no budget) and of the system prompt in the given format."""
+    synthesis_service.context_format = context_format
+    packed = [
+        PackedDocument(document=doc, incoming=doc.relationships.incoming, outgoing=doc.relationships.outgoing)
+        for doc in documents
+    ]
+    context = synthesis_service._prepare_structured_context(packed)
+    return count_tokens(context), count_tokens(LEGAL_RAG_PROMPTS[context_format])
+
+
+async def run_benchmark(queries):
+    original_format = synthesis_service.context_format
+    totals = {"json": 0, "compact": 0}
+
+    print(f"{'json':>8} {'compact':>8} {'saved':>7}  query")
+    for query in queries:
+        documents = await qdrant_service.retrieve_similar_documents(
+            query=query,
+            top_k=settings.RETRIEVER_TOP_K,
+            threshold=settings.RETRIEVER_SCORE_THRESHOLD
+        )
+        documents = neo4j_service.get_document_relationships(query=query, documents=documents)
+
+        tokens = {context_format: context_tokens(documents, context_format)[0] for context_format in totals}
+        for context_format, count in tokens.items():
+            totals[context_format] += count
+        saved = 1 - tokens["compact"] / tokens["json"] if tokens["json"] else 0.0
+        print(f"{tokens['json']:>8} {tokens['compact']:>8} {saved:>7.1%}  {query[:60]}")
+
+    saved = 1 - totals["compact"] / totals["json"] if totals["json"] else 0.0
+    print(f"{totals['json']:>8} {totals['compact']:>8} {saved:>7.1%}  TOTAL (context only)")
+    print(f"System prompt: json={context_tokens([], 'json')[1]} compact={context_tokens([], 'compact')[1]} tokens")
+
+    synthesis_service.context_format = original_format
+
+
+if __name__ == "__main__":
+    try:
+        count_tokens("")
+    except Exception as e:
+        sys.exit(f"Cannot load the tiktoken encoding of {settings.OPENAI_MODEL}: {e}")
+    asyncio.run(run_benchmark(sys.argv[1:] or SAMPLE_QUERIES))
@@ -4,6 +4,10 @@ from haystack.dataclasses import Document
 from test.retrieval_utils import run_query_with_generation
 from core.config import settings
 from neo4j import GraphDatabase
+from retrieval.indexing.graph_loader import load_graph, sync_graph
+from retrieval.indexing.adjacency import materialize_adjacency
+from retrieval.indexing.centrality import materialize_centrality
+from retrieval.indexing.validity import materialize_validity
 
 test_document_ids = ["157663", "171352", "34094"]
 uri = settings.NEO4J_URI
@@ -50,79 +54,26 @@ def embedding_dieu_data(chunks_file):
     print(f"Embedding {len(documents)} documents into Qdrant...")
     insert(documents)
 
-def save_graph_to_neo4j(chunks_file):
+def save_graph_to_neo4j(chunks_file, sync=False):
     chunk_data = read_json_file(chunks_file)
-    REL_MAP = {
-        "sua_doi_bo_sung": "SUA_DOI_BO_SUNG",
-        "huong_dan_quy_dinh": "HUONG_DAN_QUY_DINH",
-        "thay_the": "THAY_THE",
-        "bai_bo": "BAI_BO",
-        "dinh_chi": "DINH_CHI",
-    }
-    node_batch = []
-    rel_batch = []
-    for row in chunk_data:
-        node_batch.append({
-            k: row.get(k)
-            for k in [
-                "id", "title", "content", "vbpl_id", "document_id",
-                "document_title", "document_status", "effective_date", "expired_date"
-            ]
-        })
-
-        relation_entries = []
-        
-        for raw_key, rel_type in REL_MAP.items():
-            targets = row.get(raw_key, [])
-            if targets:
-                targets = [str(t) for t in targets]
-                relation_entries.append({"type": rel_type, "targets": targets})
-
-        if relation_entries:
-            rel_batch.append({"id": row["id"], "relations": relation_entries})
-
-    print(f"Length of node_batch: {len(node_batch)}")
-    print(f"Length of rel_batch: {len(rel_batch)}")
-
-    def create_nodes(tx, nodes):
-        for node in nodes:
-            tx.run(
-                """
-                MERGE (a:Article {id: $id})
-                SET a.title = $title,
-                    a.content = $content,
-                    a.vbpl_id = $vbpl_id,
-                    a.document_id = $document_id,
-                    a.document_title = $document_title,
-                    a.document_status = $document_status,
-                    a.effective_date = $effective_date,
-                    a.expired_date = $expired_date
-                """,
-                **node
-            )
-
-    def create_relationships(tx, rels):
-        for rel in rels:
-            source_id = rel["id"]
-            for entry in rel["relations"]:
-                rel_type = entry["type"]
-                for target_id in entry["targets"]:
-                    tx.run(
-                        """
-                        MATCH (a:Article {id: $source_id})
-                        MATCH (b:Article {id: $target_id})
-                        MERGE (a)-[r:%s]->(b)
-                        """ % rel_type,
-                        source_id=source_id,
-                        target_id=target_id
-                    )
+    print(f"Loading {len(chunk_data)} articles into Neo4j...")
 
-    with driver.session() as session:
-        print("Creating nodes in Neo4j...")
-        session.execute_write(create_nodes, node_batch)
-        print("Creating relationships in Neo4j...")
-        session.execute_write(create_relationships, rel_batch)
-        print("Graph creation complete.")
+    if sync:
+        # Only new, changed and deleted nodes and edges, compared through the stored hashes
+        sync_graph(driver, chunk_data)
+    else:
+        # Batched UNWIND writes, resumable through the checkpoint file; bumps the graph version when done
+        load_graph(driver, chunk_data, checkpoint_path=f"{chunks_file}.graph_load.json")
+    print("Graph creation complete.")
+
+    # Current-version pointers for superseded articles, in Neo4j and the Qdrant payload
+    materialize_validity(driver)
+
+    # PageRank/in-degree prior for CENTRALITY_BOOST
+    materialize_centrality(driver)
+
+    # Adjacency in the payload for GRAPH_BACKEND=payload
+    materialize_adjacency(driver)
 
 
 